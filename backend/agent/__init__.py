@@ -1,17 +1,29 @@
-from langchain_openai import ChatOpenAI
-from langgraph.graph import END, StateGraph
+from functools import lru_cache
 
-from backend.agent.edges import GraphEdges
-from backend.agent.generate_chain import create_generate_chain
-from backend.agent.grader import GraderUtils
-from backend.agent.graph import GraphState
-from backend.agent.nodes import GraphNodes
-from backend.agent.vector_store import get_pinecone_vector_store, Retriever
-from backend.config import settings
-from backend.utils import get_tavily_web_search_tool
 
+def compile_graph(grading_mode: str | None = None):
+    """
+    Compile the agent workflow
 
-def compile_graph():
+    Args:
+        grading_mode (str | None): How retrieved documents are graded, a ``GradingModeEnum`` value; defaults to the
+            ``RETRIEVAL_GRADING_MODE`` setting
+
+    Returns:
+        The compiled LangGraph workflow
+    """
+    # LangChain, LangGraph and the client SDKs are imported here so that importing the API stays cheap
+    from langchain_openai import ChatOpenAI
+    from langgraph.graph import END, StateGraph
+
+    from backend.agent.edges import GraphEdges
+    from backend.agent.grade_cache import get_grade_cache
+    from backend.agent.grader import GraderUtils
+    from backend.agent.graph import GraphState, GradingModeEnum
+    from backend.agent.nodes import GraphNodes
+    from backend.agent.vector_store import get_pinecone_vector_store, Retriever
+    from backend.config import settings
+    from backend.utils import get_tavily_web_search_tool
 
     # Vector Store
     _vector_store = get_pinecone_vector_store()
@@ -25,8 +37,12 @@ def compile_graph():
     llm = ChatOpenAI(model="gpt-4o-mini", temperature=0, openai_api_key=settings.OPENAI_API_KEY)
 
     # Evaluation - Grader
+    grading_mode = GradingModeEnum(grading_mode or settings.RETRIEVAL_GRADING_MODE)
     grader = GraderUtils(llm=llm)
-    retrieval_grader = grader.create_retrieval_grader()
+    if grading_mode == GradingModeEnum.LISTWISE:
+        retrieval_grader = grader.create_listwise_retrieval_grader()
+    else:
+        retrieval_grader = grader.create_retrieval_grader()
 
     # Tools
     web_search_tool = get_tavily_web_search_tool()
@@ -34,7 +50,10 @@ def compile_graph():
 
     graph_nodes = GraphNodes(
         llm=llm, retriever=retriever, retrieval_grader=retrieval_grader, web_search_tool=web_search_tool,
-        paper_search_tool=None
+        paper_search_tool=None, grader_concurrency=settings.RETRIEVAL_GRADER_CONCURRENCY,
+        grader_timeout=settings.RETRIEVAL_GRADER_TIMEOUT_SECONDS, grading_mode=grading_mode,
+        accept_score=settings.RETRIEVAL_ACCEPT_SCORE, reject_score=settings.RETRIEVAL_REJECT_SCORE,
+        grade_cache=get_grade_cache(),
     )
     graph_edges = GraphEdges(None, None)
 
@@ -64,4 +83,7 @@ def compile_graph():
     return workflow.compile()
 
 
-agent_workflow = compile_graph()
+@lru_cache(maxsize=1)
+def get_agent_workflow():
+    """Compile the agent graph (and its Pinecone, OpenAI and Tavily clients) on first use"""
+    return compile_graph()
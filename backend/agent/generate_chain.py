@@ -11,11 +11,13 @@ def create_generate_chain(llm):
     Returns:
         A callable function that takes a context and a question as input and returns a string response.
     """
+    # The meeting transcript comes right after the instructions, so every question about the same meeting shares
+    # the provider-cached prompt prefix; retrieved documents and the question vary per call and come last
     generate_template = """You are a knowledgeable assistant that generates answers to the question based on the documents provided in the context and the transcript of the most recent meeting. Your goal is to use both the provided context and the transcript to answer the user's question clearly and comprehensively.
     
     Context:
-    Documents: {resources}
     Meeting Transcript: {transcript}
+    Documents: {resources}
     
     Question:
     {prompt}
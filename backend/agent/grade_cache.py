@@ -0,0 +1,109 @@
+import hashlib
+import re
+import threading
+import time
+from collections import OrderedDict
+from functools import lru_cache
+
+_PUNCTUATION = re.compile(r"[^\w\s]")
+_WHITESPACE = re.compile(r"\s+")
+
+
+def normalize_prompt(prompt: str) -> str:
+    """Case, punctuation and spacing do not change what a question asks, so they do not split cache entries"""
+    return _WHITESPACE.sub(" ", _PUNCTUATION.sub(" ", prompt.casefold())).strip()
+
+
+def resource_digest(resource) -> str:
+    """
+    Hash of a resource's content. Content rather than the vector id keys the verdict, so a page that is re-indexed
+    with new text is graded again, and web results (which have no id) are cached too.
+    """
+    content = getattr(resource, "page_content", resource)
+    if not isinstance(content, str):
+        content = repr(content)
+    return hashlib.sha256(content.encode("utf-8")).hexdigest()
+
+
+class GradeCache:
+    """
+    In-process cache of retrieval grader verdicts, keyed by (normalized prompt hash, resource content hash), with
+    LRU and TTL eviction.
+
+    An entry expires ``ttl_seconds`` after it was written; once more than ``max_entries`` are stored, the least
+    recently read ones are evicted. Only verdicts the grader actually returned are stored, never the "not relevant"
+    a timed out or failed call falls back to.
+    """
+
+    def __init__(self, max_entries: int, ttl_seconds: int, enabled: bool = True):
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = 0
+        self.misses = 0
+        self.expirations = 0
+        self.evictions = 0
+        self._entries: OrderedDict[tuple[str, str], tuple[bool, float]] = OrderedDict()
+        self._lock = threading.Lock()
+
+    @staticmethod
+    def key(prompt: str, resource) -> tuple[str, str]:
+        prompt_hash = hashlib.sha256(normalize_prompt(prompt).encode("utf-8")).hexdigest()
+        return prompt_hash, resource_digest(resource)
+
+    def get(self, key: tuple[str, str]) -> bool | None:
+        if not self.enabled:
+            return None
+        with self._lock:
+            entry = self._entries.get(key)
+            if entry is None:
+                self.misses += 1
+                return None
+            relevant, created_at = entry
+            if time.monotonic() - created_at > self.ttl_seconds:
+                del self._entries[key]
+                self.expirations += 1
+                self.misses += 1
+                return None
+            self._entries.move_to_end(key)
+            self.hits += 1
+            return relevant
+
+    def put(self, key: tuple[str, str], relevant: bool):
+        if not self.enabled:
+            return
+        with self._lock:
+            self._entries[key] = (relevant, time.monotonic())
+            self._entries.move_to_end(key)
+            while len(self._entries) > self.max_entries:
+                self._entries.popitem(last=False)
+                self.evictions += 1
+
+    def clear(self):
+        with self._lock:
+            self._entries.clear()
+
+    def stats(self) -> dict:
+        with self._lock:
+            entries = len(self._entries)
+        lookups = self.hits + self.misses
+        return {
+            "enabled": self.enabled,
+            "entries": entries,
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / lookups if lookups else 0.0,
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+        }
+
+
+@lru_cache(maxsize=1)
+def get_grade_cache() -> GradeCache:
+    """The grade cache shared by every chat request in this process"""
+    from backend.config import settings
+
+    return GradeCache(
+        max_entries=settings.RETRIEVAL_GRADE_CACHE_MAX_ENTRIES, ttl_seconds=settings.RETRIEVAL_GRADE_CACHE_TTL_SECONDS,
+        enabled=settings.RETRIEVAL_GRADE_CACHE_ENABLED,
+    )
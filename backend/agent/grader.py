@@ -1,6 +1,18 @@
+from typing import Literal
+
 from langchain import hub
 from langchain.prompts import PromptTemplate
 from langchain_core.output_parsers import JsonOutputParser, StrOutputParser
+from pydantic import BaseModel, Field
+
+
+class DocumentGrade(BaseModel):
+    index: int = Field(description="Number of the document in the list")
+    score: Literal["yes", "no"] = Field(description="Whether the document matches the user prompt")
+
+
+class DocumentGrades(BaseModel):
+    grades: list[DocumentGrade] = Field(description="One grade for every document in the list")
 
 
 class GraderUtils:
@@ -35,6 +47,31 @@ class GraderUtils:
 
         return retriever_grader
 
+    def create_listwise_retrieval_grader(self):
+        """
+        Creates a retrieval grader that assesses the relevance of all retrieved documents to a user question in a
+        single structured-output call, instead of one call per document.
+
+        Returns:
+            A runnable that takes the numbered documents and a question as input and returns ``DocumentGrades``.
+        """
+        grade_prompt = PromptTemplate(
+            template="""You are an evaluator tasked with determining which of the retrieved documents match the user prompt. Analyze each document for keywords relevant to the user prompt, and grade it as relevant.
+            Give every document a binary score of "yes" if it matches the user prompt and "no" if it does not, identified by its number.
+
+            Context:
+            User Prompt: {prompt}
+            Retrieved Documents:
+            {resources}
+
+            Question:
+            Which of the retrieved documents match the user prompt?
+            """,
+            input_variables=["resources", "prompt"],
+        )
+
+        return grade_prompt | self.llm.with_structured_output(DocumentGrades)
+
     def create_hallucination_grader(self):
         """
         Creates a hallucination grader that assesses whether an answer is grounded in/supported by a set of facts.
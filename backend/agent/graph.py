@@ -15,11 +15,13 @@ class GraphState(TypedDict):
         prompt: The prompt that was used to generate the response.
         generation: LLM generation
         resources: A list of resources that were used to generate the response.
+        resource_scores: Similarity scores of the resources, when they come from the vector store.
         steps: A list of steps that were taken to generate the response.
     """
     prompt: str
     generation: str
     resources: list
+    resource_scores: list[float]
     steps: list[str]
     perform_web_search: bool
     chat_session_id: int
@@ -33,3 +35,8 @@ class Steps(StrEnum):
     PAPER_SEARCH_EVALUATION: str = "paper_search_evaluation"
     WEB_SEARCH_RETRIEVAL: str = "web_search_retrieval"
     LLM_GENERATION: str = "llm_generation"
+
+
+class GradingModeEnum(StrEnum):
+    PER_DOCUMENT = "per_document"  # One grader call per retrieved document
+    LISTWISE = "listwise"  # One grader call for all retrieved documents
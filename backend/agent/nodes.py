@@ -1,30 +1,63 @@
+import asyncio
 import logging
 
 from langchain_community.retrievers import ArxivRetriever
 from langchain_community.tools import TavilySearchResults
 from langchain_core.language_models import BaseChatModel
 
+from backend.agent.grade_cache import GradeCache
 from backend.agent.vector_store import Retriever
 from backend.agent.generate_chain import create_generate_chain
-from backend.agent.graph import Steps, GraphState
+from backend.agent.graph import Steps, GraphState, GradingModeEnum
 from backend.database.chat_sessions import create_chat_session
 from backend.database.messages import create_message, MessageSenderEnum
+from backend.services.grading_stats import record_grading, record_verdict
+from backend.services.llm_usage import usage_callbacks
 
 logger = logging.getLogger(__name__)
 
 
 class GraphNodes:
     def __init__(self, llm: BaseChatModel, retriever: Retriever, retrieval_grader, web_search_tool: TavilySearchResults,
-                 paper_search_tool: ArxivRetriever | None):
+                 paper_search_tool: ArxivRetriever | None, grader_concurrency: int = 5, grader_timeout: float = 30.0,
+                 grading_mode: GradingModeEnum = GradingModeEnum.PER_DOCUMENT, accept_score: float | None = None,
+                 reject_score: float | None = None, grade_cache: GradeCache | None = None):
+        """
+        Nodes of the agent workflow
+
+        Args:
+            retrieval_grader: Grades one document (``GraderUtils.create_retrieval_grader``), or all documents at
+                once with ``GradingModeEnum.LISTWISE`` (``GraderUtils.create_listwise_retrieval_grader``)
+            grader_concurrency (int): Grader calls in flight at once, shared by every request in the process
+            grader_timeout (float): Seconds a single grader call may take; a document whose grade times out or
+                fails is treated as not relevant
+            grading_mode (GradingModeEnum): Whether documents are graded one by one or all at once
+            accept_score (float | None): Retrieved documents with a similarity score at or above this are relevant
+                without grading (None grades them)
+            reject_score (float | None): Retrieved documents with a similarity score below this are irrelevant
+                without grading (None grades them)
+            grade_cache (GradeCache | None): Verdicts of earlier grader calls, reused when the same question meets
+                the same document
+        """
         self.llm = llm
         self.retriever = retriever
         self.retrieval_grader = retrieval_grader
+        self.grading_mode = grading_mode
+        self.accept_score = accept_score
+        self.reject_score = reject_score
+        self.grade_cache = grade_cache
         self.web_search_tool = web_search_tool
         self.paper_search_tool = paper_search_tool
+        self.grader_timeout = grader_timeout
+        self._grader_semaphore = asyncio.Semaphore(grader_concurrency)
 
         self.generate_chain = create_generate_chain(llm)
+        self._generate_config = {"callbacks": usage_callbacks("chat_generate")}
+        self._grader_config = {"callbacks": usage_callbacks(
+            "retrieval_grader_listwise" if grading_mode == GradingModeEnum.LISTWISE else "retrieval_grader"
+        )}
 
-    def vector_store_retrieve(self, state):
+    async def vector_store_retrieve(self, state):
         """
         Retrieve documents
 
@@ -38,13 +71,14 @@ class GraphNodes:
         prompt = state["prompt"]
 
         # Retrieval
-        documents = self.retriever.sim_search(prompt)
-        state["resources"] = documents
+        results = await self.retriever.asim_search_with_scores(prompt)
+        state["resources"] = [document for document, _ in results]
+        state["resource_scores"] = [score for _, score in results]
         state["steps"] = [Steps.VECTOR_STORE_RETRIEVAL.value]
 
         return state
 
-    def generate(self, state):
+    async def generate(self, state):
         """
         Generate answer
 
@@ -59,7 +93,10 @@ class GraphNodes:
         resources = state["resources"]
 
         # RAG generation
-        generation = self.generate_chain.invoke({"resources": '\n\n'.join(f"{index + 1}. {item}" for index, item in enumerate(resources)), "prompt": prompt, "transcript": state["transcript"]})
+        generation = await self.generate_chain.ainvoke(
+            {"resources": '\n\n'.join(f"{index + 1}. {item}" for index, item in enumerate(resources)), "prompt": prompt, "transcript": state["transcript"]},
+            config=self._generate_config,
+        )
         state["generation"] = generation
         state["steps"].append(Steps.LLM_GENERATION.value)
 
@@ -73,23 +110,125 @@ class GraphNodes:
         #                sender=MessageSenderEnum.SYSTEM, tools_used=tools_used)
         return state
 
-    def _base_grade_documents(self, state: GraphState, previous_state: str):
-        prompt = state["prompt"]
-        resources = state["resources"]
+    async def _grade_resource(self, index: int, prompt: str, resource) -> bool | None:
+        """
+        Grade one resource against the prompt, None when grading timed out or failed.
 
-        filtered_resources = []
-        next_search = False
+        The timeout counts from when the call gets a concurrency slot, so calls queued behind the cap are not
+        penalized for the wait.
+        """
+        async with self._grader_semaphore:
+            try:
+                score = await asyncio.wait_for(
+                    self.retrieval_grader.ainvoke({"prompt": prompt, "resources": resource}, config=self._grader_config),
+                    timeout=self.grader_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Grading resource {index + 1} timed out after {self.grader_timeout}s")
+                return None
+            except Exception as e:
+                logger.warning(f"Grading resource {index + 1} failed: {e}")
+                return None
+        return score["score"].lower() == "yes"
+
+    async def _grade_resources(self, prompt: str, resources: list) -> list[bool | None]:
+        """
+        Grade every resource against the prompt concurrently and return the verdicts in resource order, None for a
+        resource whose grading timed out or failed.
+        """
+        return list(await asyncio.gather(
+            *(self._grade_resource(index, prompt, resource) for index, resource in enumerate(resources))
+        ))
 
-        for resource in resources:
-            score = self.retrieval_grader.invoke({
-                "prompt": prompt, "resources": resource
-            })
-            # print(f"{resource} || {score}")
-            if score["score"].lower() == "yes":
-                filtered_resources.append(resource)
+    async def _grade_resources_listwise(self, prompt: str, resources: list) -> list[bool | None]:
+        """
+        Grade every resource against the prompt in one grader call and return the verdicts in resource order, all
+        None when the call timed out or failed
+        """
+        numbered = "\n\n".join(
+            f"{index + 1}. {getattr(resource, 'page_content', resource)}" for index, resource in enumerate(resources)
+        )
+        async with self._grader_semaphore:
+            try:
+                grades = await asyncio.wait_for(
+                    self.retrieval_grader.ainvoke({"prompt": prompt, "resources": numbered}, config=self._grader_config),
+                    timeout=self.grader_timeout,
+                )
+            except asyncio.TimeoutError:
+                logger.warning(f"Grading {len(resources)} resources timed out after {self.grader_timeout}s")
+                return [None] * len(resources)
+            except Exception as e:
+                logger.warning(f"Grading {len(resources)} resources failed: {e}")
+                return [None] * len(resources)
+
+        # Documents the grader skipped or numbered out of range count as not relevant
+        verdicts = [False] * len(resources)
+        for grade in grades.grades:
+            if 1 <= grade.index <= len(resources):
+                verdicts[grade.index - 1] = grade.score == "yes"
+        return verdicts
+
+    def _grade_by_score(self, score: float) -> bool | None:
+        """Verdict implied by a similarity score alone, or None when the score is in the band the LLM has to grade"""
+        if self.accept_score is not None and score >= self.accept_score:
+            return True
+        if self.reject_score is not None and score < self.reject_score:
+            return False
+        return None
+
+    async def _grade_with_scores(self, prompt: str, resources: list, scores: list[float]) -> list[bool]:
+        """
+        Accept or reject the resources whose similarity score is conclusive, reuse cached verdicts for the rest, and
+        send only the remaining resources to the grader. A resource whose grading failed counts as not relevant.
+        """
+        scored = len(scores) == len(resources)
+        verdicts = [self._grade_by_score(score) for score in scores] if scored else [None] * len(resources)
+        decided = [index for index, verdict in enumerate(verdicts) if verdict is not None]
+
+        cache_keys = {}
+        cached = 0
+        if self.grade_cache is not None:
+            for index, verdict in enumerate(verdicts):
+                if verdict is None:
+                    cache_keys[index] = self.grade_cache.key(prompt, resources[index])
+                    verdicts[index] = self.grade_cache.get(cache_keys[index])
+                    cached += verdicts[index] is not None
+
+        ungraded = [index for index, verdict in enumerate(verdicts) if verdict is None]
+        if ungraded:
+            ungraded_resources = [resources[index] for index in ungraded]
+            if self.grading_mode == GradingModeEnum.LISTWISE:
+                graded = await self._grade_resources_listwise(prompt, ungraded_resources)
             else:
-                next_search = True
-                continue
+                graded = await self._grade_resources(prompt, ungraded_resources)
+            for index, verdict in zip(ungraded, graded):
+                if verdict is None:
+                    verdicts[index] = False
+                    continue
+                verdicts[index] = verdict
+                if index in cache_keys:
+                    self.grade_cache.put(cache_keys[index], verdict)
+                if scored:
+                    record_verdict(scores[index], verdict)
+
+        if self.grading_mode == GradingModeEnum.LISTWISE:
+            grader_calls, grader_calls_skipped = (1, 0) if ungraded else (0, 1 if resources else 0)
+        else:
+            grader_calls, grader_calls_skipped = len(ungraded), len(resources) - len(ungraded)
+        accepted = sum(1 for index in decided if verdicts[index])
+        record_grading(
+            accepted=accepted, rejected=len(decided) - accepted, cached=cached, graded=len(ungraded),
+            grader_calls=grader_calls, grader_calls_skipped=grader_calls_skipped,
+        )
+        return verdicts
+
+    async def _base_grade_documents(self, state: GraphState, previous_state: str):
+        prompt = state["prompt"]
+        resources = state["resources"]
+
+        verdicts = await self._grade_with_scores(prompt, resources, state.get("resource_scores") or [])
+        filtered_resources = [resource for resource, relevant in zip(resources, verdicts) if relevant]
+        next_search = not all(verdicts)
 
         if next_search:
             match previous_state:
@@ -100,31 +239,36 @@ class GraphNodes:
                     state["perform_web_search"] = True
                     state["steps"].append(Steps.PAPER_SEARCH_EVALUATION.value)
         state["resources"] = filtered_resources
+        state["resource_scores"] = [
+            score for score, relevant in zip(state.get("resource_scores") or [], verdicts) if relevant
+        ]
 
         return state
 
-    def grade_vector_store_documents(self, state: GraphState):
+    async def grade_vector_store_documents(self, state: GraphState):
         print("---GRADE VECTOR STORE DOCUMENTS---")
-        return self._base_grade_documents(state, "vector_store")
+        return await self._base_grade_documents(state, "vector_store")
 
-    def grade_paper_search_documents(self, state: GraphState):
-        return self._base_grade_documents(state, "paper_search")
+    async def grade_paper_search_documents(self, state: GraphState):
+        return await self._base_grade_documents(state, "paper_search")
 
-    def web_search(self, state: GraphState):
+    async def web_search(self, state: GraphState):
         prompt = state["prompt"]
-        web_results = self.web_search_tool.invoke({"query": prompt})
+        web_results = await self.web_search_tool.ainvoke({"query": prompt})
         state["resources"] = [
            result for result in web_results
         ]
+        state["resource_scores"] = []
         state["steps"].append(Steps.WEB_SEARCH_RETRIEVAL.value)
         return state
 
-    def paper_search(self, state: GraphState):
+    async def paper_search(self, state: GraphState):
         prompt = state["prompt"]
-        arxiv_papers = self.paper_search_tool.invoke(prompt)
+        arxiv_papers = await self.paper_search_tool.ainvoke(prompt)
         state["resources"] = [
             paper.page_content for paper in arxiv_papers
         ]
+        state["resource_scores"] = []
         state["steps"].append(Steps.PAPER_SEARCH_RETRIEVAL.value)
         return state
 
@@ -1,3 +1,4 @@
+from langchain_core.documents import Document
 from langchain_openai import OpenAIEmbeddings
 from langchain_pinecone import PineconeVectorStore
 from pinecone import Pinecone
@@ -42,6 +43,17 @@ class Retriever:
         # return [i.get_content() for i in response]
         return self.vector_store.similarity_search(prompt, k=5)
 
+    def sim_search_with_scores(self, prompt: str, k: int = 5) -> list[tuple[Document, float]]:
+        """
+        Like ``sim_search``, with each document's similarity score from Pinecone (cosine similarity for a cosine
+        index: higher is more similar)
+        """
+        return self.vector_store.similarity_search_with_score(prompt, k=k)
+
+    async def asim_search_with_scores(self, prompt: str, k: int = 5) -> list[tuple[Document, float]]:
+        """``sim_search_with_scores`` without blocking the event loop"""
+        return await self.vector_store.asimilarity_search_with_score(prompt, k=k)
+
 
 # def create_vector_store(docs, store_path: Optional[str] = None) -> FAISS:
 #     """
@@ -10,6 +10,16 @@ class Settings(BaseSettings, extra="ignore"):
     AWS_SECRET_ACCESS_KEY: str
     AWS_REGION: str
     AWS_S3_BUCKET: str
+    AWS_S3_ENDPOINT_URL: str | None = None  # e.g. a local S3 stand-in such as MinIO
+    S3_MAX_POOL_CONNECTIONS: int = 32
+    S3_MAX_RETRY_ATTEMPTS: int = 5  # botocore retries per request
+    S3_MULTIPART_THRESHOLD_BYTES: int = 16 * 1024 * 1024  # 16 MiB
+    S3_MULTIPART_CHUNK_BYTES: int = 8 * 1024 * 1024  # 8 MiB
+    S3_MULTIPART_CONCURRENCY: int = 8  # Parts uploaded at once per file
+    S3_UPLOAD_WORKERS: int = 2  # Files uploaded at once in the background
+    S3_UPLOAD_MAX_ATTEMPTS: int = 3  # Attempts of a whole transfer
+    S3_UPLOAD_BACKOFF_SECONDS: float = 1.0
+    S3_BACKGROUND_UPLOADS: bool = True  # Upload source audio and transcripts to S3 after processing
 
     # JWT Authentication
     JWT_SECRET_KEY: str
@@ -30,6 +40,23 @@ class Settings(BaseSettings, extra="ignore"):
     OPENAI_API_KEY: str
     OPENAI_EMBEDDINGS_MODEL: str = "text-embedding-3-small"
 
+    # Chat agent
+    RETRIEVAL_GRADING_MODE: str = "per_document"  # "listwise" grades all retrieved documents in one call
+    RETRIEVAL_GRADER_CONCURRENCY: int = 5  # Grader calls in flight at once across all chat requests
+    RETRIEVAL_GRADER_TIMEOUT_SECONDS: float = 30.0
+    # Opt-in prefilter: retrieved documents whose similarity score is at or above RETRIEVAL_ACCEPT_SCORE / below
+    # RETRIEVAL_REJECT_SCORE are accepted / rejected without an LLM grader call; unset, every document is graded.
+    # Scores depend on the embedding model and the index metric, so there is no safe default. To choose them, run
+    # with both unset on representative traffic, then read `verdicts_by_score` at /metrics/retrieval-grading:
+    # RETRIEVAL_ACCEPT_SCORE is the lowest bucket from which every bucket above is (nearly) all "relevant", and
+    # RETRIEVAL_REJECT_SCORE is the upper edge of the highest bucket below which every bucket is all "irrelevant".
+    # Recalibrate whenever the embedding model or the indexed content changes.
+    RETRIEVAL_ACCEPT_SCORE: float | None = None
+    RETRIEVAL_REJECT_SCORE: float | None = None
+    RETRIEVAL_GRADE_CACHE_ENABLED: bool = True
+    RETRIEVAL_GRADE_CACHE_MAX_ENTRIES: int = 50000
+    RETRIEVAL_GRADE_CACHE_TTL_SECONDS: int = 60 * 60 * 24  # 1 day, so re-indexed pages are not judged on stale text
+
     # Tavily
     TAVILY_API_KEY: str
 
@@ -42,6 +69,7 @@ class Settings(BaseSettings, extra="ignore"):
     SNOWFLAKE_DB_SCHEMA: str
     SNOWFLAKE_DB_ROLE: str
     SNOWFLAKE_URI: str | None = None
+    RUN_DB_MIGRATIONS: bool = False  # Apply backend/database/ddl on startup (python -m backend.database.migrations)
 
     # Fast API config
     APP_TITLE: str = "AgentOps - Transcription & Chat Service"
@@ -56,6 +84,59 @@ class Settings(BaseSettings, extra="ignore"):
     # Hugging Face
     HF_TOKEN: str
 
+    # Startup warm-up of lazily loaded components (whisper, diarization, agent)
+    WARMUP_COMPONENTS: list[str] = ["whisper", "diarization", "agent"]
+    WARMUP_IN_BACKGROUND: bool = True  # False blocks startup until the components are loaded
+
+    # Transcription
+    WHISPER_MODEL_SIZE: str = "base"
+    TRANSCRIPTION_EXECUTOR_WORKERS: int = 2
+    INFERENCE_POOL_WORKERS: int = 0  # 0 runs inference in-process on the executor threads
+    INFERENCE_WORKER_MAX_RSS_BYTES: int = 8 * 1024 * 1024 * 1024  # Recycle a pool worker above this RSS, 0 disables
+    INFERENCE_WORKER_MAX_JOBS: int = 200  # Recycle a pool worker after this many jobs, 0 disables
+    INFERENCE_MEMORY_SAMPLE_SECONDS: float = 0.05
+    STAGE_CACHE_ENABLED: bool = True
+    STAGE_CACHE_DECODED_AUDIO: bool = True
+    STORE_SOURCE_AUDIO_AS_OPUS: bool = False
+    LONG_AUDIO_THRESHOLD_SECONDS: int = 15 * 60  # 15 minutes
+    # Recordings over the threshold are transcribed window by window on the inference pool's workers when
+    # INFERENCE_POOL_WORKERS is set. Otherwise, with 2 or more workers here, they are transcribed on a separate pool of
+    # spawned processes, each of which loads its own Whisper model: peak memory grows by one model per worker on top of
+    # the API process's copy, outside the inference memory ceiling. 0 or 1 disables that pool.
+    LONG_AUDIO_ASR_WORKERS: int = 0
+    LONG_AUDIO_WINDOW_SECONDS: int = 5 * 60  # 5 minutes
+
+    # Personalized summaries
+    SUMMARY_FANOUT_CONCURRENCY: int = 4  # Attendee summaries generated at once for one meeting
+    SUMMARY_SINGLE_PASS_MAX_TOKENS: int = 6000  # Longer transcripts are summarized with map-reduce
+    SUMMARY_CHUNK_TOKENS: int = 3000
+    SUMMARY_MAP_CONCURRENCY: int = 4
+    INCREMENTAL_SUMMARY_MAX_CHANGED_FRACTION: float = 0.5  # Rebuild the digest when more of the transcript changed
+    SUMMARY_CACHE_ENABLED: bool = True
+    SUMMARY_CACHE_MAX_ENTRIES: int = 10000
+    SUMMARY_CACHE_TTL_SECONDS: int = 60 * 60 * 24 * 30  # 30 days
+
+    # Audio uploads
+    MAX_AUDIO_UPLOAD_BYTES: int = 1024 * 1024 * 1024  # 1 GiB
+    UPLOAD_CHUNK_SIZE_BYTES: int = 1024 * 1024  # 1 MiB
+
+    # resources/ lifecycle
+    RESOURCES_LIFECYCLE_INTERVAL_SECONDS: int = 15 * 60  # 0 disables the sweeps
+    RESOURCES_DISK_BUDGET_BYTES: int = 50 * 1024 * 1024 * 1024  # 50 GiB, 0 for no budget
+    RESOURCES_MIN_AGE_SECONDS: int = 60 * 60  # Younger files are never compressed or evicted
+    SRC_AUDIO_RETENTION_SECONDS: int = 60 * 60 * 24 * 7  # Archived source audio is kept locally this long
+    TRANSCRIPT_COMPRESSION_LEVEL: int = 10  # zstd level
+    UPLOAD_SESSION_TTL_SECONDS: int = 60 * 60 * 24  # Resumable uploads untouched this long are deleted
+
+    # Transcription job queue
+    JOB_QUEUE_DB_URI: str | None = None  # Defaults to the Snowflake TRANSCRIPTION_JOBS table (see RUN_DB_MIGRATIONS)
+    TRANSCRIPTION_JOB_WORKERS: int = 1
+    TRANSCRIPTION_JOB_LEASE_SECONDS: int = 120
+    TRANSCRIPTION_JOB_HEARTBEAT_SECONDS: int = 30
+    TRANSCRIPTION_JOB_POLL_SECONDS: float = 10.0  # Poll interval after a job; idle workers back off from here
+    TRANSCRIPTION_JOB_MAX_POLL_SECONDS: float = 300.0
+    TRANSCRIPTION_JOB_MAX_ATTEMPTS: int = 3
+
     model_config = SettingsConfigDict(env_file=".env")
 
     @model_validator(mode="after")
@@ -11,6 +11,8 @@ from backend.config import (
 
 logger = logging.getLogger(__name__)
 
+DB_SCHEMA = "DB_AGENTOPS_CORE.DBT_CORE_SCHEMA"
+
 
 class Base(DeclarativeBase):
     __mapper_args__ = {"eager_defaults": True}
@@ -37,6 +39,38 @@ class DatabaseSession:
         return cls().session_maker()
 
 
+class QueueDatabaseSession:
+    """
+    Session factory for the transcription job queue.
+
+    Uses ``JOB_QUEUE_DB_URI`` when set (e.g. ``sqlite:///resources/jobs.db`` for local development) and otherwise
+    shares the Snowflake engine. Tables declared under the Snowflake schema are mapped to the default schema for
+    databases that do not support it.
+    """
+    _instance = None
+
+    def __new__(cls, *args, **kwargs):
+        if cls._instance is None:
+            logger.info("Created new job queue database session object")
+            cls._instance = super().__new__(cls)
+
+            if settings.JOB_QUEUE_DB_URI:
+                engine = create_engine(settings.JOB_QUEUE_DB_URI)
+                if engine.dialect.name == "sqlite":
+                    engine = engine.execution_options(schema_translate_map={DB_SCHEMA: None})
+            else:
+                engine = DatabaseSession().db_engine
+            cls._instance.db_engine = engine
+            cls._instance.session_maker = scoped_session(
+                sessionmaker(autocommit=False, autoflush=True, bind=engine)
+            )
+        return cls._instance
+
+    @classmethod
+    def db_session(cls):
+        return cls().session_maker()
+
+
 @contextmanager
 def db_session() -> Session:
     _session = DatabaseSession.db_session()
@@ -45,4 +79,15 @@ def db_session() -> Session:
     except Exception as e:
         raise ValueError(f"Failed to connect to database: {e}")
     finally:
-        _session.close()
\ No newline at end of file
+        _session.close()
+
+
+@contextmanager
+def queue_db_session() -> Session:
+    _session = QueueDatabaseSession.db_session()
+    try:
+        yield _session
+    except Exception as e:
+        raise ValueError(f"Failed to connect to job queue database: {e}")
+    finally:
+        _session.close()
@@ -0,0 +1,20 @@
+-- Transcription job queue (backend.database.transcription_jobs.TranscriptionJobModel)
+CREATE SEQUENCE IF NOT EXISTS DB_AGENTOPS_CORE.DBT_CORE_SCHEMA.TRANSCRIPTION_JOBS_ID_SEQ;
+
+CREATE TABLE IF NOT EXISTS DB_AGENTOPS_CORE.DBT_CORE_SCHEMA.TRANSCRIPTION_JOBS (
+    ID INTEGER NOT NULL DEFAULT DB_AGENTOPS_CORE.DBT_CORE_SCHEMA.TRANSCRIPTION_JOBS_ID_SEQ.NEXTVAL,
+    TRANSCRIPTION_ID INTEGER NOT NULL,
+    USER_ID INTEGER NOT NULL,
+    AUDIO_S3_KEY VARCHAR(1024) NOT NULL,
+    AUDIO_SHA256 VARCHAR(64),
+    STATUS VARCHAR(20) NOT NULL,
+    STAGE_PROGRESS VARCHAR NOT NULL,
+    ATTEMPTS INTEGER NOT NULL DEFAULT 0,
+    LEASE_OWNER VARCHAR(255),
+    LEASE_EXPIRES_AT TIMESTAMP_NTZ,
+    HEARTBEAT_AT TIMESTAMP_NTZ,
+    ERROR VARCHAR,
+    CREATED_AT TIMESTAMP_NTZ NOT NULL,
+    UPDATED_AT TIMESTAMP_NTZ NOT NULL,
+    PRIMARY KEY (ID)
+);
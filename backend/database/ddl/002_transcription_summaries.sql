@@ -0,0 +1,12 @@
+-- Personalized summaries per meeting attendee (backend.database.transcriptions.TranscriptionSummaryModel)
+CREATE SEQUENCE IF NOT EXISTS DB_AGENTOPS_CORE.DBT_CORE_SCHEMA.TRANSCRIPTION_SUMMARIES_ID_SEQ;
+
+CREATE TABLE IF NOT EXISTS DB_AGENTOPS_CORE.DBT_CORE_SCHEMA.TRANSCRIPTION_SUMMARIES (
+    ID INTEGER NOT NULL DEFAULT DB_AGENTOPS_CORE.DBT_CORE_SCHEMA.TRANSCRIPTION_SUMMARIES_ID_SEQ.NEXTVAL,
+    TRANSCRIPTION_ID INTEGER NOT NULL,
+    ATTENDEE_EMAIL VARCHAR(150) NOT NULL,
+    PERSONALIZED_SUMMARY VARCHAR(16777216) NOT NULL,
+    CREATED_AT TIMESTAMP_NTZ NOT NULL DEFAULT CURRENT_TIMESTAMP(),
+    PRIMARY KEY (ID),
+    UNIQUE (TRANSCRIPTION_ID, ATTENDEE_EMAIL)
+);
@@ -0,0 +1,8 @@
+-- Meeting digest per transcription (backend.database.transcriptions.TranscriptionDigestModel). Kept out of
+-- TRANSCRIPTIONS so the existing table and every query on it are unchanged.
+CREATE TABLE IF NOT EXISTS DB_AGENTOPS_CORE.DBT_CORE_SCHEMA.TRANSCRIPTION_DIGESTS (
+    TRANSCRIPTION_ID INTEGER NOT NULL,
+    MEETING_DIGEST VARCHAR(16777216) NOT NULL,
+    UPDATED_AT TIMESTAMP_NTZ NOT NULL DEFAULT CURRENT_TIMESTAMP(),
+    PRIMARY KEY (TRANSCRIPTION_ID)
+);
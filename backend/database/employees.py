@@ -20,17 +20,7 @@ class FactEmployeeProject(Base):
     CONTRIBUTIONSCORE = Column(Integer)
 
 
-def get_employee_details(employee_email: str):
-    conn = snowflake.connector.connect(
-        user=settings.SNOWFLAKE_DB_USER,
-        password=settings.SNOWFLAKE_DB_PASSWORD,
-        account=settings.SNOWFLAKE_DB_ACCOUNT,
-        warehouse="MY_WAREHOUSE",
-        database="DB_AGENTOPS_CORE",
-        schema="MEETPRO_INSIGHTS"
-    )
-    try:
-        query = """
+EMPLOYEE_DETAILS_QUERY = """
         SELECT
             E.EMPLOYEEID,
             E.EMPLOYEENAME,
@@ -55,39 +45,76 @@ def get_employee_details(employee_email: str):
         ON
             E.EMPLOYEEID = P.EMPLOYEEID
         WHERE
-            E.EMAIL = %s
+            LOWER(E.EMAIL) IN ({placeholders})
         """
-        cur = conn.cursor()
-        cur.execute(query, (employee_email,))
-        results = cur.fetchall()
-
-        if results:
-            # Combine all rows into a single dictionary
-            combined_data = {
-                "EmployeeID": results[0][0],
-                "EmployeeName": results[0][1],
-                "Email": results[0][2],
-                "JobLevel": results[0][3],
-                "RoleType": results[0][4],
-                "DepartmentID": results[0][5],
-                "CurrentProjectID": results[0][6],
-                "SupervisorID": results[0][7],
-                "Projects": [
-                    {
-                        "ProjectID": row[8],
-                        "ProjectName": row[9],
-                        "ProjectDescription": row[10],
-                        "StartDate": row[11],
-                        "EndDate": row[12],
-                        "ProjectStatus": row[13],
-                        "ProjectManagerID": row[14],
-                        "JiraBoardID": row[15]
-                    }
-                    for row in results
-                ]
+
+
+def _connect():
+    return snowflake.connector.connect(
+        user=settings.SNOWFLAKE_DB_USER,
+        password=settings.SNOWFLAKE_DB_PASSWORD,
+        account=settings.SNOWFLAKE_DB_ACCOUNT,
+        warehouse="MY_WAREHOUSE",
+        database="DB_AGENTOPS_CORE",
+        schema="MEETPRO_INSIGHTS"
+    )
+
+
+def _combine_employee_rows(results: list[tuple]) -> dict:
+    # Combine all rows of one employee into a single dictionary
+    return {
+        "EmployeeID": results[0][0],
+        "EmployeeName": results[0][1],
+        "Email": results[0][2],
+        "JobLevel": results[0][3],
+        "RoleType": results[0][4],
+        "DepartmentID": results[0][5],
+        "CurrentProjectID": results[0][6],
+        "SupervisorID": results[0][7],
+        "Projects": [
+            {
+                "ProjectID": row[8],
+                "ProjectName": row[9],
+                "ProjectDescription": row[10],
+                "StartDate": row[11],
+                "EndDate": row[12],
+                "ProjectStatus": row[13],
+                "ProjectManagerID": row[14],
+                "JiraBoardID": row[15]
             }
-            return combined_data
-        else:
-            return None
+            for row in results
+        ]
+    }
+
+
+def get_employees_details(employee_emails: list[str]) -> dict[str, dict]:
+    """
+    Fetch the profiles and projects of several employees with a single query.
+
+    Args:
+        employee_emails: Emails to look up
+
+    Returns:
+        Employee details keyed by lower-cased email; emails without a matching employee are missing
+    """
+    employee_emails = list(dict.fromkeys(email.strip().lower() for email in employee_emails))
+    if not employee_emails:
+        return {}
+
+    conn = _connect()
+    try:
+        cur = conn.cursor()
+        cur.execute(
+            EMPLOYEE_DETAILS_QUERY.format(placeholders=", ".join(["%s"] * len(employee_emails))),
+            tuple(employee_emails),
+        )
+        rows_by_email: dict[str, list[tuple]] = {}
+        for row in cur.fetchall():
+            rows_by_email.setdefault(row[2].lower(), []).append(row)
+        return {email: _combine_employee_rows(rows) for email, rows in rows_by_email.items()}
     finally:
         conn.close()
+
+
+def get_employee_details(employee_email: str):
+    return get_employees_details([employee_email]).get(employee_email.strip().lower())
@@ -0,0 +1,44 @@
+"""
+DDL for the tables the backend adds to the Snowflake schema.
+
+The scripts in ``ddl/`` are applied in file name order. Every statement is idempotent (``IF NOT EXISTS``), so
+applying them again, or on every startup with ``RUN_DB_MIGRATIONS=true``, is safe.
+
+Usage:
+    python -m backend.database.migrations
+"""
+import logging
+import os
+
+from sqlalchemy import text
+from sqlalchemy.engine import Engine
+
+from backend.database import DatabaseSession
+
+logger = logging.getLogger(__name__)
+
+DDL_PATH = os.path.join(os.path.dirname(__file__), "ddl")
+
+
+def migration_scripts() -> list[str]:
+    return sorted(os.path.join(DDL_PATH, name) for name in os.listdir(DDL_PATH) if name.endswith(".sql"))
+
+
+def _statements(script_path: str) -> list[str]:
+    with open(script_path, "r") as f:
+        lines = [line for line in f if not line.lstrip().startswith("--")]
+    return [statement.strip() for statement in "".join(lines).split(";") if statement.strip()]
+
+
+def run_migrations(engine: Engine | None = None):
+    engine = engine or DatabaseSession().db_engine
+    with engine.begin() as connection:
+        for script_path in migration_scripts():
+            logger.info(f"Applying {os.path.basename(script_path)}")
+            for statement in _statements(script_path):
+                connection.execute(text(statement))
+
+
+if __name__ == "__main__":
+    logging.basicConfig(level=logging.INFO)
+    run_migrations()
@@ -0,0 +1,221 @@
+import json
+from datetime import datetime, timedelta
+from enum import StrEnum
+
+from sqlalchemy import Column, Integer, Sequence, DateTime, String, Text, and_, or_
+
+from backend.database import Base, QueueDatabaseSession, queue_db_session
+
+
+class TranscriptionJobStatusEnum(StrEnum):
+    QUEUED = "queued"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+
+
+class TranscriptionStage(StrEnum):
+    DECODING = "decoding"
+    ASR = "asr"
+    DIARIZATION = "diarization"
+    ALIGNMENT = "alignment"
+    DIGEST = "digest"
+    SUMMARY = "summary"
+
+
+class StageStatusEnum(StrEnum):
+    PENDING = "pending"
+    RUNNING = "running"
+    COMPLETED = "completed"
+    FAILED = "failed"
+    CACHED = "cached"
+
+
+class TranscriptionJobModel(Base):
+    __tablename__ = 'TRANSCRIPTION_JOBS'
+    __table_args__ = {'schema': 'DB_AGENTOPS_CORE.DBT_CORE_SCHEMA'}
+
+    id = Column(Integer, Sequence("transcription_jobs_id_seq"), primary_key=True, autoincrement=True)
+    transcription_id = Column(Integer, nullable=False)
+    user_id = Column(Integer, nullable=False)
+    # The recording is staged in S3 so that a worker on any node can claim the job
+    audio_s3_key = Column(String(1024), nullable=False)
+    audio_sha256 = Column(String(64), nullable=True)
+    status = Column(String(20), nullable=False, default=TranscriptionJobStatusEnum.QUEUED.value)
+    stage_progress = Column(Text, nullable=False)
+    attempts = Column(Integer, nullable=False, default=0)
+    lease_owner = Column(String(255), nullable=True)
+    lease_expires_at = Column(DateTime, nullable=True)
+    heartbeat_at = Column(DateTime, nullable=True)
+    error = Column(Text, nullable=True)
+    created_at = Column(DateTime, default=datetime.utcnow, nullable=False)
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+    @property
+    def stages(self) -> dict[str, str]:
+        return json.loads(self.stage_progress)
+
+
+def init_transcription_jobs_table():
+    """
+    Create the job queue table if it does not exist, for a ``JOB_QUEUE_DB_URI`` queue (e.g. local SQLite). The
+    Snowflake table is created by ``backend.database.migrations``.
+    """
+    Base.metadata.create_all(QueueDatabaseSession().db_engine, tables=[TranscriptionJobModel.__table__])
+
+
+def _initial_stage_progress() -> str:
+    return json.dumps({stage.value: StageStatusEnum.PENDING.value for stage in TranscriptionStage})
+
+
+def _claimable(now: datetime, max_attempts: int):
+    return or_(
+        TranscriptionJobModel.status == TranscriptionJobStatusEnum.QUEUED.value,
+        and_(
+            TranscriptionJobModel.status == TranscriptionJobStatusEnum.RUNNING.value,
+            TranscriptionJobModel.lease_expires_at < now,
+            TranscriptionJobModel.attempts < max_attempts,
+        ),
+    )
+
+
+def _owned_by(job_id: int, worker_id: str):
+    return and_(
+        TranscriptionJobModel.id == job_id,
+        TranscriptionJobModel.status == TranscriptionJobStatusEnum.RUNNING.value,
+        TranscriptionJobModel.lease_owner == worker_id,
+    )
+
+
+def enqueue_transcription_job(
+    transcription_id: int, user_id: int, audio_s3_key: str, audio_sha256: str | None = None
+) -> TranscriptionJobModel:
+    with queue_db_session() as session:
+        new_job = TranscriptionJobModel(
+            transcription_id=transcription_id, user_id=user_id, audio_s3_key=audio_s3_key, audio_sha256=audio_sha256,
+            stage_progress=_initial_stage_progress()
+        )
+        session.add(new_job)
+        session.commit()
+        session.refresh(new_job)
+        return new_job
+
+
+def get_transcription_job_by_id(job_id: int) -> TranscriptionJobModel:
+    with queue_db_session() as session:
+        return session.query(TranscriptionJobModel).filter(TranscriptionJobModel.id == job_id).first()
+
+
+def claim_next_transcription_job(
+    worker_id: str, lease_seconds: int, max_attempts: int, batch_size: int = 5
+) -> TranscriptionJobModel | None:
+    """
+    Claim the oldest queued job, or a running job whose lease has expired (its worker died).
+
+    Claiming is a conditional UPDATE on the same predicate used to select candidates, so when several workers or
+    backend nodes race for a job only one of them sees an updated row.
+    """
+    now = datetime.utcnow()
+    with queue_db_session() as session:
+        # Jobs whose worker died too many times are not retried again
+        session.query(TranscriptionJobModel).filter(
+            TranscriptionJobModel.status == TranscriptionJobStatusEnum.RUNNING.value,
+            TranscriptionJobModel.lease_expires_at < now,
+            TranscriptionJobModel.attempts >= max_attempts,
+        ).update({
+            "status": TranscriptionJobStatusEnum.FAILED.value, "lease_owner": None, "updated_at": now,
+            "error": "Lease expired after the maximum number of attempts",
+        }, synchronize_session=False)
+        session.commit()
+
+        candidates = session.query(TranscriptionJobModel.id).filter(
+            _claimable(now, max_attempts)
+        ).order_by(TranscriptionJobModel.id).limit(batch_size).all()
+
+        for (job_id,) in candidates:
+            claimed = session.query(TranscriptionJobModel).filter(
+                TranscriptionJobModel.id == job_id, _claimable(now, max_attempts)
+            ).update({
+                "status": TranscriptionJobStatusEnum.RUNNING.value,
+                "lease_owner": worker_id,
+                "lease_expires_at": now + timedelta(seconds=lease_seconds),
+                "heartbeat_at": now,
+                "attempts": TranscriptionJobModel.attempts + 1,
+                "updated_at": now,
+            }, synchronize_session=False)
+            session.commit()
+            if claimed:
+                return session.get(TranscriptionJobModel, job_id)
+    return None
+
+
+def heartbeat_transcription_job(job_id: int, worker_id: str, lease_seconds: int) -> bool:
+    """
+    Extend the lease on a job. Returns False if the worker no longer owns the job.
+    """
+    now = datetime.utcnow()
+    with queue_db_session() as session:
+        updated = session.query(TranscriptionJobModel).filter(_owned_by(job_id, worker_id)).update({
+            "lease_expires_at": now + timedelta(seconds=lease_seconds), "heartbeat_at": now, "updated_at": now,
+        }, synchronize_session=False)
+        session.commit()
+        return updated == 1
+
+
+def update_transcription_job_stage(
+    job_id: int, worker_id: str, stage: TranscriptionStage, status: StageStatusEnum, max_attempts: int = 20
+) -> bool:
+    """
+    Set the status of one stage of a job. Returns False if the worker no longer owns the job.
+
+    Stages of one job run concurrently (ASR and diarization), so the update is a compare-and-swap on the whole
+    ``stage_progress`` value: it only applies if no other stage was written since it was read, and is retried
+    otherwise, so that no stage's update overwrites another's.
+    """
+    with queue_db_session() as session:
+        for _ in range(max_attempts):
+            current = session.query(TranscriptionJobModel.stage_progress).filter(_owned_by(job_id, worker_id)).scalar()
+            if current is None:
+                return False
+            stages = json.loads(current)
+            if stages.get(stage.value) == status.value:
+                return True
+            stages[stage.value] = status.value
+            updated = session.query(TranscriptionJobModel).filter(
+                _owned_by(job_id, worker_id), TranscriptionJobModel.stage_progress == current
+            ).update({
+                "stage_progress": json.dumps(stages), "updated_at": datetime.utcnow(),
+            }, synchronize_session=False)
+            session.commit()
+            if updated:
+                return True
+    raise RuntimeError(f"Stage {stage.value} of transcription job {job_id} kept conflicting with other updates")
+
+
+def complete_transcription_job(job_id: int, worker_id: str) -> bool:
+    with queue_db_session() as session:
+        updated = session.query(TranscriptionJobModel).filter(_owned_by(job_id, worker_id)).update({
+            "status": TranscriptionJobStatusEnum.COMPLETED.value, "lease_owner": None, "lease_expires_at": None,
+            "error": None, "updated_at": datetime.utcnow(),
+        }, synchronize_session=False)
+        session.commit()
+        return updated == 1
+
+
+def fail_transcription_job(job_id: int, worker_id: str, error: str, max_attempts: int) -> bool:
+    """
+    Record a failed attempt. The job is re-queued until it has been attempted ``max_attempts`` times.
+    """
+    with queue_db_session() as session:
+        job = session.query(TranscriptionJobModel).filter(_owned_by(job_id, worker_id)).first()
+        if job is None:
+            return False
+        retry = job.attempts < max_attempts
+        job.status = (TranscriptionJobStatusEnum.QUEUED if retry else TranscriptionJobStatusEnum.FAILED).value
+        job.lease_owner = None
+        job.lease_expires_at = None
+        job.error = error
+        if retry:
+            job.stage_progress = _initial_stage_progress()
+        session.commit()
+        return True
@@ -1,3 +1,4 @@
+from datetime import datetime
 from idlelib.pyparse import trans
 
 from sqlalchemy import Column, Integer, Sequence, DateTime, text, VARCHAR, String
@@ -16,6 +17,28 @@ class TranscriptionModel(Base):
     created_at =  Column(DateTime, server_default="CURRENT_TIMESTAMP()", nullable=False)
 
 
+class TranscriptionDigestModel(Base):
+    """Meeting digest of a transcription, shared by the summaries of all its attendees"""
+    __tablename__ = 'TRANSCRIPTION_DIGESTS'
+    __table_args__ = {'schema': 'DB_AGENTOPS_CORE.DBT_CORE_SCHEMA'}
+
+    transcription_id = Column(Integer, primary_key=True, autoincrement=False)
+    meeting_digest = Column(String(16777216), nullable=False)  # MeetingDigest as JSON
+    updated_at = Column(DateTime, default=datetime.utcnow, onupdate=datetime.utcnow, nullable=False)
+
+
+class TranscriptionSummaryModel(Base):
+    """Personalized summary of a transcription for one meeting attendee"""
+    __tablename__ = 'TRANSCRIPTION_SUMMARIES'
+    __table_args__ = {'schema': 'DB_AGENTOPS_CORE.DBT_CORE_SCHEMA'}
+
+    id = Column(Integer, Sequence("transcription_summaries_id_seq"), primary_key=True, autoincrement=True)
+    transcription_id = Column(Integer, nullable=False)
+    attendee_email = Column(String(150), nullable=False)
+    personalized_summary = Column(String(16777216), nullable=False)
+    created_at = Column(DateTime, server_default="CURRENT_TIMESTAMP()", nullable=False)
+
+
 def create_transcription_record(user_id: int) -> TranscriptionModel:
     with db_session() as session:
         new_transcription = TranscriptionModel(user_id=user_id)
@@ -25,14 +48,83 @@ def create_transcription_record(user_id: int) -> TranscriptionModel:
         return new_transcription
 
 
+def delete_transcription_record(transcription_id: int):
+    """Delete a transcription whose recording was never stored or queued, so it does not show up as an empty one"""
+    with db_session() as session:
+        session.query(TranscriptionModel).filter(TranscriptionModel.id == transcription_id).delete()
+        session.commit()
+
+
 def get_transcription_by_id(transcription_id: int) -> TranscriptionModel:
     with db_session() as session:
         return session.query(TranscriptionModel).filter(TranscriptionModel.id == transcription_id).first()
 
 
-def update_transcription_text(transcription_id: int, transcription_text: str, personalized_summary: str):
+def get_transcription_owner(transcription_id: int) -> int | None:
+    """Return the id of the user owning a transcription without loading its text"""
+    with db_session() as session:
+        row = session.query(TranscriptionModel.user_id).filter(TranscriptionModel.id == transcription_id).first()
+        return row[0] if row else None
+
+
+def update_transcription_text(
+    transcription_id: int, transcription_text: str, personalized_summary: str, meeting_digest: str | None = None
+):
     with db_session() as session:
         session.query(TranscriptionModel).filter(TranscriptionModel.id == transcription_id).update({
             "transcription_text": transcription_text, "personalized_summary": personalized_summary
         })
+        if meeting_digest is not None:
+            _upsert_meeting_digest(session, transcription_id, meeting_digest)
         session.commit()
+
+
+def _upsert_meeting_digest(session, transcription_id: int, meeting_digest: str):
+    updated = session.query(TranscriptionDigestModel).filter(
+        TranscriptionDigestModel.transcription_id == transcription_id
+    ).update({"meeting_digest": meeting_digest})
+    if not updated:
+        session.add(TranscriptionDigestModel(transcription_id=transcription_id, meeting_digest=meeting_digest))
+
+
+def get_meeting_digest_json(transcription_id: int) -> str | None:
+    with db_session() as session:
+        row = session.query(TranscriptionDigestModel.meeting_digest).filter(
+            TranscriptionDigestModel.transcription_id == transcription_id
+        ).first()
+        return row[0] if row else None
+
+
+def update_meeting_digest(transcription_id: int, meeting_digest: str):
+    with db_session() as session:
+        _upsert_meeting_digest(session, transcription_id, meeting_digest)
+        session.commit()
+
+
+def update_personalized_summary(transcription_id: int, personalized_summary: str):
+    with db_session() as session:
+        session.query(TranscriptionModel).filter(TranscriptionModel.id == transcription_id).update({
+            "personalized_summary": personalized_summary
+        })
+        session.commit()
+
+
+def upsert_transcription_summary(transcription_id: int, attendee_email: str, personalized_summary: str):
+    with db_session() as session:
+        updated = session.query(TranscriptionSummaryModel).filter(
+            TranscriptionSummaryModel.transcription_id == transcription_id,
+            TranscriptionSummaryModel.attendee_email == attendee_email,
+        ).update({"personalized_summary": personalized_summary})
+        if not updated:
+            session.add(TranscriptionSummaryModel(
+                transcription_id=transcription_id, attendee_email=attendee_email,
+                personalized_summary=personalized_summary
+            ))
+        session.commit()
+
+
+def get_transcription_summaries(transcription_id: int) -> list[TranscriptionSummaryModel]:
+    with db_session() as session:
+        return session.query(TranscriptionSummaryModel).filter(
+            TranscriptionSummaryModel.transcription_id == transcription_id
+        ).order_by(TranscriptionSummaryModel.attendee_email).all()
@@ -1,13 +1,25 @@
+import asyncio
 import logging.config
 from contextlib import asynccontextmanager
 
-from fastapi import FastAPI, Depends
+from fastapi import FastAPI, Depends, Response, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.middleware.cors import CORSMiddleware
 from sqlalchemy.ext.asyncio import AsyncSession
 
 from backend.config import settings
 from backend.database import db_session
-from backend.schemas import HealthSchema
+from backend.schemas import HealthSchema, ReadinessSchema, PromptUsageSchema, ResourcesUsageSchema, \
+    InferenceMemorySchema, RetrievalGradingSchema
+from backend.database.migrations import run_migrations
+from backend.database.transcription_jobs import init_transcription_jobs_table
+from backend.agent.grade_cache import get_grade_cache
+from backend.services.grading_stats import get_grading_stats
+from backend.services.llm_usage import get_prompt_usage
+from backend.services.resource_lifecycle import ResourceLifecycleManager, directory_usage
+from backend.services.transcribe import shutdown_inference_executor, start_inference_pool, get_inference_memory
+from backend.services.transcription_jobs import TranscriptionJobWorkerPool
+from backend.services.warmup import ComponentStatusEnum, get_components_status, warm_up_components
 from backend.utils import create_resource_dirs
 from backend.views import central_router
 
@@ -22,7 +34,36 @@ logging.getLogger("passlib").setLevel(logging.ERROR)
 async def lifespan(app: FastAPI):
     logger.info("[FastAPI] Startup lifespan invoked")
     # await init_db()
+    # Fork the inference workers first, before any other thread pools are busy
+    start_inference_pool()
+    if settings.RUN_DB_MIGRATIONS:
+        await run_in_threadpool(run_migrations)
+
+    warmup_task = None
+    if settings.WARMUP_IN_BACKGROUND:
+        warmup_task = asyncio.create_task(warm_up_components(settings.WARMUP_COMPONENTS))
+    else:
+        await warm_up_components(settings.WARMUP_COMPONENTS)
+
+    job_worker_pool = None
+    if settings.TRANSCRIPTION_JOB_WORKERS > 0:
+        if settings.JOB_QUEUE_DB_URI:
+            init_transcription_jobs_table()
+        job_worker_pool = TranscriptionJobWorkerPool()
+        await job_worker_pool.start()
+
+    lifecycle_manager = None
+    if settings.RESOURCES_LIFECYCLE_INTERVAL_SECONDS > 0:
+        lifecycle_manager = ResourceLifecycleManager()
+        await lifecycle_manager.start()
     yield
+    if lifecycle_manager is not None:
+        await lifecycle_manager.stop()
+    if warmup_task is not None:
+        warmup_task.cancel()
+    if job_worker_pool is not None:
+        await job_worker_pool.stop()
+    shutdown_inference_executor()
 
 
 app = FastAPI(title=settings.APP_TITLE, version=settings.APP_VERSION, lifespan=lifespan)
@@ -45,3 +86,65 @@ app.add_middleware(
 @app.get("/", response_model=HealthSchema, tags=["health"])
 async def health_check(db: AsyncSession = Depends(db_session)):
     return {"api": True, "database": True}
+
+
+@app.get(
+    "/ready",
+    response_model=ReadinessSchema,
+    tags=["health"],
+    responses={status.HTTP_503_SERVICE_UNAVAILABLE: {"model": ReadinessSchema}},
+)
+async def readiness_check(response: Response):
+    """
+    Ready once every component listed in `WARMUP_COMPONENTS` is loaded. Components outside that list load on first
+    use and do not affect readiness.
+    """
+    components = get_components_status()
+    ready = all(components.get(name) == ComponentStatusEnum.WARM for name in settings.WARMUP_COMPONENTS)
+    if not ready:
+        response.status_code = status.HTTP_503_SERVICE_UNAVAILABLE
+    return ReadinessSchema(ready=ready, components=components)
+
+
+@app.get("/metrics/llm-usage", response_model=dict[str, PromptUsageSchema], tags=["health"])
+async def llm_usage_metrics():
+    """
+    Token usage per prompt since startup. `cached_prompt_tokens` are prompt tokens the provider served from its
+    prefix cache, so `cache_hit_rate` shows how well the shared prompt prefixes are reused.
+    """
+    return get_prompt_usage()
+
+
+@app.get("/metrics/retrieval-grading", response_model=RetrievalGradingSchema, tags=["health"])
+async def retrieval_grading_metrics():
+    """
+    How retrieved documents were decided since startup: accepted or rejected by their similarity score, answered
+    from the grade cache, or sent to the LLM grader, and how many grader calls that saved. `verdicts_by_score` counts
+    the grader's verdicts by score bucket (keyed by the bucket's lower edge), for calibrating the opt-in
+    `RETRIEVAL_ACCEPT_SCORE` and `RETRIEVAL_REJECT_SCORE` thresholds. Only graded documents are counted, so collect
+    the buckets with both thresholds unset.
+    """
+    return get_grading_stats() | {"cache": get_grade_cache().stats()}
+
+
+@app.get("/metrics/disk-usage", response_model=ResourcesUsageSchema, tags=["health"])
+async def disk_usage_metrics():
+    """
+    Disk usage of each directory under `resources/`, against the budget enforced by the resources lifecycle
+    """
+    directories = await run_in_threadpool(directory_usage)
+    return ResourcesUsageSchema(
+        total_bytes=sum(usage["bytes"] for usage in directories.values()),
+        budget_bytes=settings.RESOURCES_DISK_BUDGET_BYTES,
+        directories=directories,
+    )
+
+
+@app.get("/metrics/inference-memory", response_model=InferenceMemorySchema, tags=["health"])
+async def inference_memory_metrics():
+    """
+    Peak RSS of Whisper and pyannote jobs by stage and audio duration, and the memory, job count and recycles of
+    each inference pool worker. Per-stage numbers come from the pool's workers; without the pool, jobs share the API
+    process and are reported together under `in_process`.
+    """
+    return get_inference_memory()
@@ -8,3 +8,70 @@ class ExceptionSchema(BaseModel):
 class HealthSchema(BaseModel):
     api: bool
     database: bool
+
+
+class ReadinessSchema(BaseModel):
+    ready: bool
+    components: dict[str, str]
+
+
+class PromptUsageSchema(BaseModel):
+    calls: int
+    prompt_tokens: int
+    cached_prompt_tokens: int
+    completion_tokens: int
+    cache_hit_rate: float
+
+
+class DirectoryUsageSchema(BaseModel):
+    files: int
+    bytes: int
+
+
+class ResourcesUsageSchema(BaseModel):
+    total_bytes: int
+    budget_bytes: int
+    directories: dict[str, DirectoryUsageSchema]
+
+
+class InferenceWorkerSchema(BaseModel):
+    slot: int
+    pid: int
+    jobs: int
+    in_flight: int
+    rss_bytes: int
+    recycles: int
+
+
+class StageMemorySchema(BaseModel):
+    jobs: int
+    mean_peak_rss_bytes: int
+    max_peak_rss_bytes: int
+    max_audio_seconds: float
+
+
+class InferenceMemorySchema(BaseModel):
+    workers: list[InferenceWorkerSchema]
+    stages: dict[str, dict[str, StageMemorySchema]]
+
+
+class GradeCacheSchema(BaseModel):
+    enabled: bool
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+    expirations: int
+    evictions: int
+
+
+class RetrievalGradingSchema(BaseModel):
+    documents: int
+    accepted_by_score: int
+    rejected_by_score: int
+    cached: int
+    graded: int
+    grader_calls: int
+    grader_calls_skipped: int
+    verdicts_by_score: dict[str, dict[str, int]]
+    cache: GradeCacheSchema
@@ -1,4 +1,6 @@
-from pydantic import BaseModel
+from datetime import datetime
+
+from pydantic import BaseModel, Field
 
 
 class AudioTranscribeRequest(BaseModel):
@@ -8,3 +10,104 @@ class AudioTranscribeRequest(BaseModel):
 class AudioTranscribeResponse(BaseModel):
     personalized_summary: str
     transcription_id: int
+
+
+class TranscriptionJobResponse(BaseModel):
+    job_id: int
+    transcription_id: int
+    status: str
+
+
+class TranscriptionJobStatusResponse(TranscriptionJobResponse):
+    stages: dict[str, str]
+    attempts: int
+    error: str | None = None
+    personalized_summary: str | None = None
+    created_at: datetime
+    updated_at: datetime
+
+
+class UploadSessionRequest(BaseModel):
+    total_size: int = Field(gt=0)
+    sha256: str | None = None
+
+
+class UploadSessionResponse(BaseModel):
+    upload_id: str
+    offset: int
+    total_size: int
+
+
+class AttendeeSummariesRequest(BaseModel):
+    attendee_emails: list[str] = Field(min_length=1, max_length=100)
+
+
+class AttendeeSummary(BaseModel):
+    email: str
+    personalized_summary: str | None = None
+    error: str | None = None
+
+
+class AttendeeSummariesResponse(BaseModel):
+    transcription_id: int
+    summaries: list[AttendeeSummary]
+
+
+class SummaryCacheKindStats(BaseModel):
+    entries: int
+    hits: int
+    misses: int
+    hit_rate: float
+
+
+class SummaryCacheStatsResponse(BaseModel):
+    enabled: bool
+    entries: int
+    expirations: int
+    evictions: int
+    kinds: dict[str, SummaryCacheKindStats]  # By kind of entry: summary, digest, chunk_notes
+
+
+class ActionItem(BaseModel):
+    owner: str
+    task: str
+    due: str | None = None
+
+
+class SpeakerHighlights(BaseModel):
+    speaker: str
+    highlights: list[str] = []
+
+
+class MeetingDigest(BaseModel):
+    overview: str = ""
+    decisions: list[str] = []
+    action_items: list[ActionItem] = []
+    blockers: list[str] = []
+    speaker_highlights: list[SpeakerHighlights] = []
+
+
+class TranscriptUpdateRequest(BaseModel):
+    transcription_text: str = Field(min_length=1)
+
+
+class TranscriptUpdateResponse(BaseModel):
+    transcription_id: int
+    personalized_summary: str | None
+    mode: str  # unchanged, incremental or full
+    changed_sections: int
+    total_sections: int
+
+
+class TranscriptSegment(BaseModel):
+    start: float
+    end: float
+    speaker: str
+    text: str
+    tokens: int
+
+
+class TranscriptSegmentsResponse(BaseModel):
+    transcription_id: int
+    speakers: list[str]
+    segments: list[TranscriptSegment]
@@ -1,5 +1,7 @@
 
-from backend.agent import agent_workflow
+from fastapi.concurrency import run_in_threadpool
+
+from backend.agent import get_agent_workflow
 from backend.database.chat_sessions import create_chat_session, update_last_message_time
 from backend.database.messages import get_messages_by_chat_id
 from backend.schemas.chat import QueryResponse, ChatHistoryResponse
@@ -11,10 +13,13 @@ async def process_llm_query(
     """Process a Q/A query and store the result"""
 
     if not chat_session_id:
-        chat_session = create_chat_session(user_id=user_id, transcription_id=transcription_id)
+        chat_session = await run_in_threadpool(create_chat_session, user_id=user_id, transcription_id=transcription_id)
         chat_session_id = chat_session.id
 
-    response = agent_workflow.invoke({"prompt": prompt, "chat_session_id": chat_session_id, "transcript": transcript})
+    # Every node of the workflow awaits its network calls, so concurrent queries share the event loop
+    response = await get_agent_workflow().ainvoke(
+        {"prompt": prompt, "chat_session_id": chat_session_id, "transcript": transcript}
+    )
 
     print(response["steps"])
 
@@ -27,7 +32,7 @@ async def process_llm_query(
 
 
 async def get_chat_history(chat_session_id: int) -> ChatHistoryResponse:
-    messages = get_messages_by_chat_id(chat_session_id)
+    messages = await run_in_threadpool(get_messages_by_chat_id, chat_session_id)
     return ChatHistoryResponse(history=[QueryResponse(
         response=msg.content, chat_session_id=msg.chat_session_id, references=msg.references, tools_used=msg
     ) for msg in messages])
@@ -0,0 +1,44 @@
+import math
+import threading
+
+# Width of the similarity score buckets the grader's verdicts are counted in
+SCORE_BUCKET_WIDTH = 0.05
+
+_counters = {"documents": 0, "accepted_by_score": 0, "rejected_by_score": 0, "cached": 0, "graded": 0,
+             "grader_calls": 0, "grader_calls_skipped": 0}
+_verdicts_by_score: dict[float, dict[str, int]] = {}
+_lock = threading.Lock()
+
+
+def record_grading(accepted: int, rejected: int, cached: int, graded: int, grader_calls: int,
+                   grader_calls_skipped: int):
+    """Count the documents of one grading step by how they were decided"""
+    with _lock:
+        _counters["documents"] += accepted + rejected + cached + graded
+        _counters["accepted_by_score"] += accepted
+        _counters["rejected_by_score"] += rejected
+        _counters["cached"] += cached
+        _counters["graded"] += graded
+        _counters["grader_calls"] += grader_calls
+        _counters["grader_calls_skipped"] += grader_calls_skipped
+
+
+def record_verdict(score: float, relevant: bool):
+    """Count a grader verdict by the similarity score of its document, to calibrate the prefilter thresholds"""
+    # The epsilon keeps scores on a bucket boundary (0.3 / 0.05 == 5.999...) in the bucket they start
+    bucket = round(math.floor(score / SCORE_BUCKET_WIDTH + 1e-9) * SCORE_BUCKET_WIDTH, 2)
+    with _lock:
+        verdicts = _verdicts_by_score.setdefault(bucket, {"relevant": 0, "irrelevant": 0})
+        verdicts["relevant" if relevant else "irrelevant"] += 1
+
+
+def get_grading_stats() -> dict:
+    """
+    How retrieved documents were decided since startup, and the grader's verdicts by similarity score bucket. A
+    bucket whose verdicts are (nearly) all relevant can be accepted without grading, one that is all irrelevant can
+    be rejected.
+    """
+    with _lock:
+        return _counters | {
+            "verdicts_by_score": {f"{bucket:.2f}": dict(v) for bucket, v in sorted(_verdicts_by_score.items())}
+        }
@@ -0,0 +1,70 @@
+import logging
+import threading
+from typing import Any
+
+from langchain_core.callbacks import BaseCallbackHandler
+from langchain_core.outputs import LLMResult
+
+logger = logging.getLogger(__name__)
+
+_usage: dict[str, dict[str, int]] = {}
+_usage_lock = threading.Lock()
+
+
+def _response_usage(response: LLMResult) -> tuple[int, int, int]:
+    """Return (prompt tokens, cached prompt tokens, completion tokens) reported by the provider for a response"""
+    prompt_tokens = cached_tokens = completion_tokens = 0
+    for generations in response.generations:
+        for generation in generations:
+            usage = getattr(getattr(generation, "message", None), "usage_metadata", None)
+            if usage:
+                prompt_tokens += usage.get("input_tokens", 0)
+                completion_tokens += usage.get("output_tokens", 0)
+                cached_tokens += (usage.get("input_token_details") or {}).get("cache_read", 0)
+    if prompt_tokens or not response.llm_output:
+        return prompt_tokens, cached_tokens, completion_tokens
+
+    # Older integrations only report the raw OpenAI usage block
+    token_usage = response.llm_output.get("token_usage") or {}
+    return (
+        token_usage.get("prompt_tokens", 0),
+        (token_usage.get("prompt_tokens_details") or {}).get("cached_tokens", 0),
+        token_usage.get("completion_tokens", 0),
+    )
+
+
+class PromptUsageHandler(BaseCallbackHandler):
+    """
+    Accumulates the token usage of every LLM call made with one prompt, including the prompt tokens the provider
+    served from its prefix cache. Attach it to the model (``callbacks=``) or pass it in the run config.
+    """
+
+    def __init__(self, prompt_name: str):
+        self.prompt_name = prompt_name
+
+    def on_llm_end(self, response: LLMResult, **kwargs: Any):
+        prompt_tokens, cached_tokens, completion_tokens = _response_usage(response)
+        with _usage_lock:
+            usage = _usage.setdefault(self.prompt_name, {
+                "calls": 0, "prompt_tokens": 0, "cached_prompt_tokens": 0, "completion_tokens": 0
+            })
+            usage["calls"] += 1
+            usage["prompt_tokens"] += prompt_tokens
+            usage["cached_prompt_tokens"] += cached_tokens
+            usage["completion_tokens"] += completion_tokens
+
+
+def usage_callbacks(prompt_name: str) -> list[BaseCallbackHandler]:
+    return [PromptUsageHandler(prompt_name)]
+
+
+def get_prompt_usage() -> dict[str, dict]:
+    """Token usage per prompt since startup, with the share of prompt tokens served from the provider's cache"""
+    with _usage_lock:
+        return {
+            name: usage | {
+                "cache_hit_rate": usage["cached_prompt_tokens"] / usage["prompt_tokens"]
+                if usage["prompt_tokens"] else 0.0
+            }
+            for name, usage in _usage.items()
+        }
@@ -0,0 +1,253 @@
+import asyncio
+import logging
+import os
+import shutil
+import time
+from concurrent.futures import Future
+from typing import NamedTuple
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.config import settings
+from backend.services.s3_transfer import get_s3_transfer_service, audio_s3_key
+from backend.services.uploads import expire_upload_sessions
+from backend.utils import BASE_RESOURCES_PATH, SRC_AUDIO_RESOURCES_PATH, TRANSCRIPTIONS_RESOURCES_PATH, \
+    STAGE_CACHE_RESOURCES_PATH, DECODED_AUDIO_RESOURCES_PATH, SEGMENTS_RESOURCES_PATH, COMPRESSED_TRANSCRIPT_SUFFIX, \
+    hash_file
+
+logger = logging.getLogger(__name__)
+
+
+class EvictionCandidate(NamedTuple):
+    path: str
+    size: int
+    last_used: float
+
+
+def _last_used(stat: os.stat_result) -> float:
+    # Most volumes are mounted relatime/noatime, so the modification time is the reliable floor
+    return max(stat.st_atime, stat.st_mtime)
+
+
+def _tree_usage(path: str) -> tuple[int, int, float]:
+    """Return (files, bytes, last used) of a file or directory tree"""
+    if os.path.isfile(path):
+        stat = os.stat(path)
+        return 1, stat.st_size, _last_used(stat)
+    files = size = 0
+    last_used = 0.0
+    for root, _, filenames in os.walk(path):
+        for filename in filenames:
+            try:
+                stat = os.stat(os.path.join(root, filename))
+            except FileNotFoundError:
+                continue
+            files += 1
+            size += stat.st_size
+            last_used = max(last_used, _last_used(stat))
+    return files, size, last_used
+
+
+def directory_usage() -> dict[str, dict[str, int]]:
+    """Files and bytes used by each directory under ``resources/``"""
+    usage = {}
+    if not os.path.isdir(BASE_RESOURCES_PATH):
+        return usage
+    for entry in os.scandir(BASE_RESOURCES_PATH):
+        files, size, _ = _tree_usage(entry.path)
+        usage[entry.name] = {"files": files, "bytes": size}
+    return usage
+
+
+def _delete(path: str):
+    if os.path.isdir(path) and not os.path.islink(path):
+        shutil.rmtree(path, ignore_errors=True)
+    else:
+        try:
+            os.remove(path)
+        except FileNotFoundError:
+            pass
+
+
+def _transcription_id(path: str) -> int | None:
+    stem = os.path.basename(path).split(".", 1)[0]
+    return int(stem) if stem.isdigit() else None
+
+
+class ResourceLifecycleManager:
+    """
+    Keeps ``resources/`` within bounds on long-running nodes. Every ``interval_seconds`` it:
+
+    * compresses transcripts with zstd,
+    * evicts source audio that has been archived to S3 (verified against its SHA-256) once it is older than
+      ``audio_retention_seconds``, and queues the archive upload for audio that is not there yet,
+    * deletes resumable upload sessions untouched for ``upload_ttl_seconds`` (abandoned partial uploads),
+    * evicts the least recently used regenerable data (stage cache entries, decoded audio, segment stores) and
+      archived audio while the directory is above ``disk_budget_bytes``.
+
+    Files used within the last ``min_age_seconds`` are left alone, since they may still be in use by the pipeline
+    (an inference worker opens decoded audio by path), and transcripts and audio that only exist on this node are
+    never deleted.
+    """
+
+    def __init__(
+        self,
+        interval_seconds: int = settings.RESOURCES_LIFECYCLE_INTERVAL_SECONDS,
+        disk_budget_bytes: int = settings.RESOURCES_DISK_BUDGET_BYTES,
+        min_age_seconds: int = settings.RESOURCES_MIN_AGE_SECONDS,
+        audio_retention_seconds: int = settings.SRC_AUDIO_RETENTION_SECONDS,
+        compression_level: int = settings.TRANSCRIPT_COMPRESSION_LEVEL,
+        upload_ttl_seconds: int = settings.UPLOAD_SESSION_TTL_SECONDS,
+    ):
+        self.interval_seconds = interval_seconds
+        self.disk_budget_bytes = disk_budget_bytes
+        self.min_age_seconds = min_age_seconds
+        self.audio_retention_seconds = audio_retention_seconds
+        self.compression_level = compression_level
+        self.upload_ttl_seconds = upload_ttl_seconds
+        # (path, size, mtime) of source audio already confirmed in S3, so it is not re-hashed on every sweep
+        self._archived: set[tuple[str, int, float]] = set()
+        self._uploads: dict[str, Future] = {}
+        self._task: asyncio.Task | None = None
+
+    async def start(self):
+        logger.info(f"Starting resources lifecycle sweeps every {self.interval_seconds}s")
+        self._task = asyncio.create_task(self._loop(), name="resource-lifecycle")
+
+    async def stop(self):
+        if self._task is not None:
+            self._task.cancel()
+            await asyncio.gather(self._task, return_exceptions=True)
+            self._task = None
+
+    async def _loop(self):
+        while True:
+            try:
+                await run_in_threadpool(self.run_once)
+            except Exception as e:
+                logger.error(f"Resources lifecycle sweep failed: {e}")
+            await asyncio.sleep(self.interval_seconds)
+
+    def run_once(self) -> dict:
+        start = time.perf_counter()
+        compressed = self.compress_transcripts()
+        evicted_audio = self.evict_archived_audio()
+        expired_uploads = expire_upload_sessions(self.upload_ttl_seconds)
+        evicted_bytes = self.enforce_disk_budget()
+        logger.info(
+            f"Resources lifecycle sweep took {time.perf_counter() - start:.2f}s: compressed {compressed} transcripts, "
+            f"evicted {evicted_audio} archived recordings, expired {expired_uploads} upload sessions and evicted "
+            f"{evicted_bytes} bytes over budget"
+        )
+        return {
+            "compressed_transcripts": compressed, "evicted_audio": evicted_audio, "expired_uploads": expired_uploads,
+            "evicted_bytes": evicted_bytes,
+        }
+
+    def compress_transcripts(self) -> int:
+        try:
+            import zstandard
+        except ImportError:
+            logger.warning("zstandard is not installed, transcripts are kept uncompressed")
+            return 0
+
+        compressor = zstandard.ZstdCompressor(level=self.compression_level)
+        cutoff = time.time() - self.min_age_seconds
+        compressed = 0
+        for entry in os.scandir(TRANSCRIPTIONS_RESOURCES_PATH):
+            if not entry.name.endswith(".txt") or entry.stat().st_mtime > cutoff:
+                continue
+            dest_path = entry.path + COMPRESSED_TRANSCRIPT_SUFFIX
+            tmp_path = dest_path + ".tmp"
+            with open(entry.path, "rb") as src, open(tmp_path, "wb") as dest:
+                compressor.copy_stream(src, dest)
+            os.replace(tmp_path, dest_path)
+            os.remove(entry.path)
+            compressed += 1
+        return compressed
+
+    def _is_archived(self, path: str) -> bool:
+        transcription_id = _transcription_id(path)
+        if transcription_id is None:
+            return False
+        stat = os.stat(path)
+        fingerprint = (path, stat.st_size, stat.st_mtime)
+        if fingerprint in self._archived:
+            return True
+        service = get_s3_transfer_service()
+        key = audio_s3_key(transcription_id, path)
+        if key in self._uploads and not self._uploads[key].done():
+            return False
+        sha256 = hash_file(path)
+        if not service.verify_object(key, sha256):
+            if settings.S3_BACKGROUND_UPLOADS:
+                self._uploads[key] = service.submit(path, key, sha256=sha256)
+            return False
+        self._uploads.pop(key, None)
+        self._archived.add(fingerprint)
+        return True
+
+    def _source_audio(self, min_age_seconds: int) -> list[str]:
+        cutoff = time.time() - min_age_seconds
+        return [
+            entry.path for entry in os.scandir(SRC_AUDIO_RESOURCES_PATH)
+            if entry.is_file() and entry.stat().st_mtime <= cutoff
+        ]
+
+    def evict_archived_audio(self) -> int:
+        evicted = 0
+        for path in self._source_audio(self.audio_retention_seconds):
+            try:
+                if self._is_archived(path):
+                    _delete(path)
+                    evicted += 1
+            except Exception as e:
+                logger.warning(f"Could not check whether {path} is archived: {e}")
+        self._archived = {fingerprint for fingerprint in self._archived if os.path.exists(fingerprint[0])}
+        return evicted
+
+    def _eviction_candidates(self) -> list[EvictionCandidate]:
+        cutoff = time.time() - self.min_age_seconds
+        candidates = []
+        # Regenerable data, evicted as whole units: one stage cache entry, one decoded recording, one segment store
+        # version (the link to it is left dangling, and the store is rebuilt on its next read)
+        for root, depth in ((STAGE_CACHE_RESOURCES_PATH, 2), (DECODED_AUDIO_RESOURCES_PATH, 0),
+                            (SEGMENTS_RESOURCES_PATH, 0)):
+            paths = [root]
+            for _ in range(depth + 1):
+                paths = [entry.path for path in paths if os.path.isdir(path) for entry in os.scandir(path)]
+            for path in paths:
+                if path.endswith(".tmp") or os.path.islink(path):  # being written, or a link to a segment store
+                    continue
+                _, size, last_used = _tree_usage(path)
+                if last_used <= cutoff:
+                    candidates.append(EvictionCandidate(path, size, last_used))
+        # Source audio is only evictable once it is safely in S3; recent uploads may still be processing
+        for path in self._source_audio(self.min_age_seconds):
+            try:
+                if self._is_archived(path):
+                    stat = os.stat(path)
+                    candidates.append(EvictionCandidate(path, stat.st_size, _last_used(stat)))
+            except Exception as e:
+                logger.warning(f"Could not check whether {path} is archived: {e}")
+        return sorted(candidates, key=lambda candidate: candidate.last_used)
+
+    def enforce_disk_budget(self) -> int:
+        if self.disk_budget_bytes <= 0:
+            return 0
+        excess = sum(usage["bytes"] for usage in directory_usage().values()) - self.disk_budget_bytes
+        if excess <= 0:
+            return 0
+
+        evicted = 0
+        for candidate in self._eviction_candidates():
+            if evicted >= excess:
+                break
+            _delete(candidate.path)
+            evicted += candidate.size
+        if evicted < excess:
+            logger.warning(
+                f"resources/ is still {excess - evicted} bytes over its budget of {self.disk_budget_bytes} bytes "
+                f"after evicting what can be regenerated or restored from S3 and was unused for {self.min_age_seconds}s"
+            )
+        return evicted
@@ -0,0 +1,189 @@
+import logging
+import os
+import threading
+import time
+from concurrent.futures import Future, ThreadPoolExecutor
+from functools import lru_cache
+
+from boto3.exceptions import S3UploadFailedError
+from boto3.s3.transfer import TransferConfig
+from botocore.exceptions import BotoCoreError, ClientError
+
+from backend.config import settings
+from backend.utils import get_s3_client, hash_file
+
+logger = logging.getLogger(__name__)
+
+# S3 stores this on the object so a download (or a later upload of the same file) can be checked against it
+SHA256_METADATA_KEY = "sha256"
+
+
+class S3UploadError(Exception):
+    pass
+
+
+class S3DownloadError(Exception):
+    pass
+
+
+class S3TransferService:
+    """
+    Uploads files to S3 through one pooled, thread-safe client.
+
+    Files above ``multipart_threshold`` bytes are uploaded as parallel multipart uploads. Every part carries a
+    SHA-256 checksum that S3 verifies on receipt, and the SHA-256 of the whole file is stored in the object metadata.
+    Failed transfers are retried with exponential backoff on top of botocore's per-request retries.
+
+    ``submit`` runs the upload on a background thread pool so request handlers never wait on S3; ``shutdown``
+    drains the uploads still in flight.
+    """
+
+    def __init__(
+        self,
+        bucket: str = settings.AWS_S3_BUCKET,
+        workers: int = settings.S3_UPLOAD_WORKERS,
+        multipart_threshold: int = settings.S3_MULTIPART_THRESHOLD_BYTES,
+        multipart_chunk_size: int = settings.S3_MULTIPART_CHUNK_BYTES,
+        max_concurrency: int = settings.S3_MULTIPART_CONCURRENCY,
+        max_attempts: int = settings.S3_UPLOAD_MAX_ATTEMPTS,
+        backoff_seconds: float = settings.S3_UPLOAD_BACKOFF_SECONDS,
+    ):
+        self.bucket = bucket
+        self.workers = workers
+        self.max_attempts = max_attempts
+        self.backoff_seconds = backoff_seconds
+        self.transfer_config = TransferConfig(
+            multipart_threshold=multipart_threshold,
+            multipart_chunksize=multipart_chunk_size,
+            max_concurrency=max_concurrency,
+            use_threads=max_concurrency > 1,
+        )
+        self._executor: ThreadPoolExecutor | None = None
+        self._executor_lock = threading.Lock()
+        self._pending: set[Future] = set()
+
+    def _get_executor(self) -> ThreadPoolExecutor:
+        with self._executor_lock:
+            if self._executor is None:
+                self._executor = ThreadPoolExecutor(max_workers=self.workers, thread_name_prefix="s3-upload")
+            return self._executor
+
+    def upload_file(
+        self, file_path: str, key: str, content_type: str | None = None, sha256: str | None = None
+    ) -> str:
+        """
+        Upload a file and block until S3 has acknowledged it.
+
+        Args:
+            file_path: Local file to upload
+            key: Destination key in the bucket
+            content_type: Optional Content-Type of the object
+            sha256: SHA-256 (hex) of the file when already known, computed from the file otherwise
+
+        Returns:
+            The SHA-256 (hex) of the uploaded file
+        """
+        if sha256 is None:
+            sha256 = hash_file(file_path)
+        extra_args = {"ChecksumAlgorithm": "SHA256", "Metadata": {SHA256_METADATA_KEY: sha256}}
+        if content_type:
+            extra_args["ContentType"] = content_type
+
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                start = time.perf_counter()
+                get_s3_client().upload_file(
+                    file_path, self.bucket, key, ExtraArgs=extra_args, Config=self.transfer_config
+                )
+                logger.info(f"Uploaded {file_path} to s3://{self.bucket}/{key} in {time.perf_counter() - start:.2f}s")
+                return sha256
+            # boto3 wraps failed (multipart) transfers in S3UploadFailedError
+            except (S3UploadFailedError, BotoCoreError, ClientError) as e:
+                if attempt == self.max_attempts:
+                    raise S3UploadError(f"Failed to upload {file_path} to s3://{self.bucket}/{key}: {e}") from e
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                logger.warning(f"Upload of {file_path} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+    def download_file(self, key: str, file_path: str, sha256: str | None = None) -> str:
+        """
+        Download an object to a local file, retrying failed transfers like ``upload_file``. The file only appears at
+        ``file_path`` once it is complete and, when ``sha256`` is given, matches it.
+
+        Args:
+            key: Source key in the bucket
+            file_path: Local file to write
+            sha256: Expected SHA-256 (hex) of the object; a download that does not match it raises S3DownloadError
+
+        Returns:
+            ``file_path``
+        """
+        tmp_path = file_path + ".tmp"
+        for attempt in range(1, self.max_attempts + 1):
+            try:
+                start = time.perf_counter()
+                get_s3_client().download_file(self.bucket, key, tmp_path, Config=self.transfer_config)
+                logger.info(
+                    f"Downloaded s3://{self.bucket}/{key} to {file_path} in {time.perf_counter() - start:.2f}s"
+                )
+                break
+            except (BotoCoreError, ClientError) as e:
+                if attempt == self.max_attempts:
+                    raise S3DownloadError(f"Failed to download s3://{self.bucket}/{key}: {e}") from e
+                delay = self.backoff_seconds * 2 ** (attempt - 1)
+                logger.warning(f"Download of {key} failed (attempt {attempt}), retrying in {delay:.1f}s: {e}")
+                time.sleep(delay)
+
+        if sha256 is not None and hash_file(tmp_path) != sha256:
+            os.remove(tmp_path)
+            raise S3DownloadError(f"s3://{self.bucket}/{key} does not match its SHA-256")
+        os.replace(tmp_path, file_path)
+        return file_path
+
+    def verify_object(self, key: str, sha256: str) -> bool:
+        """Check that the object at ``key`` was uploaded from a file with the given SHA-256"""
+        try:
+            head = get_s3_client().head_object(Bucket=self.bucket, Key=key)
+        except ClientError:
+            return False
+        return head.get("Metadata", {}).get(SHA256_METADATA_KEY) == sha256
+
+    def submit(
+        self, file_path: str, key: str, content_type: str | None = None, sha256: str | None = None
+    ) -> Future:
+        """Upload a file in the background. Failures are logged; the returned future raises ``S3UploadError``."""
+        future = self._get_executor().submit(self.upload_file, file_path, key, content_type, sha256)
+        self._pending.add(future)
+        future.add_done_callback(self._upload_done)
+        return future
+
+    def _upload_done(self, future: Future):
+        self._pending.discard(future)
+        if not future.cancelled() and (e := future.exception()) is not None:
+            logger.error(f"Background S3 upload failed: {e}")
+
+    @property
+    def pending(self) -> int:
+        return len(self._pending)
+
+    def shutdown(self, wait: bool = True):
+        """Stop accepting uploads; with ``wait`` the uploads already submitted are finished first"""
+        with self._executor_lock:
+            executor, self._executor = self._executor, None
+        if executor is not None:
+            if self._pending:
+                logger.info(f"Waiting for {len(self._pending)} background S3 uploads")
+            executor.shutdown(wait=wait, cancel_futures=not wait)
+
+
+@lru_cache(maxsize=1)
+def get_s3_transfer_service() -> S3TransferService:
+    return S3TransferService()
+
+
+def audio_s3_key(transcription_id: int, file_path: str) -> str:
+    return f"audio/{transcription_id}/{os.path.basename(file_path)}"
+
+
+def transcript_s3_key(transcription_id: int) -> str:
+    return f"transcriptions/{transcription_id}.txt"
@@ -1,68 +1,769 @@
 # TODO: Add transcription record and return ID
+import asyncio
+import hashlib
+import json
+import logging
+import threading
+import uuid
+from concurrent.futures import ThreadPoolExecutor
+from contextlib import contextmanager
 from functools import lru_cache
+from collections import Counter
+from typing import Awaitable, Callable, NamedTuple
 
-from fastapi import FastAPI, UploadFile, File
+from fastapi import FastAPI, UploadFile, File, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from fastapi.responses import JSONResponse
 import tempfile
 from pathlib import Path
-import whisper
-import boto3
 import os
 from dotenv import load_dotenv
-from langchain.chains.llm import LLMChain
 from langchain_core.prompts import PromptTemplate
-from langchain_openai import ChatOpenAI
 
 from backend.config import settings
-from backend.database.employees import get_employee_details
+from backend.database.employees import get_employee_details, get_employees_details
+from backend.database.transcription_jobs import StageStatusEnum, TranscriptionStage
+from backend.database.transcriptions import update_transcription_text, update_personalized_summary, \
+    get_transcription_by_id, upsert_transcription_summary, update_meeting_digest, get_meeting_digest_json, \
+    TranscriptionModel, get_transcription_summaries, get_transcription_owner
 from backend.database.users import get_email_by_user_id
+from backend.services.llm_usage import usage_callbacks
+from backend.services.s3_transfer import get_s3_transfer_service, audio_s3_key, transcript_s3_key
+from backend.schemas.transcribe import AttendeeSummariesResponse, AttendeeSummary, MeetingDigest, \
+    TranscriptUpdateResponse, TranscriptSegment, TranscriptSegmentsResponse
+from backend.transcription.alignment import (
+    AlignedSegment, SpeakerTurn, align_segments, format_aligned_segments, parse_aligned_segments,
+    turns_from_diarization
+)
+from backend.transcription.asr_pool import ChunkedTranscriber
+from backend.transcription.cache import StageCache, cache_key
+from backend.transcription.audio import SharedWaveform, asr_input, decode_audio_file, diarization_input, \
+    encode_opus, write_shared_waveform
+from backend.transcription.inference_pool import InferencePool
+from backend.transcription.memory import MemoryStats, MemoryUsage, PeakRSSSampler
+from backend.transcription.segment_store import SegmentStore
+from backend.transcription.summary_cache import SummaryCache, SummaryCacheKindEnum
+from backend.transcription.tokens import count_tokens, split_sections, split_transcript
+from backend.utils import STAGE_CACHE_RESOURCES_PATH, DECODED_AUDIO_RESOURCES_PATH, SUMMARY_CACHE_PATH, \
+    SEGMENTS_RESOURCES_PATH, hash_file, \
+    write_transcription_to_file
 
+logger = logging.getLogger(__name__)
 
-# Load Whisper model for transcription
+# Whisper and pyannote release the GIL inside torch, so a thread pool lets both stages run in parallel while the
+# event loop keeps serving other requests. The locks stop two uploads from driving the same model instance at once.
+# With the pre-forked inference pool these threads only wait on worker processes, so there is one per worker.
+_inference_executor = ThreadPoolExecutor(
+    max_workers=max(settings.TRANSCRIPTION_EXECUTOR_WORKERS, settings.INFERENCE_POOL_WORKERS),
+    thread_name_prefix="inference",
+)
+_whisper_lock = threading.Lock()
+_diarization_lock = threading.Lock()
+
+StageCallback = Callable[[TranscriptionStage, StageStatusEnum], Awaitable[None]]
+
+
+# Model and prompt identifiers are part of the stage cache keys; bump them whenever a stage's output would change
+WHISPER_MODEL_NAME = settings.WHISPER_MODEL_SIZE
+DIARIZATION_MODEL_NAME = "pyannote/speaker-diarization-3.1"
+DECODED_AUDIO_FORMAT = "pcm_f32le-16000-mono"
+ALIGNMENT_VERSION = "max-overlap-1"
+# Prompt caching (cached_prompt_tokens on /metrics/llm-usage) is only offered for gpt-4o and newer models
+SUMMARY_MODEL_NAME = "gpt-4o"
+SUMMARY_PROMPT_VERSION = "3"
+CHUNK_NOTES_PROMPT_VERSION = "1"
+DIGEST_PROMPT_VERSION = "1"
+
+stage_cache = StageCache(STAGE_CACHE_RESOURCES_PATH, enabled=settings.STAGE_CACHE_ENABLED)
+summary_cache = SummaryCache(
+    SUMMARY_CACHE_PATH, max_entries=settings.SUMMARY_CACHE_MAX_ENTRIES, ttl_seconds=settings.SUMMARY_CACHE_TTL_SECONDS,
+    enabled=settings.SUMMARY_CACHE_ENABLED,
+)
+
+# Long recordings are split at silence and transcribed window by window, on the inference pool when it runs, else on
+# this transcriber's own processes (see LONG_AUDIO_ASR_WORKERS for their memory cost)
+chunked_transcriber = ChunkedTranscriber(
+    model_name=WHISPER_MODEL_NAME, workers=settings.LONG_AUDIO_ASR_WORKERS,
+    max_window_seconds=settings.LONG_AUDIO_WINDOW_SECONDS, max_tasks_per_child=settings.INFERENCE_WORKER_MAX_JOBS,
+)
+
+
+# Models are loaded on first use (or by the startup warm-up, see backend.services.warmup) so importing the API does
+# not pull in torch or download weights
 @lru_cache(maxsize=1)
 def get_whisper_model():
-    return whisper.load_model("base")
+    import whisper
 
+    return whisper.load_model(WHISPER_MODEL_NAME)
 
-# Function to upload files to S3
-def upload_file_to_s3(file_path, s3_key):
+
+@lru_cache(maxsize=1)
+def get_diarization_pipeline():
+    """Load the pyannote pipeline for diarization, or return None if it cannot be loaded (e.g. invalid HF token)"""
     try:
-        s3_client = boto3.client(
-            "s3",
-            aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
-            aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
-            region_name=settings.AWS_REGION
-        )
+        from pyannote.audio import Pipeline
 
-        s3_client.upload_file(file_path, settings.AWS_S3_BUCKET, s3_key)
-        return ""
+        diarization_pipeline = Pipeline.from_pretrained(
+            DIARIZATION_MODEL_NAME,
+            use_auth_token=settings.HF_TOKEN
+        )
+        logger.info("Diarization pipeline loaded successfully.")
+        return diarization_pipeline
     except Exception as e:
-        raise Exception(f"Failed to upload file to S3: {e}")
+        logger.error(f"Failed to load diarization pipeline: {e}")
+        return None
+
+
+# Peak RSS of every inference job, by stage and audio duration
+inference_memory_stats = MemoryStats()
+
+# Optional pre-forked worker processes sharing one copy of the model weights, see backend.transcription.inference_pool
+inference_pool = InferencePool(
+    workers=settings.INFERENCE_POOL_WORKERS, load_whisper=get_whisper_model,
+    load_diarization=get_diarization_pipeline, max_rss_bytes=settings.INFERENCE_WORKER_MAX_RSS_BYTES,
+    max_jobs=settings.INFERENCE_WORKER_MAX_JOBS, sample_interval=settings.INFERENCE_MEMORY_SAMPLE_SECONDS,
+    stats=inference_memory_stats,
+) if settings.INFERENCE_POOL_WORKERS > 0 else None
+
+
+def start_inference_pool():
+    """Load the models and fork the inference workers. Must run at startup, before any inference in this process."""
+    if inference_pool is not None:
+        inference_pool.start()
+
+
+def get_inference_memory() -> dict:
+    return {
+        "workers": inference_pool.worker_stats() if inference_pool is not None else [],
+        "stages": inference_memory_stats.summary(),
+    }
+
+
+def shutdown_inference_executor():
+    _inference_executor.shutdown(wait=True, cancel_futures=True)
+    get_s3_transfer_service().shutdown(wait=True)
+    chunked_transcriber.shutdown()
+    if inference_pool is not None:
+        inference_pool.shutdown()
+
+
+def decode_audio(audio_file_path: str, dest_path: str) -> SharedWaveform:
+    """Decode an audio file once to 16 kHz mono float32 and store it where every consumer can memory-map it"""
+    return write_shared_waveform(decode_audio_file(audio_file_path), dest_path)
+
+
+def _inference_pool_running() -> bool:
+    return inference_pool is not None and inference_pool.started
+
+
+def _chunked_asr_enabled() -> bool:
+    """Chunked ASR reuses the inference pool's loaded models; its own process pool is opt-in, as each loads a model"""
+    return _inference_pool_running() or settings.LONG_AUDIO_ASR_WORKERS > 1
+
+
+def _use_chunked_asr(audio: SharedWaveform) -> bool:
+    return _chunked_asr_enabled() and audio.duration >= settings.LONG_AUDIO_THRESHOLD_SECONDS
+
+
+def _asr_cache_fingerprint() -> str:
+    if _chunked_asr_enabled():
+        return f"long>={settings.LONG_AUDIO_THRESHOLD_SECONDS}s:{chunked_transcriber.fingerprint}"
+    return "single-pass"
+
+
+# Stage label of in-process inference jobs in the memory stats
+IN_PROCESS_STAGE = "in_process"
+
+
+@contextmanager
+def watch_memory(stage: str, audio: SharedWaveform):
+    """
+    Record the RSS of an in-process inference job. Unlike pool workers, the API process cannot be recycled, so going
+    over the ceiling is only logged.
+
+    ASR and diarization run at the same time and the sampler sees the RSS of the whole process, so a sample cannot be
+    attributed to either: in-process jobs are all recorded under ``IN_PROCESS_STAGE``. Only pool workers, which run
+    one job at a time, give per-stage numbers.
+    """
+    with PeakRSSSampler(settings.INFERENCE_MEMORY_SAMPLE_SECONDS) as sampler:
+        yield
+    inference_memory_stats.record(
+        MemoryUsage(IN_PROCESS_STAGE, audio.duration, sampler.peak, sampler.after, os.getpid())
+    )
+    if settings.INFERENCE_WORKER_MAX_RSS_BYTES and sampler.after > settings.INFERENCE_WORKER_MAX_RSS_BYTES:
+        logger.warning(
+            f"RSS is {sampler.after / 2 ** 20:.0f} MiB after {stage}, above the inference memory ceiling; "
+            f"set INFERENCE_POOL_WORKERS to run inference in workers that are recycled"
+        )
+
+
+def transcribe_segments(audio: SharedWaveform) -> list[dict]:
+    """
+    Run Whisper on a decoded waveform and return its segments.
+
+    Waveforms longer than ``LONG_AUDIO_THRESHOLD_SECONDS`` go through the chunked transcriber instead of a single
+    sequential pass when the inference pool runs or ``LONG_AUDIO_ASR_WORKERS`` is set.
+    """
+    pooled = _inference_pool_running()
+    if _use_chunked_asr(audio):
+        return chunked_transcriber.transcribe(audio, map_windows=inference_pool.map_transcribe if pooled else None)
+    if pooled:
+        return inference_pool.transcribe(audio)
+
+    whisper_model = get_whisper_model()
+    with _whisper_lock, watch_memory("asr", audio):
+        return whisper_model.transcribe(asr_input(audio.load()))["segments"]
+
+
+def diarize_turns(audio: SharedWaveform) -> list[SpeakerTurn]:
+    """Run the pyannote pipeline on a decoded waveform and return its speaker turns"""
+    if _inference_pool_running():
+        return [SpeakerTurn(*turn) for turn in inference_pool.diarize(audio)]
+
+    diarization_pipeline = get_diarization_pipeline()
+    if diarization_pipeline is None:
+        raise RuntimeError("Diarization pipeline is not loaded")
+    with _diarization_lock, watch_memory("diarization", audio):
+        diarization = diarization_pipeline(diarization_input(audio.load()))
+    return turns_from_diarization(diarization)
+
+
+async def _noop_stage_callback(stage: TranscriptionStage, status: StageStatusEnum):
+    return None
+
+
+async def _run_stage(stage: TranscriptionStage, on_stage: StageCallback, func, *args):
+    await on_stage(stage, StageStatusEnum.RUNNING)
+    try:
+        result = await asyncio.get_running_loop().run_in_executor(_inference_executor, func, *args)
+    except Exception:
+        await on_stage(stage, StageStatusEnum.FAILED)
+        raise
+    await on_stage(stage, StageStatusEnum.COMPLETED)
+    return result
+
+
+class DecodedAudio:
+    """
+    Decodes a recording at most once per pipeline run and hands the same memory-mapped waveform to every stage.
+
+    The decoded file is the stage cache entry when ``STAGE_CACHE_DECODED_AUDIO`` is set, otherwise a scratch file
+    that ``cleanup`` removes.
+    """
+
+    def __init__(self, audio_file_path: str, audio_sha256: str, on_stage: StageCallback):
+        self.audio_file_path = audio_file_path
+        self.audio_sha256 = audio_sha256
+        self.on_stage = on_stage
+        self._task: asyncio.Task | None = None
+        self._scratch_path: str | None = None
+
+    async def get(self) -> SharedWaveform:
+        if self._task is None:
+            self._task = asyncio.ensure_future(self._decode())
+        return await self._task
+
+    async def _decode(self) -> SharedWaveform:
+        decoded_key = cache_key(self.audio_sha256, DECODED_AUDIO_FORMAT)
+        if settings.STAGE_CACHE_DECODED_AUDIO and stage_cache.enabled:
+            dest_path = stage_cache.array_path(TranscriptionStage.DECODING, decoded_key)
+            if os.path.exists(dest_path):
+                await self.on_stage(TranscriptionStage.DECODING, StageStatusEnum.CACHED)
+                return SharedWaveform(dest_path)
+        else:
+            dest_path = self._scratch_path = os.path.join(DECODED_AUDIO_RESOURCES_PATH, f"{uuid.uuid4().hex}.npy")
+        return await _run_stage(
+            TranscriptionStage.DECODING, self.on_stage, decode_audio, self.audio_file_path, dest_path
+        )
+
+    def cleanup(self):
+        if self._scratch_path and os.path.exists(self._scratch_path):
+            os.remove(self._scratch_path)
+
+
+async def transcribe_and_diarize(
+    audio_file_path: str, audio_sha256: str, on_stage: StageCallback = _noop_stage_callback,
+    decoded: DecodedAudio | None = None,
+) -> list[AlignedSegment]:
+    """
+    Decode the audio once, then run ASR and diarization concurrently on the inference executor and align their
+    outputs.
+
+    Wall time is roughly max(ASR, diarization) rather than their sum, and the event loop is never blocked. Both
+    models read the same memory-mapped decoded waveform. Every stage output is cached under a key derived from the
+    audio content hash and the model producing it, so a re-uploaded recording only runs the stages whose inputs or
+    models changed.
+    """
+    if decoded is None:
+        decoded = DecodedAudio(audio_file_path, audio_sha256, on_stage)
+        try:
+            return await transcribe_and_diarize(audio_file_path, audio_sha256, on_stage, decoded)
+        finally:
+            decoded.cleanup()
+
+    asr_key = cache_key(audio_sha256, WHISPER_MODEL_NAME, _asr_cache_fingerprint())
+    diarization_key = cache_key(audio_sha256, DIARIZATION_MODEL_NAME)
+    aligned_key = cache_key(asr_key, diarization_key, ALIGNMENT_VERSION)
+
+    cached_aligned = stage_cache.get_json(TranscriptionStage.ALIGNMENT, aligned_key)
+    if cached_aligned is not None:
+        for stage in (TranscriptionStage.DECODING, TranscriptionStage.ASR, TranscriptionStage.DIARIZATION,
+                      TranscriptionStage.ALIGNMENT):
+            await on_stage(stage, StageStatusEnum.CACHED)
+        return [AlignedSegment(*segment) for segment in cached_aligned]
 
+    async def asr() -> list[dict]:
+        if (segments := stage_cache.get_json(TranscriptionStage.ASR, asr_key)) is not None:
+            await on_stage(TranscriptionStage.ASR, StageStatusEnum.CACHED)
+            return segments
+        segments = await _run_stage(TranscriptionStage.ASR, on_stage, transcribe_segments, await decoded.get())
+        # Only the fields alignment needs are kept; Whisper's token ids and log-probs would dominate the entry
+        segments = [{"start": s["start"], "end": s["end"], "text": s["text"]} for s in segments]
+        stage_cache.put_json(TranscriptionStage.ASR, asr_key, segments)
+        return segments
 
-def generate_personalized_summary(transcription_path: str, user_id: int):
+    async def diarization() -> list[SpeakerTurn]:
+        if (turns := stage_cache.get_json(TranscriptionStage.DIARIZATION, diarization_key)) is not None:
+            await on_stage(TranscriptionStage.DIARIZATION, StageStatusEnum.CACHED)
+            return [SpeakerTurn(*turn) for turn in turns]
+        turns = await _run_stage(TranscriptionStage.DIARIZATION, on_stage, diarize_turns, await decoded.get())
+        stage_cache.put_json(TranscriptionStage.DIARIZATION, diarization_key, turns)
+        return turns
+
+    transcription_output, turns = await asyncio.gather(asr(), diarization())
+    await on_stage(TranscriptionStage.ALIGNMENT, StageStatusEnum.RUNNING)
+    aligned_segments = align_segments(transcription_output, turns)
+    stage_cache.put_json(TranscriptionStage.ALIGNMENT, aligned_key, aligned_segments)
+    await on_stage(TranscriptionStage.ALIGNMENT, StageStatusEnum.COMPLETED)
+    return aligned_segments
+
+
+def compact_source_audio(audio_file_path: str, waveform: SharedWaveform) -> str:
+    """Replace the uploaded recording with a 16 kHz mono Opus copy encoded from the decoded waveform"""
+    opus_path = os.path.splitext(audio_file_path)[0] + ".opus"
+    encode_opus(waveform, opus_path)
+    os.remove(audio_file_path)
+    return opus_path
+
+
+def segment_store_for(transcription_id: int) -> SegmentStore:
+    return SegmentStore(os.path.join(SEGMENTS_RESOURCES_PATH, str(transcription_id)))
+
+
+def write_segment_store(transcription_id: int, segments: list[AlignedSegment]) -> SegmentStore:
+    return SegmentStore.write(
+        segment_store_for(transcription_id).path, segments,
+        count_tokens=lambda text: count_tokens(text, SUMMARY_MODEL_NAME),
+    )
+
+
+def _meeting_digest_cache_key(transcript: str) -> str:
+    return cache_key(hashlib.sha256(transcript.encode("utf-8")).hexdigest(), DIGEST_PROMPT_VERSION, SUMMARY_MODEL_NAME)
+
+
+def get_meeting_digest(transcript: str, use_cache: bool = True) -> MeetingDigest:
+    """
+    Return the structured digest of a meeting transcript, from the summary cache when available. The digest is the
+    only part of the summarization that reads the transcript, so it is computed once per meeting and shared by all
+    personalized summaries.
+    """
+    key = _meeting_digest_cache_key(transcript)
+    if use_cache and (cached := summary_cache.get(key, SummaryCacheKindEnum.DIGEST)) is not None:
+        return MeetingDigest.model_validate_json(cached)
+
+    meeting_digest = generate_meeting_digest(transcript)
+    summary_cache.put(key, meeting_digest.model_dump_json(), SummaryCacheKindEnum.DIGEST)
+    return meeting_digest
+
+
+def format_meeting_digest(digest: MeetingDigest) -> str:
+    """Render a digest as the compact text the personalized summary prompt consumes"""
+    def bullets(items: list[str]) -> str:
+        return "\n".join(f"- {item}" for item in items) if items else "- None"
+
+    action_items = [
+        f"{item.owner}: {item.task}" + (f" (due {item.due})" if item.due else "") for item in digest.action_items
+    ]
+    highlights = [f"{entry.speaker}: {'; '.join(entry.highlights)}" for entry in digest.speaker_highlights]
+    return (
+        f"Overview: {digest.overview}\n"
+        f"Decisions:\n{bullets(digest.decisions)}\n"
+        f"Action items:\n{bullets(action_items)}\n"
+        f"Blockers:\n{bullets(digest.blockers)}\n"
+        f"Speaker highlights:\n{bullets(highlights)}"
+    )
+
+
+async def load_meeting_digest(transcription: TranscriptionModel) -> MeetingDigest:
+    """Return the digest stored with a transcription, generating and storing it first if missing"""
+    if stored_digest := await run_in_threadpool(get_meeting_digest_json, transcription.id):
+        return MeetingDigest.model_validate_json(stored_digest)
+
+    meeting_digest = await run_in_threadpool(get_meeting_digest, transcription.transcription_text)
+    await run_in_threadpool(
+        update_meeting_digest, transcription_id=transcription.id, meeting_digest=meeting_digest.model_dump_json()
+    )
+    return meeting_digest
+
+
+class TranscriptChanges(NamedTuple):
+    removed: list[str]  # sections of the old transcript that are gone from the new one
+    added: list[str]  # sections of the new transcript that were not in the old one
+    total_sections: int  # sections in the new transcript
+
+    @property
+    def changed_fraction(self) -> float:
+        return max(len(self.removed), len(self.added)) / max(1, self.total_sections)
+
+
+class DigestRefresh(NamedTuple):
+    meeting_digest: MeetingDigest
+    mode: str  # "unchanged", "incremental" or "full"
+    changes: TranscriptChanges
+
+
+def diff_transcript_sections(old_transcript: str, new_transcript: str) -> TranscriptChanges:
+    """Compare two versions of a transcript section by section, see ``split_sections``"""
+    old_sections = split_sections(old_transcript, settings.SUMMARY_CHUNK_TOKENS, SUMMARY_MODEL_NAME)
+    new_sections = split_sections(new_transcript, settings.SUMMARY_CHUNK_TOKENS, SUMMARY_MODEL_NAME)
+
+    def only_in(sections: list[str], other: list[str]) -> list[str]:
+        remaining = Counter(sections) - Counter(other)
+        kept = []
+        for section in sections:
+            if remaining[section] > 0:
+                remaining[section] -= 1
+                kept.append(section)
+        return kept
+
+    return TranscriptChanges(
+        removed=only_in(old_sections, new_sections), added=only_in(new_sections, old_sections),
+        total_sections=len(new_sections),
+    )
+
+
+def refresh_meeting_digest(
+    old_transcript: str, new_transcript: str, meeting_digest: MeetingDigest | None
+) -> DigestRefresh:
+    """
+    Bring the digest of ``old_transcript`` up to date with ``new_transcript``.
+
+    Only the changed and appended sections are sent to the model and merged into the existing digest, unless there
+    is no digest yet or more than ``INCREMENTAL_SUMMARY_MAX_CHANGED_FRACTION`` of the transcript changed, in which
+    case the digest is rebuilt from scratch.
+    """
+    changes = diff_transcript_sections(old_transcript, new_transcript)
+    if meeting_digest is not None and not changes.removed and not changes.added:
+        return DigestRefresh(meeting_digest, "unchanged", changes)
+
+    changed_tokens = count_tokens("\n".join(changes.removed + changes.added), SUMMARY_MODEL_NAME)
+    if (
+        meeting_digest is None
+        or changes.changed_fraction > settings.INCREMENTAL_SUMMARY_MAX_CHANGED_FRACTION
+        or changed_tokens > settings.SUMMARY_SINGLE_PASS_MAX_TOKENS
+    ):
+        return DigestRefresh(get_meeting_digest(new_transcript), "full", changes)
+
+    logger.info(
+        f"Merging {len(changes.removed)} removed and {len(changes.added)} added sections of "
+        f"{changes.total_sections} into the meeting digest"
+    )
+    updated = MeetingDigest.model_validate(get_digest_update_chain().invoke({
+        "MeetingDigest": meeting_digest.model_dump_json(),
+        "Removed": "\n\n".join(changes.removed) or "None",
+        "Added": "\n\n".join(changes.added) or "None",
+    }))
+    summary_cache.put(
+        _meeting_digest_cache_key(new_transcript), updated.model_dump_json(), SummaryCacheKindEnum.DIGEST
+    )
+    return DigestRefresh(updated, "incremental", changes)
+
+
+def summary_cache_key(meeting_digest: str, prompt_inputs: dict) -> str:
+    """
+    Key a summary by everything that shapes it: the meeting digest, the rendered employee/project context, the
+    prompt template version and the model. A changed profile therefore misses the cache instead of serving a stale
+    summary.
+    """
+    digest_hash = hashlib.sha256(meeting_digest.encode("utf-8")).hexdigest()
+    context_hash = hashlib.sha256(json.dumps(prompt_inputs, sort_keys=True, default=str).encode("utf-8")).hexdigest()
+    return cache_key(digest_hash, context_hash, SUMMARY_PROMPT_VERSION, SUMMARY_MODEL_NAME)
+
+
+def summarize_meeting_for_employee(meeting_digest: str, employee: dict, use_cache: bool = True) -> str:
+    """
+    Return the personalized summary of a meeting digest for an employee profile, from the summary cache when
+    available.
+
+    With ``use_cache=False`` a fresh summary is always generated (and replaces the cached one).
+    """
+    prompt_inputs = employee_prompt_inputs(employee)
+    key = summary_cache_key(meeting_digest, prompt_inputs)
+    if use_cache and (cached := summary_cache.get(key, SummaryCacheKindEnum.SUMMARY)) is not None:
+        return cached
+
+    personalized_summary = generate_employee_summary(meeting_digest=meeting_digest, data=employee)
+    summary_cache.put(key, personalized_summary, SummaryCacheKindEnum.SUMMARY)
+    return personalized_summary
+
+
+def summarize_meeting_for_user(meeting_digest: str, user_id: int, use_cache: bool = True) -> str:
+    """Like ``summarize_meeting_for_employee``, for the employee profile of a user"""
     user_email = get_email_by_user_id(user_id)[0]
-    data = get_employee_details(employee_email=user_email)
+    employee = get_employee_details(employee_email=user_email)
+    return summarize_meeting_for_employee(meeting_digest=meeting_digest, employee=employee, use_cache=use_cache)
 
-    template = """
-        You are an advanced assistant designed to generate personalized summaries for employees based on their role, ongoing tasks, projects, and meeting discussions.
-        Based on the designation refine the most important points that refine 80 percent essence of the conversation refined to the
-        designation and what they will need as takeaways from the meeting.  It must be personally customized for the employee and include the other most important parts as well
 
-    Employee Details:
-    - Name: {EmployeeName}
-    - Email: {Email}
-    - Job Level: {JobLevel}
-    - Role Type: {RoleType}
-    - Department ID: {DepartmentID}
-    - Supervisor ID: {SupervisorID}
-    - Current Project ID: {CurrentProjectID}
+async def run_transcription_pipeline(
+    transcription_id: int, audio_file_path: str, user_id: int, audio_sha256: str | None = None,
+    on_stage: StageCallback = _noop_stage_callback
+) -> str:
+    """
+    Run the full transcription pipeline for an uploaded recording and store the result.
 
-    Assigned Projects:
-    {ProjectDetails}
+    Args:
+        transcription_id: Transcription record the output is stored against
+        audio_file_path: Local path of the uploaded recording
+        user_id: User the personalized summary is generated for
+        audio_sha256: Content hash of the recording, computed from the file when not given
+        on_stage: Awaitable callback invoked whenever a stage starts, completes, fails or is served from cache
 
-    Meeting Transcript:
-    {Transcript}
+    Returns:
+        The personalized summary
+    """
+    if audio_sha256 is None:
+        audio_sha256 = await run_in_threadpool(hash_file, audio_file_path)
+    decoded = DecodedAudio(audio_file_path, audio_sha256, on_stage)
+    try:
+        aligned_segments = await transcribe_and_diarize(audio_file_path, audio_sha256, on_stage, decoded)
+        if settings.STORE_SOURCE_AUDIO_AS_OPUS and not audio_file_path.endswith(".opus"):
+            audio_file_path = await run_in_threadpool(compact_source_audio, audio_file_path, await decoded.get())
+            audio_sha256 = None
+    finally:
+        decoded.cleanup()
+
+    # Save diarized transcription to a file
+    diarized_text = format_aligned_segments(aligned_segments)
+    transcript_file_path = await write_transcription_to_file(diarized_text, str(transcription_id))
+    archive_to_s3(
+        transcription_id, audio_file_path=audio_file_path, transcript_file_path=transcript_file_path,
+        audio_sha256=audio_sha256
+    )
+    await run_in_threadpool(write_segment_store, transcription_id, aligned_segments)
+
+    await on_stage(TranscriptionStage.DIGEST, StageStatusEnum.RUNNING)
+    try:
+        meeting_digest = await run_in_threadpool(get_meeting_digest, diarized_text)
+    except Exception:
+        await on_stage(TranscriptionStage.DIGEST, StageStatusEnum.FAILED)
+        raise
+    await on_stage(TranscriptionStage.DIGEST, StageStatusEnum.COMPLETED)
+
+    await on_stage(TranscriptionStage.SUMMARY, StageStatusEnum.RUNNING)
+    try:
+        personalized_summary = await run_in_threadpool(
+            summarize_meeting_for_user, meeting_digest=format_meeting_digest(meeting_digest), user_id=user_id
+        )
+    except Exception:
+        await on_stage(TranscriptionStage.SUMMARY, StageStatusEnum.FAILED)
+        raise
+    await on_stage(TranscriptionStage.SUMMARY, StageStatusEnum.COMPLETED)
+
+    await run_in_threadpool(
+        update_transcription_text, transcription_id=transcription_id, transcription_text=diarized_text,
+        personalized_summary=personalized_summary, meeting_digest=meeting_digest.model_dump_json()
+    )
+    return personalized_summary
+
+
+async def update_transcript(
+    transcription_id: int, user_id: int, transcription_text: str, append: bool = False
+) -> TranscriptUpdateResponse:
+    """
+    Replace (or append to) the text of a stored transcription and bring its digest and summaries up to date.
+
+    The digest is refreshed incrementally from the changed sections where possible (see ``refresh_meeting_digest``),
+    then the owner's summary and any stored attendee summaries are regenerated from it.
+
+    Args:
+        transcription_id: Transcription to update, owned by ``user_id``
+        user_id: User updating the transcription
+        transcription_text: Corrected transcript, or the next part of the meeting when ``append`` is set
+        append: Append ``transcription_text`` to the stored transcript instead of replacing it
+    """
+    transcription = await run_in_threadpool(get_transcription_by_id, transcription_id)
+    if transcription is None or transcription.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Transcription {transcription_id} not found"
+        )
+    old_text = transcription.transcription_text or ""
+    new_text = "\n".join(part for part in (old_text, transcription_text) if part) if append else transcription_text
+    stored_digest = await run_in_threadpool(get_meeting_digest_json, transcription_id)
+    stored_digest = MeetingDigest.model_validate_json(stored_digest) if stored_digest else None
+
+    refresh = await run_in_threadpool(refresh_meeting_digest, old_text, new_text, stored_digest)
+    response = TranscriptUpdateResponse(
+        transcription_id=transcription_id, personalized_summary=transcription.personalized_summary,
+        mode=refresh.mode, changed_sections=max(len(refresh.changes.removed), len(refresh.changes.added)),
+        total_sections=refresh.changes.total_sections,
+    )
+    if refresh.mode == "unchanged" and transcription.personalized_summary:
+        return response
+
+    transcript_file_path = await write_transcription_to_file(new_text, str(transcription_id))
+    archive_to_s3(transcription_id, transcript_file_path=transcript_file_path)
+    await run_in_threadpool(write_segment_store, transcription_id, parse_aligned_segments(new_text))
+    response.personalized_summary = await run_in_threadpool(
+        summarize_meeting_for_user, meeting_digest=format_meeting_digest(refresh.meeting_digest), user_id=user_id
+    )
+    await run_in_threadpool(
+        update_transcription_text, transcription_id=transcription_id, transcription_text=new_text,
+        personalized_summary=response.personalized_summary, meeting_digest=refresh.meeting_digest.model_dump_json()
+    )
+
+    attendee_emails = [summary.attendee_email for summary in await run_in_threadpool(
+        get_transcription_summaries, transcription_id
+    )]
+    if attendee_emails:
+        await generate_attendee_summaries(
+            transcription_id=transcription_id, attendee_emails=attendee_emails, user_id=user_id
+        )
+    return response
+
+
+async def get_transcript_segments(
+    transcription_id: int, user_id: int, start: float | None = None, end: float | None = None,
+    speaker: str | None = None, limit: int | None = None
+) -> TranscriptSegmentsResponse:
+    """
+    Return the segments of a transcription overlapping a time range and/or spoken by one speaker, read from the
+    segment store instead of the full transcript. Transcriptions stored before the segment store existed are
+    backfilled from their text on first access.
+    """
+    if await run_in_threadpool(get_transcription_owner, transcription_id) != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Transcription {transcription_id} not found"
+        )
+    store = segment_store_for(transcription_id)
+    if not store.exists():
+        transcription = await run_in_threadpool(get_transcription_by_id, transcription_id)
+        store = await run_in_threadpool(
+            write_segment_store, transcription_id, parse_aligned_segments(transcription.transcription_text or "")
+        )
+
+    speakers, segments = await run_in_threadpool(store.read, start=start, end=end, speaker=speaker, limit=limit)
+    return TranscriptSegmentsResponse(
+        transcription_id=transcription_id, speakers=speakers,
+        segments=[TranscriptSegment(**segment._asdict()) for segment in segments],
+    )
+
+
+async def get_transcription_digest(transcription_id: int, user_id: int) -> MeetingDigest:
+    transcription = await run_in_threadpool(get_transcription_by_id, transcription_id)
+    if transcription is None or transcription.user_id != user_id or not transcription.transcription_text:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Transcription {transcription_id} not found"
+        )
+    return await load_meeting_digest(transcription)
+
+
+async def resummarize_transcription(transcription_id: int, user_id: int) -> str:
+    """
+    Regenerate the personalized summary of a stored transcription without touching the audio models. The stored
+    meeting digest is reused.
+    """
+    transcription = await run_in_threadpool(get_transcription_by_id, transcription_id)
+    if transcription is None or transcription.user_id != user_id or not transcription.transcription_text:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Transcription {transcription_id} not found"
+        )
+
+    meeting_digest = format_meeting_digest(await load_meeting_digest(transcription))
+    personalized_summary = await run_in_threadpool(
+        summarize_meeting_for_user, meeting_digest=meeting_digest, user_id=user_id, use_cache=False
+    )
+    await run_in_threadpool(
+        update_personalized_summary, transcription_id=transcription_id, personalized_summary=personalized_summary
+    )
+    return personalized_summary
+
+
+async def generate_attendee_summaries(
+    transcription_id: int, attendee_emails: list[str], user_id: int,
+    concurrency: int = settings.SUMMARY_FANOUT_CONCURRENCY
+) -> AttendeeSummariesResponse:
+    """
+    Generate and store a personalized summary of one meeting for every attendee.
+
+    All attendee profiles are fetched with a single query and the meeting digest is loaded (or generated) once,
+    then at most ``concurrency`` summaries are generated from it at a time. An attendee without a profile, or whose
+    summary fails, is reported with an error without failing the others.
+
+    Args:
+        transcription_id: Transcription of the meeting, owned by ``user_id``
+        attendee_emails: Emails of the attendees to summarize for
+        user_id: User requesting the summaries
+        concurrency: Maximum number of summaries generated at once
+
+    Returns:
+        One entry per distinct attendee email, in request order
+    """
+    transcription = await run_in_threadpool(get_transcription_by_id, transcription_id)
+    if transcription is None or transcription.user_id != user_id or not transcription.transcription_text:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Transcription {transcription_id} not found"
+        )
+
+    emails = list(dict.fromkeys(email.strip().lower() for email in attendee_emails))
+    profiles = await run_in_threadpool(get_employees_details, emails)
+    # Only the shared digest reads the transcript, every attendee's summary is generated from the digest
+    meeting_digest = format_meeting_digest(await load_meeting_digest(transcription))
+    semaphore = asyncio.Semaphore(concurrency)
+
+    async def summarize(email: str) -> AttendeeSummary:
+        employee = profiles.get(email)
+        if employee is None:
+            return AttendeeSummary(email=email, error="No employee profile found")
+        async with semaphore:
+            try:
+                personalized_summary = await run_in_threadpool(
+                    summarize_meeting_for_employee, meeting_digest=meeting_digest, employee=employee
+                )
+            except Exception as e:
+                logger.error(f"Failed to summarize transcription {transcription_id} for {email}: {e}")
+                return AttendeeSummary(email=email, error="Failed to generate summary")
+        await run_in_threadpool(
+            upsert_transcription_summary, transcription_id=transcription_id, attendee_email=email,
+            personalized_summary=personalized_summary
+        )
+        return AttendeeSummary(email=email, personalized_summary=personalized_summary)
+
+    summaries = await asyncio.gather(*(summarize(email) for email in emails))
+    return AttendeeSummariesResponse(transcription_id=transcription_id, summaries=summaries)
+
+
+def archive_to_s3(
+    transcription_id: int, audio_file_path: str | None = None, transcript_file_path: str | None = None,
+    audio_sha256: str | None = None
+):
+    """Queue background uploads of a transcription's source audio and/or transcript, off the request path"""
+    if not settings.S3_BACKGROUND_UPLOADS:
+        return
+    service = get_s3_transfer_service()
+    if audio_file_path is not None:
+        service.submit(audio_file_path, audio_s3_key(transcription_id, audio_file_path), sha256=audio_sha256)
+    if transcript_file_path is not None:
+        service.submit(
+            transcript_file_path, transcript_s3_key(transcription_id), content_type="text/plain; charset=utf-8"
+        )
+
+
+# Laid out for provider prefix caching: everything up to and including the meeting digest is identical for all
+# attendees of a meeting, the per-employee details come last
+PERSONALIZED_SUMMARY_TEMPLATE = """
+        You are an advanced assistant designed to generate personalized summaries for employees based on their role, ongoing tasks, projects, and meeting discussions.
+        Based on the designation refine the most important points that refine 80 percent essence of the conversation refined to the
+        designation and what they will need as takeaways from the meeting.  It must be personally customized for the employee and include the other most important parts as well
 
     Output Guidelines
     - Format the summary with clear headings, bullet points, and concise language.
@@ -88,8 +789,27 @@ def generate_personalized_summary(transcription_path: str, user_id: int):
 
     Use this structured approach for generating comprehensive, personalized summaries.
 
+    Meeting Digest:
+    {MeetingDigest}
+
+    Employee Details:
+    - Name: {EmployeeName}
+    - Email: {Email}
+    - Job Level: {JobLevel}
+    - Role Type: {RoleType}
+    - Department ID: {DepartmentID}
+    - Supervisor ID: {SupervisorID}
+    - Current Project ID: {CurrentProjectID}
+
+    Assigned Projects:
+    {ProjectDetails}
+
     Generate a summary tailored to the employee's role and responsibilities. Use note-taking format (headings, bullet points, and concise sentences) and limit the summary to 200 words.
     """
+
+
+def employee_prompt_inputs(data: dict) -> dict[str, str]:
+    """Render an employee profile from ``get_employees_details`` into the summary prompt's employee variables"""
     project_details = "\n".join(
         f"- Project ID: {project['ProjectID']}, Name: {project['ProjectName']}, "
         f"Description: {project['ProjectDescription']}, Status: {project['ProjectStatus']}, "
@@ -98,32 +818,187 @@ def generate_personalized_summary(transcription_path: str, user_id: int):
         for project in data["Projects"]
     ) if data["Projects"] else "No projects assigned."
 
+    return {
+        "EmployeeName": str(data["EmployeeName"]),
+        "Email": str(data["Email"]),
+        "JobLevel": str(data["JobLevel"]),
+        "RoleType": str(data["RoleType"]),
+        "DepartmentID": str(data["DepartmentID"]),
+        "SupervisorID": str(data["SupervisorID"]),
+        "CurrentProjectID": str(data["CurrentProjectID"]),
+        "ProjectDetails": project_details,
+    }
+
+
+@lru_cache(maxsize=1)
+def get_summary_chain():
+    """Build the summary prompt, LLM client and chain once and reuse them for every summary"""
+    from langchain.chains.llm import LLMChain
+    from langchain_openai import ChatOpenAI
+
     prompt = PromptTemplate(
         input_variables=["EmployeeName", "Email", "JobLevel", "RoleType", "DepartmentID", "SupervisorID",
-                         "CurrentProjectID", "ProjectDetails", "Transcript"],
-        template=template
+                         "CurrentProjectID", "ProjectDetails", "MeetingDigest"],
+        template=PERSONALIZED_SUMMARY_TEMPLATE
     )
     # Initialize the LLM with LangChain
     llm = ChatOpenAI(
         openai_api_key=settings.OPENAI_API_KEY,
-        model="gpt-4",
+        model=SUMMARY_MODEL_NAME,
         temperature=0.7,
+        callbacks=usage_callbacks("personalized_summary"),
     )
+    return LLMChain(llm=llm, prompt=prompt)
 
-    with open(transcription_path, "r") as f:
-        transcript = f.read()
 
-    chain = LLMChain(llm=llm, prompt=prompt)
-    response = chain.run({
-        "EmployeeName": data["EmployeeName"],
-        "Email": data["Email"],
-        "JobLevel": data["JobLevel"],
-        "RoleType": data["RoleType"],
-        "DepartmentID": data["DepartmentID"],
-        "SupervisorID": data["SupervisorID"],
-        "CurrentProjectID": data["CurrentProjectID"],
-        "ProjectDetails": project_details,
-        "Transcript": transcript
-    })
+CHUNK_NOTES_TEMPLATE = """
+    You are taking notes on part {Part} of {Parts} of a meeting transcript. These notes replace the transcript when
+    the meeting is summarized later, so keep every decision, action item (with its owner and due date), blocker and
+    open question, and the main points of each speaker. Keep the speaker labels and timestamps. Be concise and do
+    not add anything that is not in the transcript.
+
+    Transcript part {Part} of {Parts}:
+    {Transcript}
+    """
+
+
+@lru_cache(maxsize=1)
+def get_chunk_notes_chain():
+    from langchain_core.output_parsers import StrOutputParser
+    from langchain_openai import ChatOpenAI
+
+    prompt = PromptTemplate(input_variables=["Part", "Parts", "Transcript"], template=CHUNK_NOTES_TEMPLATE)
+    llm = ChatOpenAI(
+        openai_api_key=settings.OPENAI_API_KEY, model=SUMMARY_MODEL_NAME, temperature=0,
+        callbacks=usage_callbacks("transcript_chunk_notes"),
+    )
+    return prompt | llm | StrOutputParser()
+
+
+def summarize_transcript_chunks(transcript: str) -> str:
+    """
+    Map step of map-reduce summarization: split the transcript on speaker turns into chunks of
+    ``SUMMARY_CHUNK_TOKENS`` and take notes on all chunks in parallel. Chunk notes are cached, so re-digesting
+    the same meeting does not take them again.
+    """
+    chunks = split_transcript(transcript, settings.SUMMARY_CHUNK_TOKENS, SUMMARY_MODEL_NAME)
+    keys = [
+        cache_key(hashlib.sha256(chunk.encode("utf-8")).hexdigest(), part, len(chunks), CHUNK_NOTES_PROMPT_VERSION,
+                  SUMMARY_MODEL_NAME)
+        for part, chunk in enumerate(chunks, start=1)
+    ]
+    notes = [summary_cache.get(key, SummaryCacheKindEnum.CHUNK_NOTES) for key in keys]
+    missing = [i for i, note in enumerate(notes) if note is None]
+    if missing:
+        logger.info(f"Taking notes on {len(missing)} of {len(chunks)} transcript chunks")
+        generated = get_chunk_notes_chain().batch(
+            [{"Part": i + 1, "Parts": len(chunks), "Transcript": chunks[i]} for i in missing],
+            config={"max_concurrency": settings.SUMMARY_MAP_CONCURRENCY},
+        )
+        for i, note in zip(missing, generated):
+            notes[i] = note.strip()
+            summary_cache.put(keys[i], notes[i], SummaryCacheKindEnum.CHUNK_NOTES)
+    return "\n\n".join(f"Notes on part {part} of {len(chunks)}:\n{note}" for part, note in enumerate(notes, start=1))
+
+
+def condense_transcript(transcript: str, max_rounds: int = 3) -> str:
+    """
+    Return the transcript itself if it fits ``SUMMARY_SINGLE_PASS_MAX_TOKENS``, otherwise notes on it from
+    ``summarize_transcript_chunks``, repeated on the notes until they fit (at most ``max_rounds`` times).
+    """
+    text = transcript
+    for _ in range(max_rounds):
+        tokens = count_tokens(text, SUMMARY_MODEL_NAME)
+        if tokens <= settings.SUMMARY_SINGLE_PASS_MAX_TOKENS:
+            break
+        logger.info(f"Transcript has {tokens} tokens, summarizing it with map-reduce")
+        text = summarize_transcript_chunks(text)
+    return text
+
+
+MEETING_DIGEST_TEMPLATE = """
+    You are preparing a shared digest of a meeting that will be used to write personalized summaries for every
+    attendee. Extract from the transcript below:
+    - overview: two or three sentences on the purpose and outcome of the meeting
+    - decisions: every decision that was made
+    - action_items: every task that was assigned or volunteered for, with its owner and due date (null if none)
+    - blockers: every blocker, risk or open question that was raised
+    - speaker_highlights: for each speaker, the main points they made
 
+    Use the names or speaker labels from the transcript and do not add anything that is not in it.
+
+    Return only JSON in this format, with no preamble or explanation:
+    {{"overview": "...", "decisions": ["..."], "action_items": [{{"owner": "...", "task": "...", "due": null}}],
+    "blockers": ["..."], "speaker_highlights": [{{"speaker": "...", "highlights": ["..."]}}]}}
+
+    Meeting Transcript:
+    {Transcript}
+    """
+
+
+@lru_cache(maxsize=1)
+def get_digest_chain():
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_openai import ChatOpenAI
+
+    prompt = PromptTemplate(input_variables=["Transcript"], template=MEETING_DIGEST_TEMPLATE)
+    llm = ChatOpenAI(
+        openai_api_key=settings.OPENAI_API_KEY, model=SUMMARY_MODEL_NAME, temperature=0,
+        callbacks=usage_callbacks("meeting_digest"),
+    )
+    return prompt | llm | JsonOutputParser()
+
+
+MEETING_DIGEST_UPDATE_TEMPLATE = """
+    You maintain the digest of a meeting, a JSON object with the keys overview, decisions, action_items (owner,
+    task, due), blockers and speaker_highlights (speaker, highlights). The meeting transcript was edited or extended:
+    some sections were removed or replaced and new sections were added. Update the digest so it reflects the
+    transcript after the change. Drop anything that came only from the removed sections, add what the added sections
+    contain, and keep everything else as it is.
+
+    Return only the updated digest as JSON in the same format, with no preamble or explanation.
+
+    Current Digest:
+    {MeetingDigest}
+
+    Removed Sections:
+    {Removed}
+
+    Added Sections:
+    {Added}
+    """
+
+
+@lru_cache(maxsize=1)
+def get_digest_update_chain():
+    from langchain_core.output_parsers import JsonOutputParser
+    from langchain_openai import ChatOpenAI
+
+    prompt = PromptTemplate(
+        input_variables=["MeetingDigest", "Removed", "Added"], template=MEETING_DIGEST_UPDATE_TEMPLATE
+    )
+    llm = ChatOpenAI(
+        openai_api_key=settings.OPENAI_API_KEY, model=SUMMARY_MODEL_NAME, temperature=0,
+        callbacks=usage_callbacks("meeting_digest_update"),
+    )
+    return prompt | llm | JsonOutputParser()
+
+
+def generate_meeting_digest(transcript: str) -> MeetingDigest:
+    """Extract the structured digest of a transcript, condensing it with map-reduce first if it is too long"""
+    return MeetingDigest.model_validate(get_digest_chain().invoke({"Transcript": condense_transcript(transcript)}))
+
+
+def generate_employee_summary(meeting_digest: str, data: dict) -> str:
+    """
+    Generate the personalized summary of a meeting for an employee profile from ``get_employees_details``.
+
+    Args:
+        meeting_digest: Meeting digest rendered by ``format_meeting_digest``
+        data: Employee profile
+
+    Returns:
+        The personalized summary
+    """
+    response = get_summary_chain().run(employee_prompt_inputs(data) | {"MeetingDigest": meeting_digest})
     return response.strip()
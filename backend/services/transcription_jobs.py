@@ -0,0 +1,215 @@
+import asyncio
+import logging
+import os
+import socket
+import uuid
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from backend.config import settings
+from backend.database.transcription_jobs import (
+    TranscriptionJobModel, TranscriptionStage, StageStatusEnum, claim_next_transcription_job,
+    heartbeat_transcription_job, update_transcription_job_stage, complete_transcription_job,
+    fail_transcription_job, enqueue_transcription_job,
+)
+from backend.services.s3_transfer import S3UploadError, get_s3_transfer_service, audio_s3_key
+from backend.services.transcribe import run_transcription_pipeline
+from backend.utils import StoredAudio, audio_file_path
+
+logger = logging.getLogger(__name__)
+
+# Worker pools running in this process, woken up when a job is queued here instead of waiting for their next poll
+_worker_pools: list["TranscriptionJobWorkerPool"] = []
+
+
+class LeaseLostError(Exception):
+    pass
+
+
+def stage_job_audio(transcription_id: int, stored_audio: StoredAudio) -> str:
+    """
+    Upload a recording to S3 and return its key. Blocks until S3 has acknowledged it, so whichever node claims the
+    job can fetch the audio.
+    """
+    key = audio_s3_key(transcription_id, stored_audio.path)
+    get_s3_transfer_service().upload_file(stored_audio.path, key, sha256=stored_audio.sha256)
+    return key
+
+
+def fetch_job_audio(job: TranscriptionJobModel) -> str:
+    """
+    Local path of a job's recording: the upload itself on the node that received it, otherwise a copy downloaded
+    from S3 (and checked against the SHA-256 recorded at upload)
+    """
+    file_path = audio_file_path(str(job.transcription_id))
+    if os.path.exists(file_path):
+        return file_path
+    return get_s3_transfer_service().download_file(job.audio_s3_key, file_path, sha256=job.audio_sha256)
+
+
+async def queue_transcription_job(
+    transcription_id: int, user_id: int, stored_audio: StoredAudio
+) -> TranscriptionJobModel:
+    """Stage a stored upload in S3 and queue it for transcription"""
+    try:
+        key = await run_in_threadpool(stage_job_audio, transcription_id, stored_audio)
+    except S3UploadError as e:
+        logger.error(f"Could not stage the audio of transcription {transcription_id}: {e}")
+        raise HTTPException(
+            status_code=status.HTTP_503_SERVICE_UNAVAILABLE, detail="Audio storage is unavailable, please retry"
+        )
+    job = await run_in_threadpool(
+        enqueue_transcription_job, transcription_id=transcription_id, user_id=user_id, audio_s3_key=key,
+        audio_sha256=stored_audio.sha256
+    )
+    for pool in _worker_pools:
+        pool.notify()
+    return job
+
+
+class TranscriptionJobWorkerPool:
+    """
+    Drains the transcription job queue with a fixed number of concurrent workers.
+
+    Each claimed job holds a lease in the database that is renewed by a heartbeat while the pipeline runs. If the
+    process dies, the lease expires and any backend node polling the same queue picks the job up again. If the
+    heartbeat finds the lease was taken over, processing of the job is abandoned.
+
+    An idle worker doubles its poll interval after every empty poll, from ``poll_seconds`` up to
+    ``max_poll_seconds``, so idle nodes do not keep a billed warehouse busy. Jobs queued by this process wake the
+    workers immediately; jobs queued on other nodes are picked up within ``max_poll_seconds``.
+    """
+
+    def __init__(
+        self,
+        concurrency: int = settings.TRANSCRIPTION_JOB_WORKERS,
+        lease_seconds: int = settings.TRANSCRIPTION_JOB_LEASE_SECONDS,
+        heartbeat_seconds: int = settings.TRANSCRIPTION_JOB_HEARTBEAT_SECONDS,
+        poll_seconds: float = settings.TRANSCRIPTION_JOB_POLL_SECONDS,
+        max_poll_seconds: float = settings.TRANSCRIPTION_JOB_MAX_POLL_SECONDS,
+        max_attempts: int = settings.TRANSCRIPTION_JOB_MAX_ATTEMPTS,
+    ):
+        self.concurrency = concurrency
+        self.lease_seconds = lease_seconds
+        self.heartbeat_seconds = heartbeat_seconds
+        self.poll_seconds = poll_seconds
+        self.max_poll_seconds = max(max_poll_seconds, poll_seconds)
+        self.max_attempts = max_attempts
+        self.worker_id = f"{socket.gethostname()}:{os.getpid()}:{uuid.uuid4().hex[:8]}"
+
+        self._stopping = asyncio.Event()
+        self._wakeup = asyncio.Event()
+        self._tasks: list[asyncio.Task] = []
+
+    async def start(self):
+        logger.info(f"Starting {self.concurrency} transcription job workers as {self.worker_id}")
+        self._stopping.clear()
+        _worker_pools.append(self)
+        self._tasks = [
+            asyncio.create_task(self._worker_loop(slot), name=f"transcription-worker-{slot}")
+            for slot in range(self.concurrency)
+        ]
+
+    async def stop(self):
+        if self in _worker_pools:
+            _worker_pools.remove(self)
+        self._stopping.set()
+        self._wakeup.set()
+        for task in self._tasks:
+            task.cancel()
+        await asyncio.gather(*self._tasks, return_exceptions=True)
+        self._tasks = []
+
+    def notify(self):
+        """Poll the queue now, a job was just queued"""
+        self._wakeup.set()
+
+    async def _worker_loop(self, slot: int):
+        idle_seconds = self.poll_seconds
+        while not self._stopping.is_set():
+            self._wakeup.clear()
+            try:
+                job = await run_in_threadpool(
+                    claim_next_transcription_job, worker_id=self.worker_id, lease_seconds=self.lease_seconds,
+                    max_attempts=self.max_attempts
+                )
+            except Exception as e:
+                logger.error(f"[worker {slot}] Failed to poll transcription job queue: {e}")
+                job = None
+
+            if job is None:
+                try:
+                    await asyncio.wait_for(self._wakeup.wait(), timeout=idle_seconds)
+                except asyncio.TimeoutError:
+                    idle_seconds = min(idle_seconds * 2, self.max_poll_seconds)
+                else:
+                    idle_seconds = self.poll_seconds
+                continue
+
+            idle_seconds = self.poll_seconds
+
+            logger.info(f"[worker {slot}] Claimed transcription job {job.id} (attempt {job.attempts})")
+            await self._process(job)
+
+    async def _heartbeat(self, job_id: int):
+        while True:
+            await asyncio.sleep(self.heartbeat_seconds)
+            try:
+                renewed = await run_in_threadpool(
+                    heartbeat_transcription_job, job_id=job_id, worker_id=self.worker_id,
+                    lease_seconds=self.lease_seconds
+                )
+            except Exception as e:
+                # Transient database errors are retried on the next beat; the lease outlives several beats
+                logger.warning(f"Heartbeat for transcription job {job_id} failed: {e}")
+                continue
+            if not renewed:
+                raise LeaseLostError(f"Lease on transcription job {job_id} was lost")
+
+    async def _process(self, job: TranscriptionJobModel):
+        # Stage updates of one job are written one at a time; the conditional update in
+        # ``update_transcription_job_stage`` also keeps them from racing with other nodes
+        stage_lock = asyncio.Lock()
+
+        async def on_stage(stage: TranscriptionStage, status: StageStatusEnum):
+            async with stage_lock:
+                await run_in_threadpool(
+                    update_transcription_job_stage, job_id=job.id, worker_id=self.worker_id, stage=stage,
+                    status=status
+                )
+
+        async def transcribe():
+            local_audio_path = await run_in_threadpool(fetch_job_audio, job)
+            return await run_transcription_pipeline(
+                transcription_id=job.transcription_id, audio_file_path=local_audio_path, user_id=job.user_id,
+                audio_sha256=job.audio_sha256, on_stage=on_stage,
+            )
+
+        pipeline = asyncio.create_task(transcribe())
+        heartbeat = asyncio.create_task(self._heartbeat(job.id))
+        try:
+            done, _ = await asyncio.wait({pipeline, heartbeat}, return_when=asyncio.FIRST_COMPLETED)
+            if heartbeat in done:
+                pipeline.cancel()
+                heartbeat.result()
+            pipeline.result()
+        except LeaseLostError as e:
+            logger.warning(str(e))
+            return
+        except asyncio.CancelledError:
+            # Shutting down; the lease will expire and another worker will resume the job
+            pipeline.cancel()
+            raise
+        except Exception as e:
+            logger.error(f"Transcription job {job.id} failed: {e}", exc_info=True)
+            await run_in_threadpool(
+                fail_transcription_job, job_id=job.id, worker_id=self.worker_id, error=str(e),
+                max_attempts=self.max_attempts
+            )
+            return
+        finally:
+            heartbeat.cancel()
+
+        await run_in_threadpool(complete_transcription_job, job_id=job.id, worker_id=self.worker_id)
+        logger.info(f"Transcription job {job.id} completed")
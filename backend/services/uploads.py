@@ -0,0 +1,200 @@
+import asyncio
+import json
+import logging
+import os
+import time
+import uuid
+from datetime import datetime
+from typing import AsyncIterator
+
+from fastapi import HTTPException, status
+from fastapi.concurrency import run_in_threadpool
+
+from backend.config import settings
+from backend.database.transcription_jobs import TranscriptionJobModel, get_transcription_job_by_id
+from backend.database.transcriptions import create_transcription_record, delete_transcription_record
+from backend.services.transcription_jobs import queue_transcription_job
+from backend.utils import UPLOADS_RESOURCES_PATH, StoredAudio, audio_file_path, hash_file, write_stream_to_file
+
+logger = logging.getLogger(__name__)
+
+# Serializes appending to and completing the same upload within this process. An entry is dropped once its upload
+# is completed or abandoned.
+_upload_locks: dict[str, asyncio.Lock] = {}
+
+
+def _upload_lock(upload_id: str) -> asyncio.Lock:
+    return _upload_locks.setdefault(upload_id, asyncio.Lock())
+
+
+def discard_upload_lock(upload_id: str):
+    _upload_locks.pop(upload_id, None)
+
+
+def _part_path(upload_id: str) -> str:
+    return os.path.join(UPLOADS_RESOURCES_PATH, f"{upload_id}.part")
+
+
+def _meta_path(upload_id: str) -> str:
+    return os.path.join(UPLOADS_RESOURCES_PATH, f"{upload_id}.json")
+
+
+def _write_metadata(metadata: dict):
+    tmp_path = _meta_path(metadata["upload_id"]) + ".tmp"
+    with open(tmp_path, "w") as f:
+        json.dump(metadata, f)
+    os.replace(tmp_path, _meta_path(metadata["upload_id"]))
+
+
+def _current_offset(upload_id: str) -> int:
+    part_path = _part_path(upload_id)
+    return os.path.getsize(part_path) if os.path.exists(part_path) else 0
+
+
+def create_upload_session(user_id: int, total_size: int, sha256: str | None = None) -> dict:
+    """
+    Start a resumable upload. The upload's offset is the size of its partial file on disk.
+    """
+    if total_size > settings.MAX_AUDIO_UPLOAD_BYTES:
+        raise HTTPException(
+            status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+            detail=f"Upload exceeds the maximum size of {settings.MAX_AUDIO_UPLOAD_BYTES} bytes",
+        )
+    upload_id = uuid.uuid4().hex
+    metadata = {
+        "upload_id": upload_id, "user_id": user_id, "total_size": total_size, "sha256": sha256,
+        "created_at": datetime.utcnow().isoformat(),
+    }
+    _write_metadata(metadata)
+    open(_part_path(upload_id), "wb").close()
+    return metadata | {"offset": 0}
+
+
+def get_upload_session(upload_id: str, user_id: int) -> dict:
+    try:
+        with open(_meta_path(upload_id), "r") as f:
+            metadata = json.load(f)
+    except FileNotFoundError:
+        metadata = None
+    if metadata is None or metadata["user_id"] != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Upload {upload_id} not found")
+    if metadata.get("job_id") is not None:
+        # Completed: the bytes have moved to the source audio directory
+        return metadata | {"offset": metadata["total_size"]}
+    return metadata | {"offset": _current_offset(upload_id)}
+
+
+async def append_upload_chunk(upload_id: str, user_id: int, offset: int, chunks: AsyncIterator[bytes]) -> dict:
+    """
+    Append a chunk to a resumable upload, streaming it to disk.
+
+    The client sends the offset it believes the upload is at; if it does not match the bytes on disk the request is
+    rejected with 409 so the client can re-sync (GET the upload) and resume from the server's offset.
+    """
+    async with _upload_lock(upload_id):
+        metadata = get_upload_session(upload_id, user_id)
+        if metadata.get("job_id") is not None:
+            raise HTTPException(status_code=status.HTTP_409_CONFLICT, detail=f"Upload {upload_id} is already complete")
+        current_offset = _current_offset(upload_id)
+        if offset != current_offset:
+            raise HTTPException(
+                status_code=status.HTTP_409_CONFLICT,
+                detail=f"Upload offset mismatch: expected {current_offset}, got {offset}",
+            )
+        new_offset = await write_stream_to_file(
+            chunks, _part_path(upload_id), max_bytes=metadata["total_size"], append=True
+        )
+    return metadata | {"offset": new_offset}
+
+
+def verify_upload_complete(upload_id: str, user_id: int) -> dict:
+    """
+    Check that every byte of the upload has been received and that it matches the checksum declared at creation.
+    """
+    metadata = get_upload_session(upload_id, user_id)
+    if metadata["offset"] != metadata["total_size"]:
+        raise HTTPException(
+            status_code=status.HTTP_409_CONFLICT,
+            detail=f"Upload incomplete: {metadata['offset']} of {metadata['total_size']} bytes received",
+        )
+    metadata["sha256_received"] = hash_file(_part_path(upload_id))
+    if metadata["sha256"] and metadata["sha256"].lower() != metadata["sha256_received"]:
+        raise HTTPException(
+            status_code=status.HTTP_422_UNPROCESSABLE_ENTITY,
+            detail="Upload checksum does not match the declared sha256",
+        )
+    return metadata
+
+
+def promote_upload(upload_id: str, metadata: dict, filename: str) -> StoredAudio:
+    """Move a verified upload into the source audio directory"""
+    file_path = audio_file_path(filename)
+    os.replace(_part_path(upload_id), file_path)
+    return StoredAudio(path=file_path, size=metadata["total_size"], sha256=metadata["sha256_received"])
+
+
+async def complete_upload_session(upload_id: str, user_id: int) -> TranscriptionJobModel:
+    """
+    Verify a finished upload, move it into the source audio directory and queue it for transcription.
+
+    Checking, moving and queueing happen under the upload's lock, and the session is marked completed with its job
+    before the lock is released, so concurrent or repeated calls queue the recording once and all get the same job.
+    """
+    async with _upload_lock(upload_id):
+        metadata = get_upload_session(upload_id, user_id)
+        if metadata.get("job_id") is not None:
+            return await run_in_threadpool(get_transcription_job_by_id, metadata["job_id"])
+
+        metadata = await run_in_threadpool(verify_upload_complete, upload_id=upload_id, user_id=user_id)
+        transcription_record = await run_in_threadpool(create_transcription_record, user_id=user_id)
+        try:
+            stored_audio = promote_upload(
+                upload_id=upload_id, metadata=metadata, filename=str(transcription_record.id)
+            )
+            try:
+                job = await queue_transcription_job(
+                    transcription_id=transcription_record.id, user_id=user_id, stored_audio=stored_audio
+                )
+            except Exception:
+                # Put the bytes back so the client can retry completing the upload
+                os.replace(stored_audio.path, _part_path(upload_id))
+                raise
+        except Exception:
+            # A retry creates a new record, this one would be left empty
+            await run_in_threadpool(delete_transcription_record, transcription_record.id)
+            raise
+        _write_metadata({
+            key: value for key, value in metadata.items() if key not in ("offset", "sha256_received")
+        } | {"job_id": job.id, "transcription_id": job.transcription_id})
+    discard_upload_lock(upload_id)
+    return job
+
+
+def expire_upload_sessions(max_age_seconds: int) -> int:
+    """
+    Delete upload sessions that have not been appended to for ``max_age_seconds``: abandoned partial uploads, and
+    the markers of completed ones. Sessions with a request in progress are skipped.
+
+    Returns:
+        The number of sessions deleted
+    """
+    cutoff = time.time() - max_age_seconds
+    expired = 0
+    for entry in os.scandir(UPLOADS_RESOURCES_PATH):
+        upload_id, extension = os.path.splitext(entry.name)
+        if extension not in (".json", ".part") or (extension == ".part" and os.path.exists(_meta_path(upload_id))):
+            continue
+        lock = _upload_locks.get(upload_id)
+        if lock is not None and lock.locked():
+            continue
+        paths = [path for path in (_meta_path(upload_id), _part_path(upload_id)) if os.path.exists(path)]
+        try:
+            if max(os.path.getmtime(path) for path in paths) > cutoff:
+                continue
+            for path in paths:
+                os.remove(path)
+        except (FileNotFoundError, ValueError):
+            continue
+        discard_upload_lock(upload_id)
+        expired += 1
+    return expired
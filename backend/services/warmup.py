@@ -0,0 +1,75 @@
+import asyncio
+import logging
+import time
+from enum import StrEnum
+from typing import Callable
+
+from fastapi.concurrency import run_in_threadpool
+
+from backend.agent import get_agent_workflow
+from backend.services.transcribe import get_diarization_pipeline, get_whisper_model
+
+logger = logging.getLogger(__name__)
+
+
+class ComponentStatusEnum(StrEnum):
+    COLD = "cold"
+    WARMING = "warming"
+    WARM = "warm"
+    FAILED = "failed"
+
+
+# Heavy components, each created by an lru_cached loader on first use. A loader that returns None could not load its
+# component (the diarization pipeline without a valid HF token).
+COMPONENTS: dict[str, Callable] = {
+    "whisper": get_whisper_model,
+    "diarization": get_diarization_pipeline,
+    "agent": get_agent_workflow,
+}
+
+_warming: set[str] = set()
+_failed: set[str] = set()
+
+
+def get_component_status(name: str) -> ComponentStatusEnum:
+    loader = COMPONENTS[name]
+    if name in _warming:
+        return ComponentStatusEnum.WARMING
+    if loader.cache_info().currsize > 0:
+        # Already cached, so this call is free
+        return ComponentStatusEnum.WARM if loader() is not None else ComponentStatusEnum.FAILED
+    if name in _failed:
+        return ComponentStatusEnum.FAILED
+    return ComponentStatusEnum.COLD
+
+
+def get_components_status() -> dict[str, ComponentStatusEnum]:
+    return {name: get_component_status(name) for name in COMPONENTS}
+
+
+def _load_component(name: str):
+    start = time.perf_counter()
+    try:
+        loaded = COMPONENTS[name]()
+    except Exception as e:
+        _failed.add(name)
+        logger.error(f"Failed to warm up {name}: {e}")
+        return
+    finally:
+        _warming.discard(name)
+    if loaded is not None:
+        _failed.discard(name)
+        logger.info(f"Warmed up {name} in {time.perf_counter() - start:.1f}s")
+
+
+async def warm_up_components(names: list[str]):
+    """
+    Load the given components concurrently, each on its own thread. Model loading is mostly I/O and torch work that
+    releases the GIL, so the loads overlap.
+    """
+    unknown = [name for name in names if name not in COMPONENTS]
+    if unknown:
+        logger.warning(f"Ignoring unknown warm-up components: {unknown}")
+    names = [name for name in names if name in COMPONENTS]
+    _warming.update(names)
+    await asyncio.gather(*(run_in_threadpool(_load_component, name) for name in names))
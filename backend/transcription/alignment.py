@@ -0,0 +1,111 @@
+import heapq
+import re
+from typing import Iterable, NamedTuple
+
+UNKNOWN_SPEAKER = "Unknown"
+
+
+class SpeakerTurn(NamedTuple):
+    start: float
+    end: float
+    speaker: str
+
+
+class AlignedSegment(NamedTuple):
+    start: float
+    end: float
+    speaker: str
+    text: str
+
+
+def turns_from_diarization(diarization) -> list[SpeakerTurn]:
+    """
+    Flatten a pyannote ``Annotation`` into a list of speaker turns.
+
+    :param diarization: Output of the pyannote diarization pipeline
+    :return: List of SpeakerTurn, in the order yielded by ``itertracks``
+    """
+    return [
+        SpeakerTurn(turn.start, turn.end, f"{speaker_id}")
+        for turn, _, speaker_id in diarization.itertracks(yield_label=True)
+    ]
+
+
+def align_segments(
+    segments: Iterable[dict], turns: Iterable[SpeakerTurn], unknown_label: str = UNKNOWN_SPEAKER
+) -> list[AlignedSegment]:
+    """
+    Assign a speaker to every ASR segment using a single sweep over the diarization turns.
+
+    Turns are sorted once by start time and merged with the segments (also visited in start order). Turns that
+    can still overlap the current segment are kept in a min-heap keyed by end time, so turns that finished before
+    the segment starts are evicted exactly once. Each segment is given the speaker with the largest total time
+    overlap; segments that overlap no turn get ``unknown_label``.
+
+    Cost is O((S + T) log T + S * A) where A is the number of simultaneously active turns (small in practice).
+
+    :param segments: Whisper segments, dicts with ``start``, ``end`` and ``text`` keys
+    :param turns: Speaker turns from the diarization stage
+    :param unknown_label: Speaker label used when no turn overlaps a segment
+    :return: Aligned segments, in the same order as ``segments``
+    """
+    segments = list(segments)
+    sorted_turns = sorted(turns, key=lambda t: t.start)
+    order = sorted(range(len(segments)), key=lambda i: segments[i]["start"])
+
+    aligned: list[AlignedSegment | None] = [None] * len(segments)
+    active: list[tuple[float, int]] = []  # (turn end, index into sorted_turns)
+    next_turn = 0
+
+    for index in order:
+        segment = segments[index]
+        seg_start, seg_end = segment["start"], segment["end"]
+
+        # Admit every turn that starts before this segment ends
+        while next_turn < len(sorted_turns) and sorted_turns[next_turn].start < seg_end:
+            heapq.heappush(active, (sorted_turns[next_turn].end, next_turn))
+            next_turn += 1
+
+        # Evict turns that ended before this segment started; later segments start no earlier
+        while active and active[0][0] <= seg_start:
+            heapq.heappop(active)
+
+        overlap_by_speaker: dict[str, float] = {}
+        for turn_end, turn_index in active:
+            turn = sorted_turns[turn_index]
+            overlap = min(seg_end, turn_end) - max(seg_start, turn.start)
+            if overlap > 0:
+                overlap_by_speaker[turn.speaker] = overlap_by_speaker.get(turn.speaker, 0.0) + overlap
+
+        speaker = max(overlap_by_speaker, key=overlap_by_speaker.get) if overlap_by_speaker else unknown_label
+        aligned[index] = AlignedSegment(seg_start, seg_end, speaker, segment["text"])
+
+    return aligned
+
+
+def format_aligned_segments(aligned: Iterable[AlignedSegment]) -> str:
+    """
+    Render aligned segments in the ``[start - end] SPEAKER: text`` line format stored for transcriptions.
+    """
+    return "\n".join(
+        f"[{segment.start:.2f} - {segment.end:.2f}] {segment.speaker}: {segment.text}" for segment in aligned
+    )
+
+
+_LINE_PATTERN = re.compile(r"^\[\s*([\d.]+)\s*-\s*([\d.]+)\s*\]\s*([^:]+):\s?(.*)$")
+
+
+def parse_aligned_segments(text: str) -> list[AlignedSegment]:
+    """
+    Parse text in the ``format_aligned_segments`` line format back into segments. Lines that do not start with a
+    ``[start - end] SPEAKER:`` prefix (e.g. hand-edited continuations) are appended to the previous segment.
+    """
+    segments: list[AlignedSegment] = []
+    for line in text.splitlines():
+        if match := _LINE_PATTERN.match(line):
+            start, end, speaker, segment_text = match.groups()
+            segments.append(AlignedSegment(float(start), float(end), speaker.strip(), segment_text))
+        elif line.strip() and segments:
+            previous = segments[-1]
+            segments[-1] = previous._replace(text=f"{previous.text} {line.strip()}")
+    return segments
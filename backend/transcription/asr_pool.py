@@ -0,0 +1,101 @@
+"""
+Process pool for transcribing long recordings window by window.
+
+Kept free of backend imports so spawned workers only pay for importing Whisper and loading the model once.
+"""
+import logging
+import multiprocessing
+import os
+import threading
+from concurrent.futures import ProcessPoolExecutor
+from functools import partial
+from typing import Callable, Iterable
+
+import numpy as np
+
+from backend.transcription.audio import SharedWaveform, asr_input
+from backend.transcription.chunking import (
+    SAMPLE_RATE, AudioWindow, detect_speech_regions, plan_windows, stitch_segments
+)
+
+logger = logging.getLogger(__name__)
+
+_worker_model = None
+
+MapWindows = Callable[[Iterable[SharedWaveform]], Iterable[list[dict]]]
+
+
+def _init_worker(model_name: str, torch_threads: int):
+    global _worker_model
+    import torch
+    import whisper
+
+    torch.set_num_threads(torch_threads)
+    _worker_model = whisper.load_model(model_name)
+
+
+def _transcribe_window(window: SharedWaveform) -> list[dict]:
+    segments = _worker_model.transcribe(asr_input(window.load()))["segments"]
+    return [{"start": s["start"], "end": s["end"], "text": s["text"]} for s in segments]
+
+
+class ChunkedTranscriber:
+    """
+    Transcribes a decoded waveform by splitting it at silence and fanning the windows out over worker processes.
+    """
+
+    def __init__(self, model_name: str, workers: int, max_window_seconds: float, max_tasks_per_child: int = 0):
+        """
+        :param max_tasks_per_child: Windows a worker transcribes before it is replaced by a fresh process, which
+            returns the memory torch's allocator has fragmented (0 keeps workers for the life of the pool)
+        """
+        self.model_name = model_name
+        self.workers = workers
+        self.max_window_seconds = max_window_seconds
+        self.max_tasks_per_child = max_tasks_per_child
+        self._pool: ProcessPoolExecutor | None = None
+        self._pool_lock = threading.Lock()
+
+    @property
+    def fingerprint(self) -> str:
+        """Identifies the windowing strategy, since it affects the segments produced"""
+        return f"vad-energy-1:window-{self.max_window_seconds}"
+
+    def _get_pool(self) -> ProcessPoolExecutor:
+        with self._pool_lock:
+            if self._pool is None:
+                # Spawn rather than fork: forking a process that already runs torch threads can deadlock
+                torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+                self._pool = ProcessPoolExecutor(
+                    max_workers=self.workers, mp_context=multiprocessing.get_context("spawn"),
+                    initializer=_init_worker, initargs=(self.model_name, torch_threads),
+                    max_tasks_per_child=self.max_tasks_per_child or None,
+                )
+            return self._pool
+
+    def plan(self, waveform: np.ndarray) -> list[AudioWindow]:
+        return plan_windows(detect_speech_regions(waveform), max_window_seconds=self.max_window_seconds)
+
+    def transcribe(self, waveform: SharedWaveform, map_windows: MapWindows | None = None) -> list[dict]:
+        """
+        :param waveform: Decoded 16 kHz mono waveform. Workers receive handles to windows of it, not samples.
+        :param map_windows: Transcribes an iterable of window handles, in order. Defaults to this transcriber's
+            own spawned process pool; callers that already run a pool of loaded models can pass its ``map``.
+        """
+        workers = "the caller's workers" if map_windows else f"{self.workers} workers"
+        map_windows = map_windows or partial(self._get_pool().map, _transcribe_window)
+        samples = waveform.load()
+        windows = self.plan(samples)
+        speech_seconds = sum(w.end - w.start for w in windows) / SAMPLE_RATE
+        logger.info(
+            f"Transcribing {len(windows)} windows ({speech_seconds:.0f}s of {len(samples) / SAMPLE_RATE:.0f}s) "
+            f"on {workers}"
+        )
+        window_segments = map_windows(waveform.window(w.start, w.end) for w in windows)
+        return stitch_segments(windows, window_segments)
+
+    def shutdown(self):
+        with self._pool_lock:
+            if self._pool is not None:
+                self._pool.shutdown(wait=True, cancel_futures=True)
+                self._pool = None
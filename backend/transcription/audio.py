@@ -0,0 +1,113 @@
+import os
+import subprocess
+import tempfile
+import warnings
+from typing import NamedTuple
+
+import numpy as np
+
+from backend.transcription.chunking import SAMPLE_RATE
+
+
+class SharedWaveform(NamedTuple):
+    """
+    Handle to a decoded waveform stored as a ``.npy`` file.
+
+    Every consumer memory-maps the same file, so ASR, diarization and worker processes read the decoded samples
+    through the shared page cache instead of each holding (or being sent) a private copy. A handle can also address
+    a window of the waveform.
+    """
+    path: str
+    start: int = 0
+    end: int | None = None
+
+    def load(self) -> np.ndarray:
+        return np.load(self.path, mmap_mode="r")[self.start:self.end]
+
+    def window(self, start: int, end: int) -> "SharedWaveform":
+        return SharedWaveform(self.path, self.start + start, self.start + end)
+
+    @property
+    def num_samples(self) -> int:
+        return len(self.load())
+
+    @property
+    def duration(self) -> float:
+        return self.num_samples / SAMPLE_RATE
+
+
+def decode_audio_file(audio_file_path: str) -> np.ndarray:
+    """
+    Decode any ffmpeg-readable file straight to 16 kHz mono float32, the format both Whisper and pyannote consume.
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-threads", "0", "-i", audio_file_path,
+        "-f", "f32le", "-ac", "1", "-ar", str(SAMPLE_RATE), "-",
+    ]
+    try:
+        out = subprocess.run(cmd, capture_output=True, check=True).stdout
+    except subprocess.CalledProcessError as e:
+        raise RuntimeError(f"Failed to decode audio: {e.stderr.decode(errors='replace')}") from e
+    return np.frombuffer(out, np.float32)
+
+
+def write_shared_waveform(waveform: np.ndarray, path: str) -> SharedWaveform:
+    """Atomically write a decoded waveform to ``path`` and return a handle to it"""
+    directory = os.path.dirname(path)
+    os.makedirs(directory, exist_ok=True)
+    fd, tmp_path = tempfile.mkstemp(dir=directory, suffix=".tmp")
+    try:
+        with os.fdopen(fd, "wb") as f:
+            np.save(f, waveform)
+        os.replace(tmp_path, path)
+    except BaseException:
+        os.remove(tmp_path)
+        raise
+    return SharedWaveform(path)
+
+
+def _tensor_view(waveform: np.ndarray):
+    import torch
+
+    with warnings.catch_warnings():
+        # Memory-mapped waveforms are read-only; neither model writes to its input
+        warnings.filterwarnings("ignore", message="The given NumPy array is not writable")
+        return torch.from_numpy(np.asarray(waveform))
+
+
+def asr_input(waveform: np.ndarray):
+    """
+    Wrap a waveform as the tensor Whisper accepts in place of a file path. The tensor is a view over the (possibly
+    memory-mapped) samples, not a copy.
+    """
+    return _tensor_view(waveform)
+
+
+def diarization_input(waveform: np.ndarray) -> dict:
+    """
+    Wrap a waveform in the in-memory input format of pyannote pipelines, so pyannote does not decode the file again.
+    The tensor is a view over the (possibly memory-mapped) samples, not a copy.
+    """
+    return {"waveform": _tensor_view(waveform).unsqueeze(0), "sample_rate": SAMPLE_RATE}
+
+
+def encode_opus(
+    waveform: SharedWaveform, dest_path: str, bitrate: str = "24k", chunk_samples: int = SAMPLE_RATE * 60
+) -> str:
+    """
+    Encode a decoded waveform to a compact Opus file, streaming the already-decoded samples into ffmpeg a minute
+    at a time.
+    """
+    cmd = [
+        "ffmpeg", "-nostdin", "-y", "-loglevel", "error", "-f", "f32le", "-ar", str(SAMPLE_RATE), "-ac", "1",
+        "-i", "pipe:0", "-c:a", "libopus", "-b:a", bitrate, dest_path,
+    ]
+    samples = waveform.load()
+    with subprocess.Popen(cmd, stdin=subprocess.PIPE, stdout=subprocess.DEVNULL, stderr=subprocess.PIPE) as proc:
+        for start in range(0, len(samples), chunk_samples):
+            proc.stdin.write(np.ascontiguousarray(samples[start:start + chunk_samples]).tobytes())
+        proc.stdin.close()
+        stderr = proc.stderr.read()
+    if proc.returncode != 0:
+        raise RuntimeError(f"Failed to encode audio: {stderr.decode(errors='replace')}")
+    return dest_path
@@ -0,0 +1,93 @@
+import hashlib
+import json
+import logging
+import os
+import tempfile
+from typing import Any
+
+import numpy as np
+
+logger = logging.getLogger(__name__)
+
+
+def cache_key(*parts: Any) -> str:
+    """
+    Derive a content-addressed key from the inputs of a stage (content hashes, model names, prompt versions, ...).
+    """
+    return hashlib.sha256("\x1f".join(str(part) for part in parts).encode("utf-8")).hexdigest()
+
+
+class StageCache:
+    """
+    On-disk cache of transcription pipeline stage outputs.
+
+    Entries live at ``<root>/<stage>/<key[:2]>/<key>.<ext>`` and are written atomically (temp file + rename), so
+    concurrent writers of the same key are harmless: both produce the same content and the last rename wins.
+    A hit refreshes the entry's modification time, which the resources lifecycle uses for LRU eviction.
+    """
+
+    def __init__(self, root: str, enabled: bool = True):
+        self.root = root
+        self.enabled = enabled
+
+    def _path(self, stage: str, key: str, extension: str) -> str:
+        return os.path.join(self.root, stage, key[:2], f"{key}.{extension}")
+
+    def _atomic_write(self, path: str, write):
+        os.makedirs(os.path.dirname(path), exist_ok=True)
+        fd, tmp_path = tempfile.mkstemp(dir=os.path.dirname(path), suffix=".tmp")
+        try:
+            with os.fdopen(fd, "wb") as f:
+                write(f)
+            os.replace(tmp_path, path)
+        except BaseException:
+            os.remove(tmp_path)
+            raise
+
+    @staticmethod
+    def _touch(path: str):
+        try:
+            os.utime(path)
+        except OSError:
+            pass
+
+    def get_json(self, stage: str, key: str) -> Any | None:
+        if not self.enabled:
+            return None
+        path = self._path(stage, key, "json")
+        try:
+            with open(path, "r") as f:
+                value = json.load(f)
+            self._touch(path)
+            return value
+        except FileNotFoundError:
+            return None
+        except json.JSONDecodeError:
+            logger.warning(f"Discarding corrupt {stage} cache entry {key}")
+            return None
+
+    def put_json(self, stage: str, key: str, value: Any):
+        if not self.enabled:
+            return
+        payload = json.dumps(value).encode("utf-8")
+        self._atomic_write(self._path(stage, key, "json"), lambda f: f.write(payload))
+
+    def array_path(self, stage: str, key: str) -> str:
+        return self._path(stage, key, "npy")
+
+    def get_array(self, stage: str, key: str) -> np.ndarray | None:
+        """Load a cached array memory-mapped, so it is paged in lazily instead of copied into memory"""
+        if not self.enabled:
+            return None
+        path = self._path(stage, key, "npy")
+        try:
+            value = np.load(path, mmap_mode="r")
+            self._touch(path)
+            return value
+        except FileNotFoundError:
+            return None
+
+    def put_array(self, stage: str, key: str, value: np.ndarray):
+        if not self.enabled:
+            return
+        self._atomic_write(self._path(stage, key, "npy"), lambda f: np.save(f, value))
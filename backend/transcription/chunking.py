@@ -0,0 +1,110 @@
+from typing import Iterable, NamedTuple
+
+import numpy as np
+
+SAMPLE_RATE = 16000
+
+
+class AudioWindow(NamedTuple):
+    start: int  # first sample, inclusive
+    end: int  # last sample, exclusive
+
+    @property
+    def offset_seconds(self) -> float:
+        return self.start / SAMPLE_RATE
+
+
+def detect_speech_regions(
+    waveform: np.ndarray,
+    sample_rate: int = SAMPLE_RATE,
+    frame_ms: int = 30,
+    threshold_db: float = -35.0,
+    min_silence_ms: int = 300,
+    padding_ms: int = 200,
+) -> list[tuple[int, int]]:
+    """
+    Energy-based voice activity detection.
+
+    Frames whose RMS is within ``threshold_db`` of the loudest frame count as speech. Speech frames separated by
+    less than ``min_silence_ms`` are merged, and every region is padded by ``padding_ms`` on both sides so words
+    are not clipped at the cut.
+
+    :param waveform: Mono float32 waveform
+    :return: List of (start_sample, end_sample) speech regions, sorted and non-overlapping
+    """
+    frame_length = int(sample_rate * frame_ms / 1000)
+    num_frames = len(waveform) // frame_length
+    if num_frames == 0:
+        return []
+
+    frames = np.asarray(waveform[:num_frames * frame_length], dtype=np.float32).reshape(num_frames, frame_length)
+    rms = np.sqrt(np.mean(np.square(frames), axis=1))
+    peak = rms.max()
+    if peak <= 0:
+        return []
+    is_speech = 20 * np.log10(np.maximum(rms, 1e-10) / peak) > threshold_db
+
+    # Rising and falling edges of the speech mask give region boundaries in frames
+    edges = np.flatnonzero(np.diff(np.concatenate(([0], is_speech.astype(np.int8), [0]))))
+    starts, ends = edges[0::2], edges[1::2]
+
+    min_gap = max(1, min_silence_ms // frame_ms)
+    padding = int(sample_rate * padding_ms / 1000)
+    regions: list[tuple[int, int]] = []
+    for start, end in zip(starts.tolist(), ends.tolist()):
+        if regions and start - regions[-1][1] // frame_length < min_gap:
+            regions[-1] = (regions[-1][0], end * frame_length)
+        else:
+            regions.append((start * frame_length, end * frame_length))
+
+    padded: list[tuple[int, int]] = []
+    for start, end in regions:
+        start, end = max(0, start - padding), min(len(waveform), end + padding)
+        if padded and start <= padded[-1][1]:
+            padded[-1] = (padded[-1][0], end)
+        else:
+            padded.append((start, end))
+    return padded
+
+
+def plan_windows(
+    regions: Iterable[tuple[int, int]],
+    max_window_seconds: float = 300.0,
+    max_gap_seconds: float = 2.0,
+    sample_rate: int = SAMPLE_RATE,
+) -> list[AudioWindow]:
+    """
+    Group speech regions into transcription windows that are cut only at silence.
+
+    A new window starts when the next region would push the window past ``max_window_seconds`` or is separated
+    from it by more than ``max_gap_seconds`` of silence, so long silences are never sent to the model. A single
+    region longer than the maximum is split into equal parts.
+    """
+    max_window = int(max_window_seconds * sample_rate)
+    max_gap = int(max_gap_seconds * sample_rate)
+
+    windows: list[AudioWindow] = []
+    for start, end in regions:
+        if windows and end - windows[-1].start <= max_window and start - windows[-1].end <= max_gap:
+            windows[-1] = AudioWindow(windows[-1].start, end)
+            continue
+        parts = -(-(end - start) // max_window)
+        bounds = np.linspace(start, end, parts + 1).astype(int)
+        windows.extend(AudioWindow(int(a), int(b)) for a, b in zip(bounds[:-1], bounds[1:]))
+    return windows
+
+
+def stitch_segments(windows: Iterable[AudioWindow], window_segments: Iterable[list[dict]]) -> list[dict]:
+    """
+    Shift per-window ASR segments back onto the recording's timeline.
+
+    :param windows: The windows that were transcribed
+    :param window_segments: Segments returned for each window, timestamps relative to the window start
+    :return: Segments with absolute ``start``/``end`` times, in timeline order
+    """
+    stitched = []
+    for window, segments in zip(windows, window_segments):
+        offset = window.offset_seconds
+        for segment in segments:
+            stitched.append(segment | {"start": segment["start"] + offset, "end": segment["end"] + offset})
+    return stitched
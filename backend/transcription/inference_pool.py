@@ -0,0 +1,371 @@
+"""
+Pre-forked process pool that shares one copy of the Whisper and pyannote weights between its workers.
+
+Models are loaded in the parent, their tensors are moved to shared memory, and only then are the workers forked.
+Every worker therefore maps the same physical pages for the weights (copy-on-write), so adding workers adds
+throughput without adding a model's worth of resident memory per worker.
+
+Forking is only safe while the parent has a single thread: a fork taken while another thread holds a lock (the
+logging lock, an allocator lock, a torch/OpenMP lock) can leave the child deadlocked. So the pool is started at
+application startup, before any other thread runs, and forks one process there: a single-threaded "zygote" that
+holds the loaded models and never runs anything else. Every worker, the first ones and all later replacements, is
+forked by the zygote, which is as fork-safe when a replacement is needed as it was at startup. Requires the
+``fork`` start method (Linux).
+
+Every worker runs under a memory watchdog: the RSS of each job is sampled in the worker, and a worker whose
+resident memory stays above ``max_rss_bytes`` after a job (allocator fragmentation builds up over Whisper and
+pyannote runs), or that has run ``max_jobs`` jobs, is replaced by a new worker from the zygote. Jobs already
+running or queued on the old worker finish before it exits. A worker that dies is replaced the same way.
+"""
+import logging
+import multiprocessing
+import os
+import queue
+import signal
+import threading
+from concurrent.futures import Future
+from multiprocessing.connection import Connection
+from multiprocessing.reduction import recv_handle, send_handle
+from typing import Callable, Iterable
+
+from backend.transcription.audio import SharedWaveform, asr_input, diarization_input
+from backend.transcription.memory import MemoryStats, MemoryUsage, PeakRSSSampler
+
+logger = logging.getLogger(__name__)
+
+# Populated in the parent before forking and inherited by every worker
+_models: dict = {}
+
+
+def _init_worker(torch_threads: int):
+    import torch
+
+    torch.set_num_threads(torch_threads)
+
+
+def _run_job(stage: str, func: Callable, audio: SharedWaveform, sample_interval: float) -> tuple:
+    """Run an inference function in a worker and return its result with the memory the job used"""
+    with PeakRSSSampler(sample_interval) as sampler:
+        result = func(audio)
+    return result, MemoryUsage(stage, audio.duration, sampler.peak, sampler.after, os.getpid())
+
+
+def _transcribe(audio: SharedWaveform) -> list[dict]:
+    segments = _models["whisper"].transcribe(asr_input(audio.load()))["segments"]
+    return [{"start": s["start"], "end": s["end"], "text": s["text"]} for s in segments]
+
+
+def _diarize(audio: SharedWaveform) -> list[tuple[float, float, str]]:
+    diarization = _models["diarization"](diarization_input(audio.load()))
+    return [(turn.start, turn.end, f"{speaker}") for turn, _, speaker in diarization.itertracks(yield_label=True)]
+
+
+def _share_module_memory(obj, depth: int = 2):
+    """
+    Move the tensors of a torch module to shared memory. Pipelines that wrap their modules (pyannote) are searched
+    ``depth`` attribute levels deep.
+    """
+    if hasattr(obj, "share_memory"):
+        obj.share_memory()
+        return
+    if depth == 0 or not hasattr(obj, "__dict__"):
+        return
+    for value in vars(obj).values():
+        _share_module_memory(value, depth - 1)
+
+
+class WorkerDiedError(RuntimeError):
+    def __init__(self, pid: int, cause: BaseException):
+        super().__init__(f"Inference worker {pid} died: {cause!r}")
+        self.pid = pid
+
+
+def _worker_main(conn: Connection, torch_threads: int):
+    """Serve jobs sent by the parent, one at a time, until it sends None or goes away"""
+    signal.signal(signal.SIGCHLD, signal.SIG_DFL)
+    _init_worker(torch_threads)
+    while True:
+        try:
+            job = conn.recv()
+        except EOFError:
+            break
+        if job is None:
+            break
+        stage, func, audio, sample_interval = job
+        try:
+            reply = (True, _run_job(stage, func, audio, sample_interval))
+        except Exception as e:
+            reply = (False, e)
+        try:
+            conn.send(reply)
+        except Exception as e:
+            # The result or exception could not be pickled
+            conn.send((False, RuntimeError(f"{stage} job failed: {e!r}")))
+
+
+def _zygote_main(control: Connection, parent_control: Connection, torch_threads: int):
+    """
+    Fork a worker for every request on ``control`` and pass the parent's end of a connection to it back over
+    ``control``. Runs single-threaded for its whole life, so forking here is always safe.
+    """
+    # Inherited from the parent; holding it would keep ``control`` from seeing EOF when the parent closes its end
+    parent_control.close()
+    # Workers are never waited on; let the kernel reap them
+    signal.signal(signal.SIGCHLD, signal.SIG_IGN)
+    while True:
+        try:
+            control.recv()
+        except EOFError:
+            break
+        parent_end, worker_end = multiprocessing.Pipe()
+        pid = os.fork()
+        if pid == 0:
+            control.close()
+            parent_end.close()
+            try:
+                _worker_main(worker_end, torch_threads)
+            finally:
+                os._exit(0)
+        worker_end.close()
+        control.send(pid)
+        send_handle(control, parent_end.fileno(), os.getppid())
+        parent_end.close()
+
+
+class _WorkerProcess:
+    """
+    Parent side of one forked worker: jobs are queued and sent to the worker one at a time by a dispatcher thread
+    """
+
+    def __init__(self, conn: Connection, pid: int):
+        self.conn = conn
+        self.pid = pid
+        self._jobs: queue.SimpleQueue = queue.SimpleQueue()
+        self._thread = threading.Thread(target=self._dispatch, name=f"inference-worker-{pid}", daemon=True)
+        self._thread.start()
+
+    def _dispatch(self):
+        died = None
+        while True:
+            item = self._jobs.get()
+            if item is None:
+                break
+            future, job = item
+            if not future.set_running_or_notify_cancel():
+                continue
+            if died is not None:
+                future.set_exception(died)
+                continue
+            try:
+                self.conn.send(job)
+            except OSError as e:
+                died = WorkerDiedError(self.pid, e)
+                future.set_exception(died)
+                continue
+            except Exception as e:
+                # The job could not be pickled, so nothing was sent
+                future.set_exception(e)
+                continue
+            try:
+                ok, payload = self.conn.recv()
+            except (EOFError, OSError) as e:
+                died = WorkerDiedError(self.pid, e)
+                future.set_exception(died)
+                continue
+            if ok:
+                future.set_result(payload)
+            else:
+                future.set_exception(payload)
+        try:
+            self.conn.send(None)
+        except OSError:
+            pass
+        self.conn.close()
+
+    def submit(self, *job) -> Future:
+        future = Future()
+        self._jobs.put((future, job))
+        return future
+
+    def shutdown(self, wait: bool = True, cancel_futures: bool = False):
+        """Stop the worker once the jobs already queued have run (or been cancelled, with ``cancel_futures``)"""
+        if cancel_futures:
+            while True:
+                try:
+                    item = self._jobs.get_nowait()
+                except queue.Empty:
+                    break
+                if item is not None:
+                    item[0].cancel()
+        self._jobs.put(None)
+        if wait:
+            self._thread.join()
+
+
+class _WorkerSlot:
+    """One inference process, replaced as a whole when the worker is recycled"""
+
+    def __init__(self, index: int, worker: _WorkerProcess):
+        self.index = index
+        self.worker = worker
+        self.pid = worker.pid
+        self.jobs = 0
+        self.in_flight = 0
+        self.rss = 0
+        self.recycles = 0
+        self.recycling = False
+
+
+class InferencePool:
+    def __init__(
+        self, workers: int, load_whisper: Callable, load_diarization: Callable, max_rss_bytes: int = 0,
+        max_jobs: int = 0, sample_interval: float = 0.05, stats: MemoryStats | None = None,
+    ):
+        """
+        :param workers: Number of forked inference processes
+        :param load_whisper: Returns the loaded Whisper model (called once, in the parent)
+        :param load_diarization: Returns the loaded pyannote pipeline (called once, in the parent)
+        :param max_rss_bytes: Recycle a worker whose RSS after a job is above this (0 disables)
+        :param max_jobs: Recycle a worker after this many jobs (0 disables)
+        :param sample_interval: Seconds between RSS samples while a job runs
+        :param stats: Where the memory usage of every job is recorded
+        """
+        self.workers = workers
+        self.load_whisper = load_whisper
+        self.load_diarization = load_diarization
+        self.max_rss_bytes = max_rss_bytes
+        self.max_jobs = max_jobs
+        self.sample_interval = sample_interval
+        self.stats = stats or MemoryStats()
+        self._slots: list[_WorkerSlot] = []
+        self._lock = threading.Lock()
+        self._zygote: multiprocessing.Process | None = None
+        self._zygote_control: Connection | None = None
+        self._zygote_lock = threading.Lock()
+
+    @property
+    def started(self) -> bool:
+        return bool(self._slots)
+
+    def _fork_worker(self) -> _WorkerProcess:
+        """Have the zygote fork a worker and connect to it"""
+        with self._zygote_lock:
+            self._zygote_control.send("fork")
+            pid = self._zygote_control.recv()
+            conn = Connection(recv_handle(self._zygote_control))
+        return _WorkerProcess(conn, pid)
+
+    def start(self):
+        if self.started:
+            return
+        _models["whisper"] = self.load_whisper()
+        _models["diarization"] = self.load_diarization()
+        for model in _models.values():
+            if model is not None:
+                _share_module_memory(model)
+
+        torch_threads = max(1, (os.cpu_count() or 1) // self.workers)
+        # The only fork of the parent, taken while it is still single-threaded
+        self._zygote_control, zygote_control = multiprocessing.Pipe()
+        self._zygote = multiprocessing.get_context("fork").Process(
+            target=_zygote_main, args=(zygote_control, self._zygote_control, torch_threads), name="inference-zygote",
+            daemon=True,
+        )
+        self._zygote.start()
+        zygote_control.close()
+        self._slots = [_WorkerSlot(index, self._fork_worker()) for index in range(self.workers)]
+        logger.info(f"Inference pool started with {self.workers} workers")
+
+    def _submit(self, stage: str, func: Callable, audio: SharedWaveform) -> Future:
+        with self._lock:
+            slot = min(self._slots, key=lambda s: s.in_flight)
+            slot.in_flight += 1
+            future = slot.worker.submit(stage, func, audio, self.sample_interval)
+        future.add_done_callback(lambda f: self._job_done(slot, f))
+        return future
+
+    def _job_done(self, slot: _WorkerSlot, future: Future):
+        with self._lock:
+            slot.in_flight -= 1
+        if future.cancelled():
+            return
+        if isinstance(future.exception(), WorkerDiedError):
+            with self._lock:
+                if future.exception().pid != slot.pid or slot.recycling or not self._slots:
+                    return
+                slot.recycling = True
+            threading.Thread(
+                target=self._recycle, args=(slot, "worker died"), name="inference-recycle", daemon=True
+            ).start()
+            return
+        if future.exception() is not None:
+            return
+        usage: MemoryUsage = future.result()[1]
+        self.stats.record(usage)
+
+        reason = None
+        with self._lock:
+            # A job that finished on a worker which has since been replaced says nothing about the current one
+            if usage.pid != slot.pid or slot.recycling:
+                return
+            slot.jobs += 1
+            slot.rss = usage.rss_after
+            if self.max_rss_bytes and usage.rss_after > self.max_rss_bytes:
+                reason = f"RSS {usage.rss_after / 2 ** 20:.0f} MiB above {self.max_rss_bytes / 2 ** 20:.0f} MiB"
+            elif self.max_jobs and slot.jobs >= self.max_jobs:
+                reason = f"{slot.jobs} jobs run"
+            slot.recycling = reason is not None
+        if reason is not None:
+            # Not on the worker's dispatcher thread, which is the one running this callback
+            threading.Thread(target=self._recycle, args=(slot, reason), name="inference-recycle", daemon=True).start()
+
+    def _recycle(self, slot: _WorkerSlot, reason: str):
+        try:
+            worker = self._fork_worker()
+        except Exception as e:
+            logger.error(f"Failed to fork a replacement for inference worker {slot.pid}: {e}")
+            with self._lock:
+                slot.recycling = False
+            return
+        with self._lock:
+            old_worker = slot.worker
+            slot.worker, slot.pid = worker, worker.pid
+            slot.jobs = slot.rss = 0
+            slot.recycles += 1
+            slot.recycling = False
+        # Lets the jobs already submitted to the old worker finish, then stops it
+        old_worker.shutdown(wait=False)
+        logger.info(f"Recycled inference worker {old_worker.pid} ({reason}), replaced by {worker.pid}")
+
+    def _result(self, future: Future):
+        return future.result()[0]
+
+    def transcribe(self, audio: SharedWaveform) -> list[dict]:
+        return self._result(self._submit("asr", _transcribe, audio))
+
+    def map_transcribe(self, windows: Iterable[SharedWaveform]) -> Iterable[list[dict]]:
+        futures = [self._submit("asr_window", _transcribe, window) for window in windows]
+        return (self._result(future) for future in futures)
+
+    def diarize(self, audio: SharedWaveform) -> list[tuple[float, float, str]]:
+        if _models.get("diarization") is None:
+            raise RuntimeError("Diarization pipeline is not loaded")
+        return self._result(self._submit("diarization", _diarize, audio))
+
+    def worker_stats(self) -> list[dict]:
+        with self._lock:
+            return [
+                {"slot": s.index, "pid": s.pid, "jobs": s.jobs, "in_flight": s.in_flight, "rss_bytes": s.rss,
+                 "recycles": s.recycles}
+                for s in self._slots
+            ]
+
+    def shutdown(self):
+        with self._lock:
+            slots, self._slots = self._slots, []
+        for slot in slots:
+            slot.worker.shutdown(wait=True, cancel_futures=True)
+        if self._zygote is not None:
+            self._zygote_control.close()
+            self._zygote.join(timeout=5)
+            self._zygote = self._zygote_control = None
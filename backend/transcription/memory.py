@@ -0,0 +1,95 @@
+"""
+Resident memory sampling for inference jobs.
+
+Kept free of backend imports so it can run inside forked inference workers.
+"""
+import os
+import resource
+import sys
+import threading
+from collections import defaultdict
+from typing import NamedTuple
+
+# Audio duration buckets (upper bound in seconds, label) that peak memory is reported by
+DURATION_BUCKETS = [(5 * 60, "<5m"), (15 * 60, "5-15m"), (60 * 60, "15-60m"), (float("inf"), ">60m")]
+
+
+def rss_bytes() -> int:
+    """Current resident set size of this process"""
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Not Linux: fall back to the lifetime peak (kilobytes on Linux/BSD, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+class PeakRSSSampler:
+    """Samples the RSS of this process every ``interval`` seconds while the block runs and keeps the peak"""
+
+    def __init__(self, interval: float = 0.05):
+        self.interval = interval
+        self.peak = 0
+        self.after = 0
+        self._stop = threading.Event()
+        self._thread: threading.Thread | None = None
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak = max(self.peak, rss_bytes())
+
+    def __enter__(self) -> "PeakRSSSampler":
+        self.peak = rss_bytes()
+        self._stop.clear()
+        self._thread = threading.Thread(target=self._sample, name="rss-sampler", daemon=True)
+        self._thread.start()
+        return self
+
+    def __exit__(self, *exc):
+        self._stop.set()
+        self._thread.join()
+        self.after = rss_bytes()
+        self.peak = max(self.peak, self.after)
+
+
+class MemoryUsage(NamedTuple):
+    stage: str
+    audio_seconds: float
+    peak_rss: int
+    rss_after: int
+    pid: int
+
+
+def duration_bucket(audio_seconds: float) -> str:
+    return next(label for limit, label in DURATION_BUCKETS if audio_seconds < limit)
+
+
+class MemoryStats:
+    """Peak RSS of inference jobs, aggregated by stage and audio duration bucket"""
+
+    def __init__(self):
+        self._lock = threading.Lock()
+        self._buckets: dict[tuple[str, str], dict] = defaultdict(
+            lambda: {"jobs": 0, "total_peak_rss_bytes": 0, "max_peak_rss_bytes": 0, "max_audio_seconds": 0.0}
+        )
+
+    def record(self, usage: MemoryUsage):
+        with self._lock:
+            bucket = self._buckets[(usage.stage, duration_bucket(usage.audio_seconds))]
+            bucket["jobs"] += 1
+            bucket["total_peak_rss_bytes"] += usage.peak_rss
+            bucket["max_peak_rss_bytes"] = max(bucket["max_peak_rss_bytes"], usage.peak_rss)
+            bucket["max_audio_seconds"] = max(bucket["max_audio_seconds"], usage.audio_seconds)
+
+    def summary(self) -> dict[str, dict[str, dict]]:
+        with self._lock:
+            summary: dict[str, dict[str, dict]] = {}
+            for (stage, duration), bucket in sorted(self._buckets.items()):
+                summary.setdefault(stage, {})[duration] = {
+                    "jobs": bucket["jobs"],
+                    "mean_peak_rss_bytes": bucket["total_peak_rss_bytes"] // bucket["jobs"],
+                    "max_peak_rss_bytes": bucket["max_peak_rss_bytes"],
+                    "max_audio_seconds": bucket["max_audio_seconds"],
+                }
+            return summary
@@ -0,0 +1,197 @@
+"""
+Columnar, memory-mapped store of the aligned segments of one transcription.
+
+Each column is a ``.npy`` array (``start``, ``end``, ``max_end``, ``speaker``, ``tokens``, ``text_offset``) next
+to a UTF-8 ``text.bin`` blob holding all segment texts back to back and a ``speakers.json`` list that ``speaker``
+indexes into.
+Segments are sorted by start time, so a time-range query is two binary searches over memory-mapped columns, and only
+the text of the matching segments is paged in from disk.
+
+A store is rewritten without ever disappearing: every write goes to a new ``<path>.<version>`` directory and the
+``path`` symlink is atomically swapped to it. Readers resolve the link once per query, so they see one version
+whole, and the version a write replaces is kept until the next write for readers still using it.
+"""
+import json
+import os
+import shutil
+import tempfile
+import threading
+from collections import defaultdict
+from typing import Callable, Iterable, NamedTuple
+
+import numpy as np
+
+from backend.transcription.alignment import AlignedSegment
+
+# Rewrites of one store are serialized, so that one cannot drop the version another has just made current
+_write_locks: defaultdict[str, threading.Lock] = defaultdict(threading.Lock)
+_write_locks_lock = threading.Lock()
+
+
+class StoredSegment(NamedTuple):
+    start: float
+    end: float
+    speaker: str
+    text: str
+    tokens: int
+
+
+class SegmentStore:
+    def __init__(self, path: str):
+        self.path = path
+
+    def exists(self) -> bool:
+        return os.path.exists(os.path.join(self.path, "speakers.json"))
+
+    def resolve(self) -> "SegmentStore":
+        """The current version of the store, which a later rewrite does not change"""
+        return SegmentStore(os.path.realpath(self.path))
+
+    @staticmethod
+    def _versions(path: str) -> list[str]:
+        parent, name = os.path.split(path)
+        return [
+            os.path.realpath(entry.path) for entry in os.scandir(parent or ".")
+            if entry.name.startswith(f"{name}.") and not entry.name.endswith(".tmp")
+            and entry.is_dir(follow_symlinks=False)
+        ]
+
+    @classmethod
+    def write(
+        cls, path: str, segments: Iterable[AlignedSegment], count_tokens: Callable[[str], int]
+    ) -> "SegmentStore":
+        """Write (or atomically replace) the store at ``path``"""
+        segments = sorted(segments, key=lambda segment: segment.start)
+        speakers = list(dict.fromkeys(segment.speaker for segment in segments))
+        speaker_ids = {speaker: i for i, speaker in enumerate(speakers)}
+        texts = [segment.text.encode("utf-8") for segment in segments]
+
+        ends = np.array([segment.end for segment in segments], dtype=np.float64)
+        columns = {
+            "start": np.array([segment.start for segment in segments], dtype=np.float64),
+            "end": ends,
+            # Running maximum of the end times: lets a range query binary-search for the first overlapping segment
+            # even when a long segment overlaps later, shorter ones
+            "max_end": np.maximum.accumulate(ends) if len(ends) else ends,
+            "speaker": np.array([speaker_ids[segment.speaker] for segment in segments], dtype=np.int32),
+            "tokens": np.array([count_tokens(segment.text) for segment in segments], dtype=np.int32),
+            "text_offset": np.cumsum([0] + [len(text) for text in texts], dtype=np.int64),
+        }
+
+        with _write_locks_lock:
+            write_lock = _write_locks[os.path.abspath(path)]
+        with write_lock:
+            cls._write_version(path, columns, texts, speakers)
+        return cls(path)
+
+    @staticmethod
+    def _write_version(path: str, columns: dict[str, np.ndarray], texts: list[bytes], speakers: list[str]):
+        parent, store_name = os.path.split(path)
+        os.makedirs(parent, exist_ok=True)
+        tmp_path = tempfile.mkdtemp(dir=parent, prefix=f"{store_name}.", suffix=".tmp")
+        version_path = tmp_path.removesuffix(".tmp")
+        link_path = f"{version_path}.link.tmp"
+        try:
+            for name, column in columns.items():
+                np.save(os.path.join(tmp_path, f"{name}.npy"), column)
+            with open(os.path.join(tmp_path, "text.bin"), "wb") as f:
+                f.write(b"".join(texts))
+            with open(os.path.join(tmp_path, "speakers.json"), "w") as f:
+                json.dump(speakers, f)
+            os.replace(tmp_path, version_path)
+
+            previous = os.path.realpath(path) if os.path.islink(path) else None
+            if os.path.isdir(path) and previous is None:
+                # A store written before versioning; a directory cannot be replaced by a link atomically, so this
+                # one rewrite leaves a moment without a store
+                previous = tempfile.mkdtemp(dir=parent, prefix=f"{store_name}.")
+                os.rmdir(previous)
+                os.replace(path, previous)
+                previous = os.path.realpath(previous)
+            os.symlink(os.path.basename(version_path), link_path)
+            os.replace(link_path, path)
+        except BaseException:
+            shutil.rmtree(tmp_path, ignore_errors=True)
+            shutil.rmtree(version_path, ignore_errors=True)
+            if os.path.lexists(link_path):
+                os.remove(link_path)
+            raise
+
+        # Keep the version just replaced for readers that resolved it before the swap, drop the older ones
+        current = os.path.realpath(path)
+        for old_version in SegmentStore._versions(path):
+            if old_version not in (current, previous):
+                shutil.rmtree(old_version, ignore_errors=True)
+
+    def _column(self, name: str) -> np.ndarray:
+        return np.load(os.path.join(self.path, f"{name}.npy"), mmap_mode="r")
+
+    @property
+    def speakers(self) -> list[str]:
+        with open(os.path.join(self.path, "speakers.json"), "r") as f:
+            return json.load(f)
+
+    def __len__(self) -> int:
+        return len(self._column("start"))
+
+    def read(
+        self, start: float | None = None, end: float | None = None, speaker: str | None = None,
+        limit: int | None = None
+    ) -> tuple[list[str], list[StoredSegment]]:
+        """
+        Return the speakers of the store and the segments ``query`` selects, both read from one version of the store
+        even if it is rewritten meanwhile
+        """
+        try:
+            return self.resolve()._read(start, end, speaker, limit)
+        except FileNotFoundError:
+            # The version resolved was dropped by two rewrites in a row (or was a store written before versioning,
+            # being moved to a version); read the current one
+            return self.resolve()._read(start, end, speaker, limit)
+
+    def query(
+        self, start: float | None = None, end: float | None = None, speaker: str | None = None,
+        limit: int | None = None
+    ) -> list[StoredSegment]:
+        """
+        Return the segments overlapping ``[start, end)`` (either bound may be open), optionally only those of one
+        speaker, in start-time order.
+        """
+        return self.read(start=start, end=end, speaker=speaker, limit=limit)[1]
+
+    def _read(
+        self, start: float | None, end: float | None, speaker: str | None, limit: int | None
+    ) -> tuple[list[str], list[StoredSegment]]:
+        speakers = self.speakers
+        starts = self._column("start")
+        first = 0 if start is None else int(np.searchsorted(self._column("max_end"), start, side="right"))
+        last = len(starts) if end is None else int(np.searchsorted(starts, end, side="left"))
+        if first >= last:
+            return speakers, []
+
+        indices = np.arange(first, last)
+        ends = self._column("end")
+        if start is not None:
+            indices = indices[ends[first:last] > start]
+        if speaker is not None:
+            if speaker not in speakers:
+                return speakers, []
+            indices = indices[self._column("speaker")[indices] == speakers.index(speaker)]
+        if limit is not None:
+            indices = indices[:limit]
+        if len(indices) == 0:
+            return speakers, []
+
+        speaker_ids = self._column("speaker")
+        tokens = self._column("tokens")
+        offsets = self._column("text_offset")
+        # Only the pages holding the selected texts are read
+        text = np.memmap(os.path.join(self.path, "text.bin"), dtype=np.uint8, mode="r") if offsets[-1] else None
+        return speakers, [
+            StoredSegment(
+                start=float(starts[i]), end=float(ends[i]), speaker=speakers[speaker_ids[i]],
+                text=bytes(text[offsets[i]:offsets[i + 1]]).decode("utf-8") if text is not None else "",
+                tokens=int(tokens[i]),
+            )
+            for i in indices.tolist()
+        ]
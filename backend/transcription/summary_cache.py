@@ -0,0 +1,120 @@
+import logging
+import os
+import sqlite3
+import threading
+import time
+from enum import StrEnum
+
+logger = logging.getLogger(__name__)
+
+
+class SummaryCacheKindEnum(StrEnum):
+    SUMMARY = "summary"  # Personalized summary of a meeting for one employee
+    DIGEST = "digest"  # Meeting digest shared by every personalized summary of a meeting
+    CHUNK_NOTES = "chunk_notes"  # Notes on one transcript chunk, the map step of the digest
+
+
+class SummaryCache:
+    """
+    Persistent cache of generated summaries with LRU and TTL eviction.
+
+    Entries live in a SQLite file so they survive restarts and are shared by every worker process on the host.
+    An entry expires ``ttl_seconds`` after it was written; once more than ``max_entries`` are stored, the least
+    recently read ones are evicted. Hit/miss counters are kept per process, and per kind of entry, since a hit on a
+    digest or chunk notes says nothing about whether personalized summaries are reused.
+    """
+
+    def __init__(self, path: str, max_entries: int, ttl_seconds: int, enabled: bool = True):
+        self.path = path
+        self.max_entries = max_entries
+        self.ttl_seconds = ttl_seconds
+        self.enabled = enabled
+        self.hits = {kind: 0 for kind in SummaryCacheKindEnum}
+        self.misses = {kind: 0 for kind in SummaryCacheKindEnum}
+        self.expirations = 0
+        self.evictions = 0
+        self._lock = threading.Lock()
+        self._conn: sqlite3.Connection | None = None
+
+    def _connection(self) -> sqlite3.Connection:
+        if self._conn is None:
+            os.makedirs(os.path.dirname(self.path) or ".", exist_ok=True)
+            self._conn = sqlite3.connect(self.path, timeout=30, check_same_thread=False, isolation_level=None)
+            self._conn.execute("PRAGMA journal_mode=WAL")
+            self._conn.execute(
+                "CREATE TABLE IF NOT EXISTS summaries ("
+                "key TEXT PRIMARY KEY, summary TEXT NOT NULL, created_at REAL NOT NULL, accessed_at REAL NOT NULL, "
+                "kind TEXT NOT NULL DEFAULT 'summary')"
+            )
+            columns = {row[1] for row in self._conn.execute("PRAGMA table_info(summaries)")}
+            if "kind" not in columns:
+                # Cache files written before entries had a kind; their entries are counted as summaries
+                self._conn.execute("ALTER TABLE summaries ADD COLUMN kind TEXT NOT NULL DEFAULT 'summary'")
+            self._conn.execute("CREATE INDEX IF NOT EXISTS summaries_accessed_at ON summaries (accessed_at)")
+        return self._conn
+
+    def get(self, key: str, kind: SummaryCacheKindEnum) -> str | None:
+        if not self.enabled:
+            return None
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            row = conn.execute("SELECT summary, created_at FROM summaries WHERE key = ?", (key,)).fetchone()
+            if row is None:
+                self.misses[kind] += 1
+                return None
+            summary, created_at = row
+            if now - created_at > self.ttl_seconds:
+                conn.execute("DELETE FROM summaries WHERE key = ?", (key,))
+                self.expirations += 1
+                self.misses[kind] += 1
+                return None
+            conn.execute("UPDATE summaries SET accessed_at = ? WHERE key = ?", (now, key))
+            self.hits[kind] += 1
+            return summary
+
+    def put(self, key: str, summary: str, kind: SummaryCacheKindEnum):
+        if not self.enabled:
+            return
+        now = time.time()
+        with self._lock:
+            conn = self._connection()
+            conn.execute(
+                "INSERT OR REPLACE INTO summaries (key, summary, created_at, accessed_at, kind) VALUES (?, ?, ?, ?, ?)",
+                (key, summary, now, now, kind.value),
+            )
+            self._evict(conn, now)
+
+    def _evict(self, conn: sqlite3.Connection, now: float):
+        self.expirations += conn.execute(
+            "DELETE FROM summaries WHERE created_at < ?", (now - self.ttl_seconds,)
+        ).rowcount
+        excess = conn.execute("SELECT COUNT(*) FROM summaries").fetchone()[0] - self.max_entries
+        if excess > 0:
+            self.evictions += conn.execute(
+                "DELETE FROM summaries WHERE key IN (SELECT key FROM summaries ORDER BY accessed_at LIMIT ?)",
+                (excess,),
+            ).rowcount
+            logger.info(f"Evicted {excess} least recently used summaries")
+
+    def stats(self) -> dict:
+        entries = {}
+        if self.enabled:
+            with self._lock:
+                entries = dict(self._connection().execute("SELECT kind, COUNT(*) FROM summaries GROUP BY kind"))
+        kinds = {}
+        for kind in SummaryCacheKindEnum:
+            lookups = self.hits[kind] + self.misses[kind]
+            kinds[kind.value] = {
+                "entries": entries.get(kind.value, 0),
+                "hits": self.hits[kind],
+                "misses": self.misses[kind],
+                "hit_rate": self.hits[kind] / lookups if lookups else 0.0,
+            }
+        return {
+            "enabled": self.enabled,
+            "entries": sum(entries.values()),
+            "expirations": self.expirations,
+            "evictions": self.evictions,
+            "kinds": kinds,
+        }
@@ -0,0 +1,131 @@
+import hashlib
+import logging
+import re
+from functools import lru_cache
+
+logger = logging.getLogger(__name__)
+
+# Rough characters-per-token ratio of English text, used when no tokenizer is available
+CHARS_PER_TOKEN = 4
+
+_SPEAKER_PATTERN = re.compile(r"^\[[^\]]*\]\s*([^:]+):")
+
+
+@lru_cache(maxsize=8)
+def _get_encoding(model: str):
+    try:
+        import tiktoken
+    except ImportError:
+        logger.warning("tiktoken is not installed, estimating token counts from text length")
+        return None
+    try:
+        try:
+            return tiktoken.encoding_for_model(model)
+        except KeyError:
+            return tiktoken.get_encoding("cl100k_base")
+    except Exception as e:
+        # The encoding files are downloaded on first use, which fails offline
+        logger.warning(f"Failed to load the tokenizer for {model}, estimating token counts from text length: {e}")
+        return None
+
+
+def count_tokens(text: str, model: str) -> int:
+    encoding = _get_encoding(model)
+    if encoding is None:
+        return -(-len(text) // CHARS_PER_TOKEN)
+    return len(encoding.encode(text, disallowed_special=()))
+
+
+def _truncate_to_tokens(text: str, max_tokens: int, model: str) -> list[str]:
+    """Cut text that is longer than ``max_tokens`` on its own into consecutive pieces"""
+    encoding = _get_encoding(model)
+    if encoding is None:
+        step = max_tokens * CHARS_PER_TOKEN
+        return [text[i:i + step] for i in range(0, len(text), step)]
+    tokens = encoding.encode(text, disallowed_special=())
+    return [encoding.decode(tokens[i:i + max_tokens]) for i in range(0, len(tokens), max_tokens)]
+
+
+def speaker_turns(transcript: str) -> list[str]:
+    """
+    Group the lines of a diarized transcript (see ``format_aligned_segments``) into speaker turns: runs of
+    consecutive lines by the same speaker. Lines that do not start with a speaker label stay with the current turn.
+    """
+    turns: list[list[str]] = []
+    current_speaker = None
+    for line in transcript.splitlines():
+        if not line.strip():
+            continue
+        match = _SPEAKER_PATTERN.match(line)
+        speaker = match.group(1).strip() if match else current_speaker
+        if not turns or speaker != current_speaker:
+            turns.append([])
+            current_speaker = speaker
+        turns[-1].append(line)
+    return ["\n".join(lines) for lines in turns]
+
+
+def split_transcript(transcript: str, max_tokens: int, model: str) -> list[str]:
+    """
+    Split a diarized transcript into chunks of at most ``max_tokens`` tokens, cutting only between speaker turns.
+
+    A turn that does not fit in a chunk on its own is cut between its lines, and a single line that is still too
+    long is cut by tokens.
+    """
+    chunks: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+
+    def flush():
+        nonlocal current, current_tokens
+        if current:
+            chunks.append("\n".join(current))
+        current, current_tokens = [], 0
+
+    for turn in speaker_turns(transcript):
+        turn_tokens = count_tokens(turn, model)
+        if turn_tokens > max_tokens:
+            # Oversized turn: fall back to line (and then token) boundaries
+            pieces = [
+                piece for line in turn.splitlines()
+                for piece in (_truncate_to_tokens(line, max_tokens, model)
+                              if count_tokens(line, model) > max_tokens else [line])
+            ]
+        else:
+            pieces = [turn]
+        for piece in pieces:
+            piece_tokens = turn_tokens if piece is turn else count_tokens(piece, model)
+            # +1 for the newline joining pieces
+            if current and current_tokens + piece_tokens + 1 > max_tokens:
+                flush()
+            current.append(piece)
+            current_tokens += piece_tokens + 1
+    flush()
+    return chunks
+
+
+def split_sections(transcript: str, max_tokens: int, model: str, turns_per_section: int = 8) -> list[str]:
+    """
+    Split a diarized transcript into content-defined sections of whole speaker turns.
+
+    A section ends after a turn whose hash is divisible by ``turns_per_section`` (or when it reaches
+    ``max_tokens``), so boundaries depend only on nearby content: editing a turn changes only the section that
+    contains it, and appending text only adds sections at the end. This makes sections comparable between two
+    versions of a transcript.
+    """
+    sections: list[str] = []
+    current: list[str] = []
+    current_tokens = 0
+    for turn in speaker_turns(transcript):
+        turn_tokens = count_tokens(turn, model)
+        if current and current_tokens + turn_tokens > max_tokens:
+            sections.append("\n".join(current))
+            current, current_tokens = [], 0
+        current.append(turn)
+        current_tokens += turn_tokens + 1
+        if int(hashlib.sha256(turn.encode("utf-8")).hexdigest()[:8], 16) % turns_per_section == 0:
+            sections.append("\n".join(current))
+            current, current_tokens = [], 0
+    if current:
+        sections.append("\n".join(current))
+    return sections
@@ -1,14 +1,14 @@
+import hashlib
 import logging
 import os
 from functools import lru_cache
+from typing import AsyncIterator, NamedTuple
 
 import boto3
+from botocore.config import Config
 from botocore.exceptions import ClientError
-from fastapi import UploadFile
-from langchain_community.retrievers import ArxivRetriever
-from langchain_community.tools import TavilySearchResults
-from langchain_openai import OpenAIEmbeddings
-from langchain_pinecone import PineconeVectorStore
+from fastapi import UploadFile, HTTPException, status
+from fastapi.concurrency import run_in_threadpool
 from passlib.context import CryptContext
 
 from backend.config import settings
@@ -16,6 +16,12 @@ from backend.config import settings
 BASE_RESOURCES_PATH = os.path.join("resources")
 SRC_AUDIO_RESOURCES_PATH = os.path.join(BASE_RESOURCES_PATH, "src_audio")
 TRANSCRIPTIONS_RESOURCES_PATH = os.path.join(BASE_RESOURCES_PATH, "transcriptions")
+UPLOADS_RESOURCES_PATH = os.path.join(BASE_RESOURCES_PATH, "uploads")
+STAGE_CACHE_RESOURCES_PATH = os.path.join(BASE_RESOURCES_PATH, "stage_cache")
+DECODED_AUDIO_RESOURCES_PATH = os.path.join(BASE_RESOURCES_PATH, "decoded_audio")
+SUMMARY_CACHE_PATH = os.path.join(BASE_RESOURCES_PATH, "summary_cache.db")
+SEGMENTS_RESOURCES_PATH = os.path.join(BASE_RESOURCES_PATH, "segments")
+COMPRESSED_TRANSCRIPT_SUFFIX = ".zst"
 
 
 logger = logging.getLogger(__name__)
@@ -33,17 +39,32 @@ def verify_password(plain_password: str, hashed_password: str) -> bool:
 def create_resource_dirs():
     os.makedirs(SRC_AUDIO_RESOURCES_PATH, exist_ok=True)
     os.makedirs(TRANSCRIPTIONS_RESOURCES_PATH, exist_ok=True)
+    os.makedirs(UPLOADS_RESOURCES_PATH, exist_ok=True)
+    os.makedirs(STAGE_CACHE_RESOURCES_PATH, exist_ok=True)
+    os.makedirs(DECODED_AUDIO_RESOURCES_PATH, exist_ok=True)
+    os.makedirs(SEGMENTS_RESOURCES_PATH, exist_ok=True)
 
 
 
+@lru_cache(maxsize=1)
 def get_s3_client():
+    """
+    Shared S3 client. Clients are thread-safe, so one instance (and its connection pool) serves every request and
+    transfer thread instead of paying for client construction and new TLS connections per call.
+    """
     return boto3.client(
         "s3",
         aws_access_key_id=settings.AWS_ACCESS_KEY_ID,
         aws_secret_access_key=settings.AWS_SECRET_ACCESS_KEY,
         region_name=settings.AWS_REGION,
+        endpoint_url=settings.AWS_S3_ENDPOINT_URL,
+        config=Config(
+            max_pool_connections=settings.S3_MAX_POOL_CONNECTIONS,
+            retries={"max_attempts": settings.S3_MAX_RETRY_ATTEMPTS, "mode": "adaptive"},
+        ),
     )
 
+
 def load_s3_bucket():
     bucket = os.environ.get("AWS_S3_BUCKET")
     if bucket:
@@ -80,25 +101,103 @@ def fetch_file_from_s3(key: str, dest_filename: str | None):
 
 @lru_cache
 def get_pinecone_vector_store():
+    from langchain_openai import OpenAIEmbeddings
+    from langchain_pinecone import PineconeVectorStore
+
     embeddings = OpenAIEmbeddings(model=settings.OPENAI_EMBEDDINGS_MODEL)
     return PineconeVectorStore(index=settings.PINECONE_INDEX_NAME, embedding=embeddings)
 
 
 def get_tavily_web_search_tool():
+    from langchain_community.tools import TavilySearchResults
+
     os.environ["TAVILY_API_KEY"] = settings.TAVILY_API_KEY
     return TavilySearchResults(max_results=5, search_depth="advanced", include_answer=True)
 
 
-async def write_audio_to_file(contents: UploadFile, filename: str):
-    file_path = os.path.join(SRC_AUDIO_RESOURCES_PATH, filename + ".audio")
-    with open(file_path, "wb") as f:
-        audio_data = await contents.read()
-        f.write(audio_data)
-    return file_path
+class StoredAudio(NamedTuple):
+    path: str
+    size: int
+    sha256: str
+
+
+async def iter_upload_chunks(contents: UploadFile, chunk_size: int = settings.UPLOAD_CHUNK_SIZE_BYTES) -> AsyncIterator[bytes]:
+    while chunk := await contents.read(chunk_size):
+        yield chunk
+
+
+async def write_stream_to_file(
+    chunks: AsyncIterator[bytes], file_path: str, max_bytes: int, append: bool = False, hasher=None
+) -> int:
+    """
+    Write a byte stream to disk chunk by chunk, never holding more than one chunk in memory.
+
+    The partial file is removed if a fresh write exceeds ``max_bytes``; an appending write is truncated back to its
+    starting size instead, so a resumable upload keeps its last good offset.
+
+    Args:
+        chunks: Async iterator of byte chunks
+        file_path: Destination file
+        max_bytes: Maximum size of the file after the write
+        append: Append to an existing file instead of overwriting it
+        hasher: Optional hashlib object updated with every chunk
+
+    Returns:
+        Size of the file after the write
+    """
+    size = os.path.getsize(file_path) if append and os.path.exists(file_path) else 0
+    start_size = size
+    with open(file_path, "ab" if append else "wb") as f:
+        async for chunk in chunks:
+            size += len(chunk)
+            if size > max_bytes:
+                if append:
+                    f.truncate(start_size)
+                break
+            if hasher is not None:
+                hasher.update(chunk)
+            await run_in_threadpool(f.write, chunk)
+        else:
+            return size
+
+    if not append:
+        os.remove(file_path)
+    raise HTTPException(
+        status_code=status.HTTP_413_REQUEST_ENTITY_TOO_LARGE,
+        detail=f"Upload exceeds the maximum size of {max_bytes} bytes",
+    )
+
+
+def hash_file(file_path: str, chunk_size: int = settings.UPLOAD_CHUNK_SIZE_BYTES) -> str:
+    hasher = hashlib.sha256()
+    with open(file_path, "rb") as f:
+        while chunk := f.read(chunk_size):
+            hasher.update(chunk)
+    return hasher.hexdigest()
+
+
+def audio_file_path(filename: str) -> str:
+    return os.path.join(SRC_AUDIO_RESOURCES_PATH, filename + ".audio")
+
+
+async def write_audio_to_file(contents: UploadFile, filename: str) -> StoredAudio:
+    file_path = audio_file_path(filename)
+    hasher = hashlib.sha256()
+    size = await write_stream_to_file(
+        iter_upload_chunks(contents), file_path, max_bytes=settings.MAX_AUDIO_UPLOAD_BYTES, hasher=hasher
+    )
+    return StoredAudio(path=file_path, size=size, sha256=hasher.hexdigest())
+
+
+def transcription_file_path(filename: str) -> str:
+    return os.path.join(TRANSCRIPTIONS_RESOURCES_PATH, filename + ".txt")
 
 
 async def write_transcription_to_file(contents: str, filename: str):
-    file_path = os.path.join(TRANSCRIPTIONS_RESOURCES_PATH, filename + ".txt")
+    file_path = transcription_file_path(filename)
     with open(file_path, "wb") as f:
         f.write(contents.encode("utf-8"))
+    # Drop the copy compressed by the resources lifecycle, it is stale now
+    if os.path.exists(file_path + COMPRESSED_TRANSCRIPT_SUFFIX):
+        os.remove(file_path + COMPRESSED_TRANSCRIPT_SUFFIX)
     return file_path
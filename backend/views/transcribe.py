@@ -1,23 +1,35 @@
 import os
 import tempfile
 from idlelib.pyparse import trans
-from pathlib import Path
 
-from fastapi import APIRouter, UploadFile, File, Depends
+from fastapi import APIRouter, UploadFile, File, Depends, HTTPException, Header, Path, Query, Request, Response
+from fastapi.concurrency import run_in_threadpool
+from starlette import status
 from starlette.responses import JSONResponse
 
-from backend.database.transcriptions import create_transcription_record, update_transcription_text, \
-    get_transcription_by_id
-from backend.schemas.transcribe import AudioTranscribeRequest, AudioTranscribeResponse
-from pyannote.audio import Pipeline
+from backend.database.transcription_jobs import get_transcription_job_by_id, TranscriptionJobStatusEnum
+from backend.database.transcriptions import create_transcription_record, get_transcription_by_id, \
+    get_transcription_summaries, delete_transcription_record
+from backend.schemas import ExceptionSchema
+from backend.schemas.transcribe import AudioTranscribeRequest, AudioTranscribeResponse, TranscriptionJobResponse, \
+    TranscriptionJobStatusResponse, UploadSessionRequest, UploadSessionResponse, AttendeeSummariesRequest, \
+    AttendeeSummariesResponse, AttendeeSummary, SummaryCacheStatsResponse, MeetingDigest, TranscriptUpdateRequest, \
+    TranscriptUpdateResponse, TranscriptSegmentsResponse
 
 from backend.config import settings
 from backend.services.auth_bearer import get_current_user_id
-from backend.services.transcribe import upload_file_to_s3, get_whisper_model, generate_personalized_summary
-from backend.utils import write_audio_to_file, write_transcription_to_file
+from backend.services.transcribe import get_diarization_pipeline, run_transcription_pipeline, \
+    resummarize_transcription, generate_attendee_summaries, summary_cache, get_transcription_digest, \
+    update_transcript, get_transcript_segments
+from backend.services.transcription_jobs import queue_transcription_job
+from backend.services.uploads import create_upload_session, get_upload_session, append_upload_chunk, \
+    complete_upload_session
+from backend.utils import write_audio_to_file, audio_file_path
 
 transcribe_router = APIRouter(prefix="/transcribe", tags=["transcribe"])
 
+UPLOAD_ID_PATTERN = r"^[0-9a-f]{32}$"
+
 
 # @transcribe_router.post(
 #     "/audio",
@@ -32,54 +44,245 @@ transcribe_router = APIRouter(prefix="/transcribe", tags=["transcribe"])
 #     return await transcribe_audio(request.remote_file_path)
 
 
-# Initialize Pyannote pipeline for diarization
-try:
-    diarization_pipeline = Pipeline.from_pretrained(
-        "pyannote/speaker-diarization-3.1",
-        use_auth_token=settings.HF_TOKEN
-    )
-    print("Diarization pipeline loaded successfully.")
-except Exception as e:
-    diarization_pipeline = None
-    print(f"Failed to load diarization pipeline: {e}")
-
 @transcribe_router.post("/upload-audio/")
 async def process_audio(file: UploadFile = File(...), user_id: int = Depends(get_current_user_id)):
-    if diarization_pipeline is None:
+    if await run_in_threadpool(get_diarization_pipeline) is None:
         return JSONResponse(
             {"error": "Diarization pipeline unavailable. Please check your Hugging Face token."},
             status_code=500,
         )
-    transcription_record = create_transcription_record(user_id=user_id)
+    transcription_record = await run_in_threadpool(create_transcription_record, user_id=user_id)
 
-    audio_file_path = await write_audio_to_file(file, str(transcription_record.id))
-    whisper_model = get_whisper_model()
+    stored_audio = await write_audio_to_file(file, str(transcription_record.id))
+    personalized_summary = await run_transcription_pipeline(
+        transcription_id=transcription_record.id, audio_file_path=stored_audio.path, user_id=user_id,
+        audio_sha256=stored_audio.sha256
+    )
 
-    # Transcribe audio using Whisper
-    transcription_output = whisper_model.transcribe(audio_file_path)["segments"]
+    return AudioTranscribeResponse(
+        personalized_summary=personalized_summary, transcription_id=transcription_record.id
+    )
 
-    # Perform diarization using Pyannote pipeline
-    diarization = diarization_pipeline(audio_file_path)
 
-    # Combine transcription and diarization
-    diarized_output = []
-    for segment in transcription_output:
-        start_time = segment["start"]
-        end_time = segment["end"]
-        text = segment["text"]
-        speaker = "Unknown"
-        for turn, _, speaker_id in diarization.itertracks(yield_label=True):
-            if turn.start <= start_time <= turn.end:
-                speaker = f"{speaker_id}"
-        diarized_output.append(f"[{start_time:.2f} - {end_time:.2f}] {speaker}: {text}")
+@transcribe_router.post(
+    "/{transcription_id}/summary",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def resummarize(transcription_id: int, user_id: int = Depends(get_current_user_id)) -> AudioTranscribeResponse:
+    """
+    Generate a fresh personalized summary from a stored transcription, without re-running ASR or diarization
+    """
+    personalized_summary = await resummarize_transcription(transcription_id=transcription_id, user_id=user_id)
+    return AudioTranscribeResponse(personalized_summary=personalized_summary, transcription_id=transcription_id)
 
-    # Save diarized transcription to a file
-    diarized_text = "\n".join(diarized_output)
-    diarized_file_path = await write_transcription_to_file(diarized_text, str(transcription_record.id))
-    personalized_summary = generate_personalized_summary(transcription_path=diarized_file_path, user_id=user_id)
 
-    update_transcription_text(transcription_id=transcription_record.id, transcription_text=diarized_text, personalized_summary=personalized_summary)
+@transcribe_router.get(
+    "/{transcription_id}/segments",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def get_segments(
+    transcription_id: int,
+    start: float | None = Query(None, ge=0, description="Start of the time range in seconds"),
+    end: float | None = Query(None, ge=0, description="End of the time range in seconds"),
+    speaker: str | None = Query(None, description="Only return this speaker's segments"),
+    limit: int | None = Query(None, gt=0),
+    user_id: int = Depends(get_current_user_id),
+) -> TranscriptSegmentsResponse:
+    """
+    Fetch the transcript segments overlapping a time range and/or spoken by one speaker
+    """
+    return await get_transcript_segments(
+        transcription_id=transcription_id, user_id=user_id, start=start, end=end, speaker=speaker, limit=limit
+    )
 
-    return AudioTranscribeResponse(
-        personalized_summary=personalized_summary, transcription_id=transcription_record.id
+
+@transcribe_router.put(
+    "/{transcription_id}/transcript",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def correct_transcript(
+    transcription_id: int, request: TranscriptUpdateRequest, user_id: int = Depends(get_current_user_id)
+) -> TranscriptUpdateResponse:
+    """
+    Replace the transcript with a corrected version. Only the changed sections are re-summarized.
+    """
+    return await update_transcript(
+        transcription_id=transcription_id, user_id=user_id, transcription_text=request.transcription_text
     )
+
+
+@transcribe_router.post(
+    "/{transcription_id}/transcript/append",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def append_transcript(
+    transcription_id: int, request: TranscriptUpdateRequest, user_id: int = Depends(get_current_user_id)
+) -> TranscriptUpdateResponse:
+    """
+    Append the next part of a meeting to the transcript. Only the appended sections are summarized.
+    """
+    return await update_transcript(
+        transcription_id=transcription_id, user_id=user_id, transcription_text=request.transcription_text,
+        append=True
+    )
+
+
+@transcribe_router.get(
+    "/{transcription_id}/digest",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def get_digest(transcription_id: int, user_id: int = Depends(get_current_user_id)) -> MeetingDigest:
+    """
+    Decisions, action items, blockers and per-speaker highlights of the meeting, shared by all personalized summaries
+    """
+    return await get_transcription_digest(transcription_id=transcription_id, user_id=user_id)
+
+
+@transcribe_router.post(
+    "/{transcription_id}/attendee-summaries",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def summarize_for_attendees(
+    transcription_id: int, request: AttendeeSummariesRequest, user_id: int = Depends(get_current_user_id)
+) -> AttendeeSummariesResponse:
+    """
+    Generate a personalized summary of the meeting for each attendee and store it against the transcription
+    """
+    return await generate_attendee_summaries(
+        transcription_id=transcription_id, attendee_emails=request.attendee_emails, user_id=user_id
+    )
+
+
+@transcribe_router.get(
+    "/{transcription_id}/attendee-summaries",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def get_attendee_summaries(
+    transcription_id: int, user_id: int = Depends(get_current_user_id)
+) -> AttendeeSummariesResponse:
+    transcription = await run_in_threadpool(get_transcription_by_id, transcription_id)
+    if transcription is None or transcription.user_id != user_id:
+        raise HTTPException(
+            status_code=status.HTTP_404_NOT_FOUND, detail=f"Transcription {transcription_id} not found"
+        )
+    summaries = await run_in_threadpool(get_transcription_summaries, transcription_id)
+    return AttendeeSummariesResponse(transcription_id=transcription_id, summaries=[
+        AttendeeSummary(email=summary.attendee_email, personalized_summary=summary.personalized_summary)
+        for summary in summaries
+    ])
+
+
+@transcribe_router.get("/summary-cache/stats")
+async def get_summary_cache_stats(user_id: int = Depends(get_current_user_id)) -> SummaryCacheStatsResponse:
+    """
+    Size of this process's summary cache and its hit rate for each kind of entry: personalized summaries, meeting
+    digests and transcript chunk notes
+    """
+    return SummaryCacheStatsResponse(**await run_in_threadpool(summary_cache.stats))
+
+
+@transcribe_router.post("/jobs/", status_code=status.HTTP_202_ACCEPTED)
+async def submit_transcription_job(
+    file: UploadFile = File(...), user_id: int = Depends(get_current_user_id)
+) -> TranscriptionJobResponse:
+    """
+    Store the upload and queue it for transcription. Poll `GET /transcribe/jobs/{job_id}` for progress.
+    """
+    transcription_record = await run_in_threadpool(create_transcription_record, user_id=user_id)
+    try:
+        stored_audio = await write_audio_to_file(file, str(transcription_record.id))
+        job = await queue_transcription_job(
+            transcription_id=transcription_record.id, user_id=user_id, stored_audio=stored_audio
+        )
+    except Exception:
+        # Neither the record nor the recording is of use without a job
+        audio_path = audio_file_path(str(transcription_record.id))
+        if os.path.exists(audio_path):
+            os.remove(audio_path)
+        await run_in_threadpool(delete_transcription_record, transcription_record.id)
+        raise
+    return TranscriptionJobResponse(job_id=job.id, transcription_id=job.transcription_id, status=job.status)
+
+
+@transcribe_router.get(
+    "/jobs/{job_id}",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def get_transcription_job(job_id: int, user_id: int = Depends(get_current_user_id)) -> TranscriptionJobStatusResponse:
+    job = await run_in_threadpool(get_transcription_job_by_id, job_id)
+    if job is None or job.user_id != user_id:
+        raise HTTPException(status_code=status.HTTP_404_NOT_FOUND, detail=f"Transcription job {job_id} not found")
+
+    personalized_summary = None
+    if job.status == TranscriptionJobStatusEnum.COMPLETED:
+        transcription = await run_in_threadpool(get_transcription_by_id, job.transcription_id)
+        personalized_summary = transcription.personalized_summary
+
+    return TranscriptionJobStatusResponse(
+        job_id=job.id, transcription_id=job.transcription_id, status=job.status, stages=job.stages,
+        attempts=job.attempts, error=job.error, personalized_summary=personalized_summary,
+        created_at=job.created_at, updated_at=job.updated_at
+    )
+
+
+@transcribe_router.post("/uploads/", status_code=status.HTTP_201_CREATED)
+async def create_upload(
+    request: UploadSessionRequest, user_id: int = Depends(get_current_user_id)
+) -> UploadSessionResponse:
+    """
+    Start a resumable upload. Send the bytes with `PATCH /transcribe/uploads/{upload_id}` and finish with
+    `POST /transcribe/uploads/{upload_id}/complete`.
+    """
+    return UploadSessionResponse(**create_upload_session(
+        user_id=user_id, total_size=request.total_size, sha256=request.sha256
+    ))
+
+
+@transcribe_router.get(
+    "/uploads/{upload_id}",
+    responses={status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema}},
+)
+async def get_upload(
+    response: Response, upload_id: str = Path(pattern=UPLOAD_ID_PATTERN), user_id: int = Depends(get_current_user_id)
+) -> UploadSessionResponse:
+    """Report how many bytes of an upload the server holds, so an interrupted client knows where to resume"""
+    upload = get_upload_session(upload_id=upload_id, user_id=user_id)
+    response.headers["Upload-Offset"] = str(upload["offset"])
+    return UploadSessionResponse(**upload)
+
+
+@transcribe_router.patch(
+    "/uploads/{upload_id}",
+    responses={
+        status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema},
+        status.HTTP_409_CONFLICT: {"model": ExceptionSchema},
+        status.HTTP_413_REQUEST_ENTITY_TOO_LARGE: {"model": ExceptionSchema},
+    },
+)
+async def append_upload(
+    request: Request, response: Response, upload_id: str = Path(pattern=UPLOAD_ID_PATTERN),
+    upload_offset: int = Header(alias="Upload-Offset", ge=0), user_id: int = Depends(get_current_user_id)
+) -> UploadSessionResponse:
+    """Append the raw request body to an upload at `Upload-Offset`"""
+    upload = await append_upload_chunk(
+        upload_id=upload_id, user_id=user_id, offset=upload_offset, chunks=request.stream()
+    )
+    response.headers["Upload-Offset"] = str(upload["offset"])
+    return UploadSessionResponse(**upload)
+
+
+@transcribe_router.post(
+    "/uploads/{upload_id}/complete",
+    status_code=status.HTTP_202_ACCEPTED,
+    responses={
+        status.HTTP_404_NOT_FOUND: {"model": ExceptionSchema},
+        status.HTTP_409_CONFLICT: {"model": ExceptionSchema},
+        status.HTTP_422_UNPROCESSABLE_ENTITY: {"model": ExceptionSchema},
+    },
+)
+async def complete_upload(
+    upload_id: str = Path(pattern=UPLOAD_ID_PATTERN), user_id: int = Depends(get_current_user_id)
+) -> TranscriptionJobResponse:
+    """Verify a finished upload and queue it for transcription. Completing an upload again returns the same job."""
+    job = await complete_upload_session(upload_id=upload_id, user_id=user_id)
+    return TranscriptionJobResponse(job_id=job.id, transcription_id=job.transcription_id, status=job.status)
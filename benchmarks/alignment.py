@@ -0,0 +1,83 @@
+"""
+Benchmark speaker alignment on synthetic diarized transcripts.
+
+Compares the sweep-line aligner in ``backend.transcription.alignment`` with the previous nested-loop matching
+(every Whisper segment re-walks every diarization turn).
+
+Usage:
+    python -m benchmarks.alignment [--sizes 1000 10000 100000] [--legacy-limit 10000]
+"""
+import argparse
+import random
+import time
+
+from backend.transcription.alignment import SpeakerTurn, align_segments, UNKNOWN_SPEAKER
+
+
+def generate_fixture(num_segments: int, num_speakers: int = 8, seed: int = 7):
+    """
+    Build synthetic Whisper segments and diarization turns covering the same timeline.
+
+    Segments are 1-8s long with small gaps; turns are 2-20s long and occasionally overlap (crosstalk).
+    """
+    rng = random.Random(seed)
+    speakers = [f"SPEAKER_{i:02d}" for i in range(num_speakers)]
+
+    segments = []
+    cursor = 0.0
+    for i in range(num_segments):
+        start = cursor + rng.uniform(0.0, 0.5)
+        end = start + rng.uniform(1.0, 8.0)
+        segments.append({"start": start, "end": end, "text": f"segment {i}"})
+        cursor = end
+    duration = cursor
+
+    turns = []
+    cursor = 0.0
+    while cursor < duration:
+        start = max(0.0, cursor - (rng.uniform(0.0, 1.5) if rng.random() < 0.2 else 0.0))
+        end = start + rng.uniform(2.0, 20.0)
+        turns.append(SpeakerTurn(start, end, rng.choice(speakers)))
+        cursor = end
+    rng.shuffle(turns)
+
+    return segments, turns
+
+
+def align_segments_legacy(segments, turns):
+    """Original alignment from ``process_audio``: last turn containing the segment start wins."""
+    aligned = []
+    for segment in segments:
+        speaker = UNKNOWN_SPEAKER
+        for turn in turns:
+            if turn.start <= segment["start"] <= turn.end:
+                speaker = turn.speaker
+        aligned.append(speaker)
+    return aligned
+
+
+def _time(func, *args) -> float:
+    start = time.perf_counter()
+    func(*args)
+    return time.perf_counter() - start
+
+
+def run(sizes: list[int], legacy_limit: int):
+    print(f"{'segments':>10} {'turns':>8} {'sweep (s)':>10} {'legacy (s)':>11} {'speedup':>8}")
+    for size in sizes:
+        segments, turns = generate_fixture(size)
+        sweep = _time(align_segments, segments, turns)
+        if size <= legacy_limit:
+            legacy = _time(align_segments_legacy, segments, turns)
+            print(f"{size:>10} {len(turns):>8} {sweep:>10.4f} {legacy:>11.4f} {legacy / sweep:>7.1f}x")
+        else:
+            print(f"{size:>10} {len(turns):>8} {sweep:>10.4f} {'skipped':>11} {'-':>8}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--sizes", type=int, nargs="+", default=[1_000, 10_000, 100_000])
+    parser.add_argument("--legacy-limit", type=int, default=10_000,
+                        help="Largest input to run the quadratic legacy aligner on")
+    args = parser.parse_args()
+    run(args.sizes, args.legacy_limit)
@@ -0,0 +1,56 @@
+"""
+Measure how long a fresh interpreter takes to import ``backend.main`` and check it against a time budget.
+
+Heavy components (Whisper, pyannote, the LangGraph agent and its clients) are loaded lazily or by the startup
+warm-up, so importing the API must neither exceed the budget nor pull in any of the modules listed in
+``HEAVY_MODULES``. Exits non-zero when either check fails, so it can gate CI.
+
+Usage:
+    python -m benchmarks.import_time [--budget 3.0] [--runs 5]
+"""
+import argparse
+import json
+import statistics
+import subprocess
+import sys
+
+HEAVY_MODULES = ["torch", "whisper", "pyannote.audio", "langgraph", "langchain_community", "pinecone", "openai"]
+
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import backend.main
+elapsed = time.perf_counter() - start
+print(json.dumps({"seconds": elapsed, "loaded": [m for m in %r if m in sys.modules]}))
+""" % (HEAVY_MODULES,)
+
+
+def measure_import() -> dict:
+    result = subprocess.run([sys.executable, "-c", _PROBE], capture_output=True, text=True, check=True)
+    return json.loads(result.stdout.strip().splitlines()[-1])
+
+
+def run(budget: float, runs: int) -> bool:
+    samples = [measure_import() for _ in range(runs)]
+    timings = [sample["seconds"] for sample in samples]
+    loaded = sorted({module for sample in samples for module in sample["loaded"]})
+    median = statistics.median(timings)
+
+    print(f"import backend.main over {runs} runs: median {median:.2f}s, min {min(timings):.2f}s, "
+          f"max {max(timings):.2f}s (budget {budget:.2f}s)")
+    ok = True
+    if median > budget:
+        print("FAIL: import time exceeds the budget")
+        ok = False
+    if loaded:
+        print(f"FAIL: heavy modules imported eagerly: {', '.join(loaded)}")
+        ok = False
+    return ok
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--budget", type=float, default=3.0, help="Maximum median import time in seconds")
+    parser.add_argument("--runs", type=int, default=5)
+    args = parser.parse_args()
+    sys.exit(0 if run(args.budget, args.runs) else 1)
@@ -0,0 +1,59 @@
+"""
+Compare the real-time factor (processing time / audio duration) of single-pass Whisper against the chunked,
+VAD-windowed process-pool transcriber used for long recordings.
+
+Model loading is excluded from both timings: the single-pass model is loaded up front and the worker pool is
+warmed up on a short clip before measuring.
+
+Usage:
+    python -m benchmarks.long_audio_asr --audio meeting.wav [--workers 4] [--window-seconds 300] [--model base]
+"""
+import argparse
+import os
+import tempfile
+import time
+
+import whisper
+
+from backend.transcription.asr_pool import ChunkedTranscriber
+from backend.transcription.audio import asr_input, decode_audio_file, write_shared_waveform
+from backend.transcription.chunking import SAMPLE_RATE
+
+
+def run(audio_path: str, model_name: str, workers: int, window_seconds: float):
+    scratch_dir = tempfile.mkdtemp()
+    shared = write_shared_waveform(decode_audio_file(audio_path), os.path.join(scratch_dir, "waveform.npy"))
+    waveform = shared.load()
+    duration = len(waveform) / SAMPLE_RATE
+
+    transcriber = ChunkedTranscriber(model_name=model_name, workers=workers, max_window_seconds=window_seconds)
+    windows = transcriber.plan(waveform)
+    speech = sum(w.end - w.start for w in windows) / SAMPLE_RATE
+    print(f"audio: {duration:.1f}s, speech after VAD: {speech:.1f}s in {len(windows)} windows")
+
+    model = whisper.load_model(model_name)
+    start = time.perf_counter()
+    single = model.transcribe(asr_input(waveform))["segments"]
+    single_elapsed = time.perf_counter() - start
+
+    transcriber.transcribe(shared.window(0, SAMPLE_RATE * 5))  # warm up the worker pool
+    start = time.perf_counter()
+    chunked = transcriber.transcribe(shared)
+    chunked_elapsed = time.perf_counter() - start
+    transcriber.shutdown()
+    os.remove(shared.path)
+    os.rmdir(scratch_dir)
+
+    print(f"{'mode':<22} {'segments':>9} {'wall (s)':>9} {'RTF':>7}")
+    print(f"{'single-pass':<22} {len(single):>9} {single_elapsed:>9.1f} {single_elapsed / duration:>7.3f}")
+    print(f"{f'chunked x{workers}':<22} {len(chunked):>9} {chunked_elapsed:>9.1f} {chunked_elapsed / duration:>7.3f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--audio", required=True, help="Recording to transcribe")
+    parser.add_argument("--model", default="base")
+    parser.add_argument("--workers", type=int, default=4)
+    parser.add_argument("--window-seconds", type=float, default=300.0)
+    args = parser.parse_args()
+    run(args.audio, args.model, args.workers, args.window_seconds)
@@ -0,0 +1,309 @@
+"""
+Benchmark the transcription pipeline stage by stage on synthetic multi-speaker recordings.
+
+For each fixture length, a recording is synthesized (speakers are harmonic voices with distinct pitch, talking in
+turns of 2-12s separated by short pauses) and the stages behind ``POST /transcribe/upload-audio/`` are run one
+after another, so every stage is measured on its own:
+
+    decoding     ffmpeg decode to the shared 16 kHz waveform
+    asr          Whisper (model loaded before measuring)
+    diarization  pyannote (pipeline loaded before measuring)
+    alignment    speaker alignment of the ASR segments
+    digest       meeting digest, map-reduce included, with a stubbed LLM
+    summary      personalized summaries for ``--attendees`` synthetic profiles, with a stubbed LLM
+
+Each stage reports wall time, real-time factor (wall time / audio duration), CPU time and utilization (CPU time /
+wall time, in cores; ffmpeg's CPU is included) and the peak RSS of this process while the stage ran. Stages left
+out with ``--stages`` are fed the fixture's reference output instead, and the LLM stages always run on the
+reference transcript, so their token volume does not depend on what Whisper makes of synthetic audio. Stage caches
+are bypassed.
+
+The report is written as JSON; pass an earlier report with ``--compare`` to print per-stage changes.
+
+Usage:
+    python -m benchmarks.pipeline [--durations 60 300 900] [--speakers 3] [--stages ...] [--llm-latency 0.5]
+                                  [--output report.json] [--compare baseline.json]
+"""
+import argparse
+import json
+import os
+import platform
+import random
+import resource
+import subprocess
+import sys
+import tempfile
+import threading
+import time
+import wave
+from datetime import datetime, timezone
+
+import numpy as np
+
+from backend.transcription.alignment import AlignedSegment, SpeakerTurn, align_segments, format_aligned_segments
+from backend.transcription.chunking import SAMPLE_RATE
+
+STAGES = ["decoding", "asr", "diarization", "alignment", "digest", "summary"]
+
+STUB_DIGEST = json.dumps({
+    "overview": "Synthetic meeting used for benchmarking.",
+    "decisions": ["Ship the benchmark suite"],
+    "action_items": [{"owner": "SPEAKER_00", "task": "Compare the report with the baseline", "due": None}],
+    "blockers": [],
+    "speaker_highlights": [{"speaker": "SPEAKER_00", "highlights": ["Presented the results"]}],
+})
+
+
+class Fixture:
+    def __init__(self, name: str, path: str, duration: float, speakers: int, reference: list[AlignedSegment]):
+        self.name = name
+        self.path = path
+        self.duration = duration
+        self.speakers = speakers
+        # Ground truth: what ASR + diarization + alignment should produce
+        self.reference = reference
+
+    @property
+    def reference_segments(self) -> list[dict]:
+        return [{"start": s.start, "end": s.end, "text": s.text} for s in self.reference]
+
+    @property
+    def reference_turns(self) -> list[SpeakerTurn]:
+        return [SpeakerTurn(s.start, s.end, s.speaker) for s in self.reference]
+
+
+def synthesize_fixture(directory: str, duration: float, speakers: int, seed: int = 7) -> Fixture:
+    """Write a 16 kHz mono WAV of ``speakers`` synthetic voices taking turns for ``duration`` seconds"""
+    rng = random.Random(seed + int(duration))
+    pitches = [110.0 + 140.0 * i / max(speakers - 1, 1) for i in range(speakers)]
+    audio = np.zeros(int(duration * SAMPLE_RATE), dtype=np.float32)
+    reference = []
+    cursor = 0.5
+    previous = None
+    word = 0
+    while cursor < duration - 2.0:
+        speaker = rng.choice([i for i in range(speakers) if i != previous] or [0])
+        previous = speaker
+        turn_end = min(cursor + rng.uniform(2.0, 12.0), duration - 0.5)
+        turn_start = cursor
+        words = []
+        while cursor < turn_end:
+            # One "syllable": a few harmonics of the speaker's pitch under a smooth envelope, with pitch jitter
+            length = rng.uniform(0.12, 0.3)
+            n = int(length * SAMPLE_RATE)
+            t = np.arange(n) / SAMPLE_RATE
+            f0 = pitches[speaker] * rng.uniform(0.9, 1.1)
+            tone = sum(np.sin(2 * np.pi * f0 * k * t) / k for k in range(1, 5))
+            start = int(cursor * SAMPLE_RATE)
+            audio[start:start + n] += (0.2 * np.hanning(n) * tone)[:len(audio) - start].astype(np.float32)
+            words.append(f"word{word}")
+            word += 1
+            cursor += length + rng.uniform(0.02, 0.15)
+        reference.append(AlignedSegment(turn_start, cursor, f"SPEAKER_{speaker:02d}", " ".join(words)))
+        cursor += rng.uniform(0.2, 1.0)
+    audio += np.random.default_rng(seed).normal(0, 0.003, len(audio)).astype(np.float32)
+
+    name = f"{int(duration)}s-{speakers}spk"
+    path = os.path.join(directory, f"{name}.wav")
+    with wave.open(path, "wb") as f:
+        f.setnchannels(1)
+        f.setsampwidth(2)
+        f.setframerate(SAMPLE_RATE)
+        f.writeframes((np.clip(audio, -1, 1) * 32767).astype("<i2").tobytes())
+    return Fixture(name, path, duration, speakers, reference)
+
+
+def _rss_bytes() -> int:
+    try:
+        with open("/proc/self/statm", "r") as f:
+            return int(f.read().split()[1]) * os.sysconf("SC_PAGE_SIZE")
+    except OSError:
+        # Not Linux: fall back to the lifetime peak (kilobytes on Linux/BSD, bytes on macOS)
+        peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+        return peak if sys.platform == "darwin" else peak * 1024
+
+
+def _cpu_seconds() -> float:
+    times = os.times()
+    return times.user + times.system + times.children_user + times.children_system
+
+
+class StageMeter:
+    """Measure wall time, CPU time and peak RSS (sampled every ``interval`` seconds) of a block of code"""
+
+    def __init__(self, interval: float = 0.01):
+        self.interval = interval
+        self.peak_rss = 0
+        self._stop = threading.Event()
+
+    def _sample(self):
+        while not self._stop.wait(self.interval):
+            self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+    def __enter__(self) -> "StageMeter":
+        self.peak_rss = _rss_bytes()
+        self._sampler = threading.Thread(target=self._sample, daemon=True)
+        self._sampler.start()
+        self._cpu = _cpu_seconds()
+        self._start = time.perf_counter()
+        return self
+
+    def __exit__(self, *exc):
+        self.wall = time.perf_counter() - self._start
+        self.cpu = _cpu_seconds() - self._cpu
+        self._stop.set()
+        self._sampler.join()
+        self.peak_rss = max(self.peak_rss, _rss_bytes())
+
+    def report(self, duration: float) -> dict:
+        return {
+            "wall_seconds": round(self.wall, 4),
+            "rtf": round(self.wall / duration, 5),
+            "cpu_seconds": round(self.cpu, 4),
+            "cpu_utilization": round(self.cpu / self.wall, 3) if self.wall else 0.0,
+            "peak_rss_bytes": self.peak_rss,
+        }
+
+
+def stub_llm(latency: float):
+    """Route every ChatOpenAI client built by the summary chains to a fake model that sleeps ``latency`` seconds"""
+    import langchain_openai
+    from langchain_core.language_models.fake_chat_models import FakeListChatModel
+
+    def fake_chat_openai(**kwargs):
+        return FakeListChatModel(responses=[STUB_DIGEST], sleep=latency or None, callbacks=kwargs.get("callbacks"))
+
+    langchain_openai.ChatOpenAI = fake_chat_openai
+
+
+def run_fixture(fixture: Fixture, stages: list[str], attendees: int, scratch_dir: str) -> dict:
+    from backend.services import transcribe
+    from benchmarks.summary_digest import synthetic_profile
+
+    results = {}
+
+    def measure(stage: str, func, *args):
+        with StageMeter() as meter:
+            output = func(*args)
+        results[stage] = meter.report(fixture.duration)
+        result = results[stage]
+        print(f"  {stage:<12} {meter.wall:>9.2f}s  RTF {result['rtf']:.4f}  CPU {result['cpu_utilization']:.2f} cores  "
+              f"peak RSS {meter.peak_rss / 2 ** 20:.0f} MiB")
+        return output
+
+    waveform = None
+    if "decoding" in stages:
+        waveform = measure(
+            "decoding", transcribe.decode_audio, fixture.path, os.path.join(scratch_dir, f"{fixture.name}.npy")
+        )
+    elif "asr" in stages or "diarization" in stages:
+        from backend.transcription.audio import write_shared_waveform
+
+        with wave.open(fixture.path, "rb") as f:
+            samples = np.frombuffer(f.readframes(f.getnframes()), "<i2").astype(np.float32) / 32768
+        waveform = write_shared_waveform(samples, os.path.join(scratch_dir, f"{fixture.name}.npy"))
+
+    segments = measure("asr", transcribe.transcribe_segments, waveform) if "asr" in stages \
+        else fixture.reference_segments
+    turns = measure("diarization", transcribe.diarize_turns, waveform) if "diarization" in stages \
+        else fixture.reference_turns
+    if "alignment" in stages:
+        measure("alignment", align_segments, segments, turns)
+    if waveform is not None:
+        os.remove(waveform.path)
+
+    transcript = format_aligned_segments(fixture.reference)
+    meeting_digest = None
+    if "digest" in stages:
+        meeting_digest = measure("digest", transcribe.get_meeting_digest, transcript, False)
+    if "summary" in stages:
+        digest_text = transcribe.format_meeting_digest(meeting_digest) if meeting_digest else transcript
+        profiles = [synthetic_profile(i) for i in range(attendees)]
+        measure("summary", lambda: [transcribe.generate_employee_summary(digest_text, p) for p in profiles])
+
+    return {
+        "duration_seconds": fixture.duration,
+        "speakers": fixture.speakers,
+        "transcript_tokens": transcribe.count_tokens(transcript, transcribe.SUMMARY_MODEL_NAME),
+        "stages": results,
+        "total": {
+            "wall_seconds": round(sum(stage["wall_seconds"] for stage in results.values()), 4),
+            "rtf": round(sum(stage["wall_seconds"] for stage in results.values()) / fixture.duration, 5),
+            "peak_rss_bytes": max((stage["peak_rss_bytes"] for stage in results.values()), default=0),
+        },
+    }
+
+
+def _git_commit() -> str | None:
+    try:
+        return subprocess.run(
+            ["git", "rev-parse", "--short", "HEAD"], capture_output=True, text=True, check=True
+        ).stdout.strip()
+    except (OSError, subprocess.CalledProcessError):
+        return None
+
+
+def compare(report: dict, baseline: dict):
+    print(f"\nchange vs {baseline['meta'].get('commit') or 'baseline'} (wall time, negative is faster)")
+    for name, fixture in report["fixtures"].items():
+        base_fixture = baseline["fixtures"].get(name)
+        if base_fixture is None:
+            continue
+        for stage, result in fixture["stages"].items():
+            base = base_fixture["stages"].get(stage)
+            if base and base["wall_seconds"]:
+                change = (result["wall_seconds"] - base["wall_seconds"]) / base["wall_seconds"]
+                print(f"  {name:<16} {stage:<12} {base['wall_seconds']:>9.2f}s -> {result['wall_seconds']:>9.2f}s "
+                      f"({change:+.1%})")
+
+
+def run(durations: list[float], speakers: int, stages: list[str], attendees: int, llm_latency: float) -> dict:
+    from backend.services import transcribe
+
+    stub_llm(llm_latency)
+    transcribe.summary_cache.enabled = False
+    if "asr" in stages:
+        transcribe.get_whisper_model()
+    if "diarization" in stages and transcribe.get_diarization_pipeline() is None:
+        raise RuntimeError("The diarization pipeline could not be loaded, check HF_TOKEN or leave out diarization")
+
+    report = {
+        "meta": {
+            "commit": _git_commit(),
+            "timestamp": datetime.now(timezone.utc).isoformat(),
+            "python": platform.python_version(),
+            "platform": platform.platform(),
+            "cpu_count": os.cpu_count(),
+            "whisper_model": transcribe.WHISPER_MODEL_NAME,
+            "stages": stages,
+            "attendees": attendees,
+            "llm_latency_seconds": llm_latency,
+        },
+        "fixtures": {},
+    }
+    with tempfile.TemporaryDirectory() as scratch_dir:
+        for duration in durations:
+            fixture = synthesize_fixture(scratch_dir, duration, speakers)
+            print(f"{fixture.name}: {len(fixture.reference)} turns")
+            report["fixtures"][fixture.name] = run_fixture(fixture, stages, attendees, scratch_dir)
+    return report
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--durations", type=float, nargs="+", default=[60, 300, 900], help="Fixture lengths (s)")
+    parser.add_argument("--speakers", type=int, default=3)
+    parser.add_argument("--stages", nargs="+", choices=STAGES, default=STAGES)
+    parser.add_argument("--attendees", type=int, default=5, help="Personalized summaries per fixture")
+    parser.add_argument("--llm-latency", type=float, default=0.0, help="Seconds the stubbed LLM takes per call")
+    parser.add_argument("--output", default="pipeline_benchmark.json")
+    parser.add_argument("--compare", help="Earlier report to compare against")
+    args = parser.parse_args()
+
+    result = run(args.durations, args.speakers, args.stages, args.attendees, args.llm_latency)
+    with open(args.output, "w") as f:
+        json.dump(result, f, indent=2)
+    print(f"\nreport written to {args.output}")
+    if args.compare:
+        with open(args.compare, "r") as f:
+            compare(result, json.load(f))
@@ -0,0 +1,132 @@
+"""
+Compare the latency of grading retrieved documents one after another (the previous behaviour of
+``GraphNodes._base_grade_documents``) against concurrent per-document grading and listwise grading (all documents
+in one call), and the grader prompt tokens each mode sends per query.
+
+The graders are stubs that answer after a log-normally distributed delay, mimicking LLM round trips
+(median ``--latency`` seconds, with a long tail), and mark every other document relevant so order preservation
+can be checked. Prompt tokens are counted on the real grader prompts filled with synthetic documents of
+``--document-words`` words.
+
+Usage:
+    python -m benchmarks.retrieval_grading [--documents 5] [--latency 0.8] [--queries 20] [--concurrency 5]
+                                           [--document-words 250]
+"""
+import argparse
+import asyncio
+import random
+import statistics
+import time
+
+from langchain_core.language_models.fake_chat_models import FakeListChatModel
+from langchain_openai import ChatOpenAI
+
+from backend.agent.grader import DocumentGrade, DocumentGrades, GraderUtils
+from backend.agent.graph import GradingModeEnum, Steps
+from backend.agent.nodes import GraphNodes
+from backend.transcription.tokens import count_tokens
+
+PROMPT = "What did we decide about the release?"
+GRADER_MODEL = "gpt-4o-mini"
+
+
+def is_relevant(index: int) -> bool:
+    return index % 2 == 0
+
+
+class StubGrader:
+    def __init__(self, latency: float, seed: int = 7):
+        self.latency = latency
+        self.rng = random.Random(seed)
+
+    async def ainvoke(self, inputs: dict, config: dict | None = None) -> dict:
+        await asyncio.sleep(self.latency * self.rng.lognormvariate(0, 0.4))
+        return {"score": "yes" if is_relevant(int(inputs["resources"].split()[1])) else "no"}
+
+
+class StubListwiseGrader(StubGrader):
+    async def ainvoke(self, inputs: dict, config: dict | None = None) -> DocumentGrades:
+        await asyncio.sleep(self.latency * self.rng.lognormvariate(0, 0.4))
+        documents = inputs["resources"].count("document ")
+        return DocumentGrades(grades=[
+            DocumentGrade(index=i + 1, score="yes" if is_relevant(i) else "no") for i in range(documents)
+        ])
+
+
+def prompt_tokens(documents: int, document_words: int) -> dict[str, int]:
+    """Grader prompt tokens per query, per-document vs listwise, rendered from the real grader prompts"""
+    # The client is never called, it is only needed to build the chains
+    grader = GraderUtils(llm=ChatOpenAI(api_key="unused"))
+    resources = [f"document {i} " + " ".join(f"word{j}" for j in range(document_words)) for i in range(documents)]
+    per_document = grader.create_retrieval_grader().first
+    listwise = grader.create_listwise_retrieval_grader().first
+    numbered = "\n\n".join(f"{i + 1}. {resource}" for i, resource in enumerate(resources))
+    return {
+        "per-document": sum(
+            count_tokens(per_document.format(prompt=PROMPT, resources=resource), GRADER_MODEL) for resource in resources
+        ),
+        "listwise": count_tokens(listwise.format(prompt=PROMPT, resources=numbered), GRADER_MODEL),
+    }
+
+
+async def grade_serially(nodes: GraphNodes, state: dict) -> dict:
+    # The loop GraphNodes used before grading concurrently
+    filtered = []
+    for resource in state["resources"]:
+        score = await nodes.retrieval_grader.ainvoke({"prompt": state["prompt"], "resources": resource})
+        if score["score"].lower() == "yes":
+            filtered.append(resource)
+    return {**state, "resources": filtered}
+
+
+async def run(documents: int, latency: float, queries: int, concurrency: int, document_words: int):
+    def graph_nodes(grader, grading_mode: GradingModeEnum) -> GraphNodes:
+        return GraphNodes(
+            llm=FakeListChatModel(responses=["stub"]), retriever=None, retrieval_grader=grader, web_search_tool=None,
+            paper_search_tool=None, grader_concurrency=concurrency, grader_timeout=latency * 10,
+            grading_mode=grading_mode,
+        )
+
+    per_document = graph_nodes(StubGrader(latency), GradingModeEnum.PER_DOCUMENT)
+    listwise = graph_nodes(StubListwiseGrader(latency), GradingModeEnum.LISTWISE)
+
+    def new_state() -> dict:
+        return {"prompt": PROMPT, "steps": [Steps.VECTOR_STORE_RETRIEVAL.value],
+                "resources": [f"document {i}" for i in range(documents)]}
+
+    modes = {
+        "serial": lambda: grade_serially(per_document, new_state()),
+        "concurrent": lambda: per_document.grade_vector_store_documents(new_state()),
+        "listwise": lambda: listwise.grade_vector_store_documents(new_state()),
+    }
+    timings = {mode: [] for mode in modes}
+    for _ in range(queries):
+        results = {}
+        for mode, grade in modes.items():
+            start = time.perf_counter()
+            results[mode] = (await grade())["resources"]
+            timings[mode].append(time.perf_counter() - start)
+        assert results["concurrent"] == results["serial"] == results["listwise"], "grading changed the resources"
+
+    tokens = prompt_tokens(documents, document_words)
+    tokens["serial"] = tokens["concurrent"] = tokens["per-document"]
+    calls = {"serial": documents, "concurrent": documents, "listwise": 1}
+    print(f"{documents} documents of {document_words} words per query, {queries} queries, "
+          f"stub grader median latency {latency:.2f}s")
+    print(f"{'mode':<14} {'calls':>6} {'prompt tokens':>14} {'mean (s)':>9} {'p50 (s)':>9} {'p95 (s)':>9}")
+    for mode, samples in timings.items():
+        samples = sorted(samples)
+        p95 = samples[min(len(samples) - 1, int(len(samples) * 0.95))]
+        print(f"{mode:<14} {calls[mode]:>6} {tokens[mode]:>14} {statistics.mean(samples):>9.2f} "
+              f"{statistics.median(samples):>9.2f} {p95:>9.2f}")
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--documents", type=int, default=5)
+    parser.add_argument("--latency", type=float, default=0.8, help="Median grader latency in seconds")
+    parser.add_argument("--queries", type=int, default=20)
+    parser.add_argument("--concurrency", type=int, default=5)
+    parser.add_argument("--document-words", type=int, default=250)
+    args = parser.parse_args()
+    asyncio.run(run(args.documents, args.latency, args.queries, args.concurrency, args.document_words))
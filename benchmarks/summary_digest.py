@@ -0,0 +1,96 @@
+"""
+Compare the tokens and latency of personalized summaries generated from the raw transcript (one full transcript
+per attendee) against summaries generated from the shared meeting digest (transcript read once, then one small
+digest per attendee).
+
+Calls the OpenAI API with the configured summary model; the summary cache is disabled so every call is measured.
+Attendee profiles are synthetic.
+
+Usage:
+    python -m benchmarks.summary_digest --transcript transcript.txt [--attendees 5]
+"""
+import argparse
+import statistics
+import time
+
+from langchain_community.callbacks import get_openai_callback
+
+from backend.services import transcribe
+
+ROLES = ["Data Engineer", "Data Analyst", "ML Engineer", "Product Manager", "Engineering Manager", "QA Engineer"]
+
+
+def synthetic_profile(i: int) -> dict:
+    return {
+        "EmployeeID": 1000 + i,
+        "EmployeeName": f"Employee {i}",
+        "Email": f"employee{i}@example.com",
+        "JobLevel": f"L{2 + i % 4}",
+        "RoleType": ROLES[i % len(ROLES)],
+        "DepartmentID": 10 + i % 3,
+        "CurrentProjectID": 200 + i % 4,
+        "SupervisorID": 1000,
+        "Projects": [{
+            "ProjectID": 200 + i % 4, "ProjectName": f"Project {i % 4}", "ProjectDescription": "Synthetic project",
+            "StartDate": "2024-01-01", "EndDate": "2024-12-31", "ProjectStatus": "Active",
+            "ProjectManagerID": 1000, "JiraBoardID": f"BOARD-{i % 4}",
+        }],
+    }
+
+
+def measure(func, *args):
+    """Call ``func`` and return its result with (prompt tokens, completion tokens, seconds) spent on it"""
+    with get_openai_callback() as usage:
+        start = time.perf_counter()
+        result = func(*args)
+        elapsed = time.perf_counter() - start
+    return result, (usage.prompt_tokens, usage.completion_tokens, elapsed)
+
+
+def summarize_raw(transcript: str, employee: dict):
+    # The pre-digest behaviour: the whole transcript goes into every personalized prompt
+    return transcribe.get_summary_chain().run(
+        transcribe.employee_prompt_inputs(employee) | {"MeetingDigest": transcript}
+    )
+
+
+def report(label: str, runs: list[tuple[int, int, float]]):
+    prompt = statistics.mean(run[0] for run in runs)
+    completion = statistics.mean(run[1] for run in runs)
+    latency = statistics.mean(run[2] for run in runs)
+    print(f"{label:<32} {prompt:>14.0f} {completion:>18.0f} {latency:>12.2f}")
+
+
+def run(transcript_path: str, attendees: int):
+    transcribe.summary_cache.enabled = False
+    with open(transcript_path, "r") as f:
+        transcript = f.read()
+    profiles = [synthetic_profile(i) for i in range(attendees)]
+
+    raw_runs = [measure(summarize_raw, transcript, profile)[1] for profile in profiles]
+
+    digest, digest_run = measure(transcribe.generate_meeting_digest, transcript)
+    meeting_digest = transcribe.format_meeting_digest(digest)
+    digest_runs = [
+        measure(transcribe.generate_employee_summary, meeting_digest, profile)[1] for profile in profiles
+    ]
+    amortized = [
+        (run[0] + digest_run[0] / attendees, run[1] + digest_run[1] / attendees, run[2] + digest_run[2] / attendees)
+        for run in digest_runs
+    ]
+
+    print(f"transcript: {transcribe.count_tokens(transcript, transcribe.SUMMARY_MODEL_NAME)} tokens, "
+          f"digest: {transcribe.count_tokens(meeting_digest, transcribe.SUMMARY_MODEL_NAME)} tokens, "
+          f"{attendees} attendees")
+    print(f"{'per summary':<32} {'prompt tokens':>14} {'completion tokens':>18} {'latency (s)':>12}")
+    report("raw transcript", raw_runs)
+    report("digest (personalization only)", digest_runs)
+    report("digest (incl. shared digest)", amortized)
+
+
+if __name__ == "__main__":
+    parser = argparse.ArgumentParser(description=__doc__, formatter_class=argparse.RawDescriptionHelpFormatter)
+    parser.add_argument("--transcript", required=True, help="Diarized transcript text file")
+    parser.add_argument("--attendees", type=int, default=5)
+    args = parser.parse_args()
+    run(args.transcript, args.attendees)
@@ -0,0 +1,14 @@
+import os
+import tempfile
+
+# Settings are read once, at import; the tests only need placeholders for the external services and a local queue
+_REQUIRED_SETTINGS = [
+    "AWS_ACCESS_KEY_ID", "AWS_SECRET_ACCESS_KEY", "AWS_REGION", "AWS_S3_BUCKET", "JWT_SECRET_KEY",
+    "POSTGRES_CONN_STRING", "POSTGRES_PASSWORD", "PINECONE_API_KEY", "PINECONE_ENVIRONMENT", "PINECONE_INDEX_NAME",
+    "OPENAI_API_KEY", "TAVILY_API_KEY", "SNOWFLAKE_DB_USER", "SNOWFLAKE_DB_PASSWORD", "SNOWFLAKE_DB_ACCOUNT",
+    "SNOWFLAKE_DB_DATABASE", "SNOWFLAKE_DB_WAREHOUSE", "SNOWFLAKE_DB_SCHEMA", "SNOWFLAKE_DB_ROLE", "BACKEND_URI",
+    "HF_TOKEN",
+]
+for name in _REQUIRED_SETTINGS:
+    os.environ.setdefault(name, "test")
+os.environ["JOB_QUEUE_DB_URI"] = f"sqlite:///{tempfile.mkdtemp()}/jobs.db"
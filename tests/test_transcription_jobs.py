@@ -0,0 +1,34 @@
+import threading
+from concurrent.futures import ThreadPoolExecutor
+
+from backend.database.transcription_jobs import (
+    StageStatusEnum, TranscriptionStage, claim_next_transcription_job, enqueue_transcription_job,
+    get_transcription_job_by_id, init_transcription_jobs_table, update_transcription_job_stage,
+)
+
+
+def test_concurrent_stage_updates_are_all_kept():
+    init_transcription_jobs_table()
+    stages = list(TranscriptionStage)
+    for transcription_id in range(10):
+        enqueue_transcription_job(transcription_id, user_id=1, audio_s3_key=f"transcription_jobs/{transcription_id}")
+        job = claim_next_transcription_job(worker_id="worker", lease_seconds=60, max_attempts=3)
+        # Every stage is written at the same moment, as ASR and diarization are in ``transcribe_and_diarize``
+        barrier = threading.Barrier(len(stages))
+
+        def complete_stage(stage: TranscriptionStage):
+            barrier.wait()
+            assert update_transcription_job_stage(job.id, "worker", stage, StageStatusEnum.COMPLETED)
+
+        with ThreadPoolExecutor(max_workers=len(stages)) as executor:
+            list(executor.map(complete_stage, stages))
+
+        assert get_transcription_job_by_id(job.id).stages == {stage: StageStatusEnum.COMPLETED for stage in stages}
+
+
+def test_stage_update_by_another_worker_is_ignored():
+    init_transcription_jobs_table()
+    job = enqueue_transcription_job(transcription_id=100, user_id=1, audio_s3_key="transcription_jobs/100")
+
+    assert not update_transcription_job_stage(job.id, "worker", TranscriptionStage.ASR, StageStatusEnum.RUNNING)
+    assert get_transcription_job_by_id(job.id).stages[TranscriptionStage.ASR] == StageStatusEnum.PENDING